@@ -10,8 +10,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
+import asyncio
 
-from app.routers import analyze
+from app.routers import analyze, jobs, metrics
+from app.services.extractor import TextExtractor
 
 # Load environment variables
 load_dotenv()
@@ -36,6 +38,45 @@ app.add_middleware(
 
 # Include routers
 app.include_router(analyze.router, prefix="/api", tags=["Analysis"])
+app.include_router(jobs.router, prefix="/api", tags=["Jobs"])
+app.include_router(metrics.router, tags=["Metrics"])
+
+# Build the pipeline at startup; when false it is built on the first
+# request or POST /api/warmup, which keeps --reload cycles fast
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+async def _warm_up():
+    try:
+        await analyze.pipeline_provider.warm_up()
+    except Exception as e:
+        print(f" Pipeline warm-up failed: {e}")
+
+@app.on_event("startup")
+async def warm_pipeline():
+    """Build the pipeline and precompute preset query embeddings in the background; /api/ready reports when done"""
+    app.state.warm_up = asyncio.create_task(_warm_up()) if WARMUP_ON_STARTUP else None
+
+@app.on_event("shutdown")
+async def stop_warm_up():
+    """Abandon a warm-up still waiting on the embedding API"""
+    if app.state.warm_up is not None:
+        app.state.warm_up.cancel()
+    analyze.pipeline_provider.cancel_warm_up()
+
+@app.on_event("startup")
+async def start_job_workers():
+    """Resume queued and interrupted jobs in the background"""
+    await jobs.job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    """Stop the workers; their running jobs are queued again"""
+    await jobs.job_queue.stop()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close pooled document-download connections"""
+    await TextExtractor.fetcher.aclose()
 
 @app.get("/")
 async def root():
@@ -44,7 +85,8 @@ async def root():
         "message": "AI Financial Research Agent API",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/api/health"
+        "health": "/api/health",
+        "ready": "/api/ready"
     }
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Literal
 
+# Query of requests that do not ask their own question
+DEFAULT_QUERY = "Analyze this financial document and extract key insights"
 
 class AnalyzeRequest(BaseModel):
     """Request schema for the /analyze endpoint."""
@@ -31,10 +33,16 @@ class AnalyzeRequest(BaseModel):
     )
 
     query: Optional[str] = Field(
-        "Analyze this financial document and extract key insights",
+        DEFAULT_QUERY,
         description="Optional custom query",
     )
 
+    bypass_cache: bool = Field(
+        False,
+        alias="bypass-cache",
+        description="Skip the cached result and re-run the full analysis",
+    )
+
     class Config:
         # Allow both `analysis_type` and `analysis-type` in requests
         allow_population_by_field_name = True
@@ -123,4 +131,58 @@ class HealthResponse(BaseModel):
     status: str
     faiss_index_loaded: bool
     embedding_model: str
-    llm_model: str
\ No newline at end of file
+    llm_model: str
+
+
+class ReadinessResponse(BaseModel):
+    """Whether the analysis pipeline is built and warmed up."""
+
+    ready: bool
+    state: Literal["cold", "building", "warming", "ready", "failed"]
+    error: Optional[str] = Field(default=None, description="Why the last build attempt failed")
+    build_seconds: Optional[float] = Field(default=None, description="Time taken to build the pipeline")
+    warm_up_seconds: Optional[float] = Field(default=None, description="Time taken to embed the preset queries")
+
+class BatchAnalyzeRequest(BaseModel):
+    """Request schema for the /analyze/batch endpoint."""
+
+    items: List[AnalyzeRequest] = Field(..., description="Documents to analyze, each with its own options")
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one document in a batch, in request order."""
+
+    index: int = Field(..., description="Position of the item in the request")
+    status: Literal["ok", "error"]
+    result: Optional[AnalyzeResponse] = None
+    error_status: Optional[int] = Field(
+        default=None,
+        description="HTTP status the item would have failed with on /analyze (400 or 500)",
+    )
+    error: Optional[str] = None
+
+
+class BatchAnalyzeResponse(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+
+
+class JobStatus(BaseModel):
+    """State of a background analysis job."""
+
+    id: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    stage: Optional[str] = Field(
+        default=None,
+        description="Last pipeline stage finished by a running job",
+    )
+    attempts: int = Field(0, description="Times the job has been started")
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error_status: Optional[int] = Field(
+        default=None,
+        description="HTTP status the job would have failed with on /analyze (400 or 500)",
+    )
+    error: Optional[str] = None
@@ -1,14 +1,44 @@
-from fastapi import APIRouter, HTTPException  # pyright: ignore[reportMissingImports]
-from app.models.schema import AnalyzeRequest, AnalyzeResponse, HealthResponse
-from app.services.rag import RAGPipeline
+import os
+import json
+import asyncio
+from typing import TYPE_CHECKING, AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException  # pyright: ignore[reportMissingImports]
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.models.schema import (
+    AnalyzeRequest,
+    AnalyzeResponse,
+    BatchAnalyzeRequest,
+    BatchAnalyzeResponse,
+    BatchItemResult,
+    HealthResponse,
+    ReadinessResponse,
+)
+from app.services.pipeline_provider import PipelineProvider
+
+if TYPE_CHECKING:
+    from app.services.rag import RAGPipeline
 
 router = APIRouter()
 
-# Initialize RAG pipeline (singleton)
-rag_pipeline = RAGPipeline()
+# The shared RAG pipeline, built on first use or by /warmup
+pipeline_provider = PipelineProvider()
+
+async def get_pipeline() -> "RAGPipeline":
+    """Dependency: the shared pipeline, or 503 while it cannot be built"""
+    try:
+        return await pipeline_provider.get()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Pipeline unavailable: {str(e)}")
+
+# Idle seconds before an event stream sends a keep-alive comment
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Most documents a single /analyze/batch call may carry
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
 
 @router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_document(request: AnalyzeRequest):
+async def analyze_document(request: AnalyzeRequest, rag_pipeline: "RAGPipeline" = Depends(get_pipeline)):
     """
     Analyze a financial document using RAG pipeline
     
@@ -17,7 +47,7 @@ async def analyze_document(request: AnalyzeRequest):
     - **query**: Optional analysis query (default: general analysis)
     """
     try:
-        result = rag_pipeline.process_document(request)
+        result = await rag_pipeline.process_document(request)
         return result
     
     except ValueError as e:
@@ -25,8 +55,102 @@ async def analyze_document(request: AnalyzeRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@router.post("/analyze/batch", response_model=BatchAnalyzeResponse)
+async def analyze_batch(request: BatchAnalyzeRequest, rag_pipeline: "RAGPipeline" = Depends(get_pipeline)):
+    """
+    Analyze several financial documents in one call
+    
+    - **items**: AnalyzeRequests, each with the same fields as /analyze
+    
+    Documents are extracted concurrently and their chunks share embedding
+    requests. Every item gets its own result or error, in request order;
+    one failing document does not fail the batch.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+    
+    try:
+        outcomes = await rag_pipeline.process_batch(request.items)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
+    
+    results = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, ValueError):
+            results.append(BatchItemResult(index=index, status="error", error_status=400, error=str(outcome)))
+        elif isinstance(outcome, Exception):
+            results.append(BatchItemResult(
+                index=index, status="error", error_status=500, error=f"Analysis failed: {str(outcome)}"
+            ))
+        else:
+            results.append(BatchItemResult(index=index, status="ok", result=outcome))
+    
+    succeeded = sum(item.status == "ok" for item in results)
+    return BatchAnalyzeResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+@router.post("/analyze/stream")
+async def analyze_document_stream(request: AnalyzeRequest, rag_pipeline: "RAGPipeline" = Depends(get_pipeline)):
+    """
+    Analyze a financial document, streaming progress as Server-Sent Events
+    
+    Takes the same body as /analyze. Events, each with a JSON payload:
+    
+    - **started**: sent immediately
+    - **extracted**, **cached**, **chunked**, **embedded**, **retrieved**, **analyzed**:
+      pipeline stages, with stage_ms and elapsed_ms timings
+    - **llm_delta**: the next piece of the model's JSON output (`text`)
+    - **result**: the final AnalyzeResponse
+    - **error**: `status` (400 or 500) and `detail`; ends the stream
+    """
+    return StreamingResponse(
+        _analysis_events(rag_pipeline, request),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _sse(event: str, data) -> str:
+    """One Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def _analysis_events(rag_pipeline: "RAGPipeline", request: AnalyzeRequest) -> AsyncIterator[str]:
+    """Run the pipeline in a task and relay its progress as it happens"""
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(
+        rag_pipeline.process_document(request, lambda event, data: queue.put_nowait((event, data)))
+    )
+    # Progress is reported synchronously, so this marker always comes last
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    
+    try:
+        yield _sse("started", {"type": request.type})
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            yield _sse(*item)
+        
+        try:
+            result = task.result()
+        except ValueError as e:
+            yield _sse("error", {"status": 400, "detail": str(e)})
+        except Exception as e:
+            yield _sse("error", {"status": 500, "detail": f"Analysis failed: {str(e)}"})
+        else:
+            yield _sse("result", result)
+    finally:
+        # The client went away mid-stream
+        if not task.done():
+            task.cancel()
+
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(rag_pipeline: "RAGPipeline" = Depends(get_pipeline)):
     """Check API and pipeline health"""
     try:
         stats = rag_pipeline.get_stats()
@@ -41,9 +165,33 @@ async def health_check():
         raise HTTPException(status_code=503, detail=f"Health check failed: {str(e)}")
 
 @router.get("/stats")
-async def get_stats():
+async def get_stats(rag_pipeline: "RAGPipeline" = Depends(get_pipeline)):
     """Get detailed pipeline statistics"""
     try:
-        return rag_pipeline.get_stats()
+        return {**rag_pipeline.get_stats(), "pipeline": pipeline_provider.get_stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ready", response_model=ReadinessResponse, responses={503: {"model": ReadinessResponse}})
+async def readiness():
+    """
+    Readiness probe: 200 once the pipeline is built and warmed up, else 503
+    
+    Does not build the pipeline itself; that happens at startup (unless
+    WARMUP_ON_STARTUP is false), on the first analysis or on /warmup.
+    """
+    status = ReadinessResponse(ready=pipeline_provider.ready, **pipeline_provider.get_stats())
+    return JSONResponse(jsonable_encoder(status), status_code=200 if status.ready else 503)
+
+@router.post("/warmup", response_model=ReadinessResponse)
+async def warmup():
+    """
+    Build the pipeline and embed the preset queries now, and wait for it
+    
+    Returns once the pipeline is ready; 503 if it cannot be built.
+    """
+    try:
+        await pipeline_provider.warm_up()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=503, detail=f"Pipeline unavailable: {str(e)}")
+    return ReadinessResponse(ready=pipeline_provider.ready, **pipeline_provider.get_stats())
@@ -0,0 +1,76 @@
+import json
+import asyncio
+from typing import List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Query  # pyright: ignore[reportMissingImports]
+from app.models.schema import AnalyzeRequest, AnalyzeResponse, JobStatus
+from app.routers.analyze import pipeline_provider
+from app.services.job_queue import JobQueue
+
+router = APIRouter()
+
+# Background workers share the analysis pipeline; started with the app
+job_queue = JobQueue(pipeline_provider)
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(request: AnalyzeRequest):
+    """
+    Queue a document analysis to run in the background
+
+    Takes the same body as /analyze and returns at once with the job id.
+    Poll /jobs/{id} for its status and fetch /jobs/{id}/result when it
+    has succeeded.
+    """
+    try:
+        job = await job_queue.submit(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not queue job: {str(e)}")
+    return JobStatus(**job)
+
+@router.get("/jobs", response_model=List[JobStatus])
+async def list_jobs(
+    status: Optional[Literal["queued", "running", "succeeded", "failed", "cancelled"]] = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Most recent jobs first, optionally filtered by status"""
+    return [JobStatus(**job) for job in await job_queue.recent(status, limit)]
+
+@router.get("/jobs/stats")
+async def job_stats():
+    """Worker settings and job counts by status"""
+    return await asyncio.to_thread(job_queue.get_stats)
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Status of a job: queued, running (with its stage), succeeded, failed or cancelled"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatus(**job)
+
+@router.get("/jobs/{job_id}/result", response_model=AnalyzeResponse)
+async def get_job_result(job_id: str):
+    """
+    Result of a finished job
+
+    A failed job answers with the status and detail /analyze would have
+    returned; a job that has not succeeded (yet) answers 409.
+    """
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job["error_status"] or 500, detail=job["error"])
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    result = await asyncio.to_thread(job_queue.store.get_result, job_id)
+    return AnalyzeResponse(**json.loads(result))
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    if not await job_queue.cancel(job_id):
+        job = await job_queue.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    return JobStatus(**await job_queue.get(job_id))
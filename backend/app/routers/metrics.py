@@ -0,0 +1,16 @@
+from fastapi import APIRouter  # pyright: ignore[reportMissingImports]
+from fastapi.responses import PlainTextResponse
+from app.services.telemetry import REGISTRY
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Pipeline metrics in the Prometheus text format
+
+    Per-stage and end-to-end latency histograms, document sizes, billed
+    embedding and LLM tokens, and cache hit/miss counts, for Prometheus
+    to scrape.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
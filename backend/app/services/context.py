@@ -0,0 +1,159 @@
+import re
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from app.services.token_chunker import Span
+
+# (text, span in its document or None, similarity)
+RetrievedChunk = Tuple[str, Optional[Span], float]
+
+_SENTENCE_END = re.compile(r"[.?!](?=\s)")
+
+
+class ContextAssembler:
+    """
+    Packs retrieved chunks into a prompt-token budget
+
+    Candidates are taken best-first. Each one is charged only for the
+    tokens of the text it adds beyond what has already been selected, so
+    the overlap neighbouring chunks share is paid for once, and chunks
+    are added until the budget is spent rather than up to a fixed count;
+    the first one that no longer fits is cut to the whole sentences that
+    do. Selected chunks that overlap or touch are then stitched into single
+    passages, emitted in document order. Chunks without a recorded span
+    cannot be merged and follow as they are, best first.
+    """
+
+    def __init__(
+        self,
+        token_budget: int,
+        count_tokens: Callable[[List[str]], List[int]],
+        max_gap: int = 1,
+    ):
+        """
+        Args:
+            token_budget: Prompt tokens the context may use
+            count_tokens: Token count per text (e.g. Embedder.count_tokens)
+            max_gap: Characters (whitespace trimmed from chunk edges) that
+                may separate two chunks and still join them
+        """
+        self.token_budget = token_budget
+        self.count_tokens = count_tokens
+        self.max_gap = max_gap
+
+    def assemble(self, candidates: Sequence[RetrievedChunk]) -> Tuple[List[str], int]:
+        """
+        Choose and merge chunks for the prompt
+
+        Args:
+            candidates: Retrieved chunks, most similar first
+
+        Returns:
+            Passages in document order and the tokens they were charged.
+            The best candidate is always kept, even if it alone exceeds
+            the budget.
+        """
+        covered: List[Span] = []  # Sorted, disjoint document intervals already selected
+        selected: List[Tuple[str, Span]] = []
+        unplaced: List[str] = []
+        used = 0
+
+        for text, span, _ in candidates:
+            if span is None:
+                pieces = [text] if text not in unplaced else []
+            else:
+                pieces = [
+                    text[start - span[0]:end - span[0]]
+                    for start, end in self._uncovered(covered, span)
+                ]
+                pieces = [piece for piece in pieces if piece.strip()]
+            if not pieces:
+                continue  # Already fully in the context
+
+            cost = sum(self.count_tokens(pieces))
+            if used and used + cost > self.token_budget:
+                trimmed = self._trim(text, span, covered, self.token_budget - used) if span else None
+                if trimmed is None:
+                    continue  # A smaller candidate further down may still fit
+                text, span, cost = trimmed
+            used += cost
+            if span is None:
+                unplaced.append(text)
+            else:
+                selected.append((text, span))
+                covered = self._cover(covered, span)
+
+        return self._stitch(selected) + unplaced, used
+
+    def _trim(
+        self, text: str, span: Span, covered: List[Span], tokens: int
+    ) -> Optional[Tuple[str, Span, int]]:
+        """
+        Cut a chunk after the last sentence of its first new part that fits in tokens
+
+        Returns:
+            The shortened chunk, its span and the tokens of its new text,
+            or None if not even one sentence fits
+        """
+        start, end = self._uncovered(covered, span)[0]
+        piece = text[start - span[0]:end - span[0]]
+        # Sentence ends, longest prefix first; the proportional guess skips most counting
+        guess = len(piece) * tokens // max(1, sum(self.count_tokens([piece])))
+        ends = [m.end() for m in _SENTENCE_END.finditer(piece, 0, guess + 1)]
+        for cut in reversed(ends):
+            cost = self.count_tokens([piece[:cut]])[0]
+            if cost <= tokens:
+                stop = start + cut
+                return text[:stop - span[0]], (span[0], stop), cost
+        return None
+
+    @staticmethod
+    def _uncovered(covered: List[Span], span: Span) -> List[Span]:
+        """Parts of span not inside any covered interval"""
+        parts = []
+        position, end = span
+        for start, stop in covered:
+            if stop <= position:
+                continue
+            if start >= end:
+                break
+            if start > position:
+                parts.append((position, start))
+            position = max(position, stop)
+        if position < end:
+            parts.append((position, end))
+        return parts
+
+    @staticmethod
+    def _cover(covered: List[Span], span: Span) -> List[Span]:
+        """Covered intervals with span merged in"""
+        merged = []
+        start, end = span
+        for interval in covered:
+            if interval[1] < start or interval[0] > end:
+                merged.append(interval)
+            else:
+                start, end = min(start, interval[0]), max(end, interval[1])
+        merged.append((start, end))
+        merged.sort()
+        return merged
+
+    def _stitch(self, selected: List[Tuple[str, Span]]) -> List[str]:
+        """Join selected chunks into passages, in document order"""
+        passages = []
+        text, end = None, -1
+        for chunk, (start, stop) in sorted(selected, key=lambda item: item[1]):
+            if text is not None and start <= end:
+                # Overlap: append only the part beyond the passage so far
+                if stop > end:
+                    text += chunk[end - start:]
+                    end = stop
+            elif text is not None and start - end <= self.max_gap:
+                text = f"{text} {chunk}"
+                end = stop
+            else:
+                if text is not None:
+                    passages.append(text)
+                text, end = chunk, stop
+        if text is not None:
+            passages.append(text)
+        return passages
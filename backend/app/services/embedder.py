@@ -1,23 +1,59 @@
 import os
-from typing import List
-import openai
+import asyncio
+import warnings
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
 
+from app.services.token_chunker import Span, TokenChunker, load_encoding
+from app.services.embedding_backends import EmbeddingBackend, create_backend
+from app.services.embedding_cache import EmbeddingCache
+from app.services import telemetry
+
 load_dotenv()
 
+# Rough characters per token, for estimates without the tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def tokens_from_chars(chars: int) -> int:
+    """Approximate token count of a length given in characters"""
+    return chars // CHARS_PER_TOKEN
+
+
 class Embedder:
-    """Generates embeddings using OpenAI API"""
+    """Generates embeddings with the configured backend, cached and batched"""
     
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment")
-        
-        openai.api_key = self.api_key
-        self.model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
-        self.client = openai.OpenAI(api_key=self.api_key)
+    def __init__(self, backend: Optional[EmbeddingBackend] = None):
+        """
+        Args:
+            backend: Where vectors come from (default: EMBEDDING_BACKEND)
+        """
+        self.backend = backend or create_backend()
+        self.model = self.backend.model
+        self.dimension = self.backend.dimension
+        self.cache = EmbeddingCache()
+        
+        # Batch scheduler limits
+        self.max_batch_inputs = int(os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "2048"))
+        self.max_batch_tokens = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "250000"))
+        self.max_concurrency = self.backend.max_concurrency
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._encoding = load_encoding(self.model)
+        
+        # Query embeddings held in memory, most recently used last
+        self.query_cache_size = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+        self._queries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.query_hits = 0
+        self.query_misses = 0
     
-    def embed_text(self, text: str) -> List[float]:
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """Token count per text (roughly 4 characters per token without tiktoken)"""
+        if self._encoding is None:
+            return [max(1, tokens_from_chars(len(text))) for text in texts]
+        return [len(tokens) for tokens in self._encoding.encode_ordinary_batch(texts)]
+    
+    async def embed_text(self, text: str) -> List[float]:
         """
         Generate embedding for a single text
         
@@ -28,18 +64,18 @@ class Embedder:
             List of floats representing the embedding vector
         """
         try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=text
-            )
-            return response.data[0].embedding
+            embeddings = await self.embed_batch([text])
+            return embeddings[0]
         except Exception as e:
             raise Exception(f"Embedding generation failed: {str(e)}")
     
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for multiple texts
         
+        Vectors are looked up in the persistent embedding cache first; only
+        texts that miss are sent to the backend, and their results are cached.
+        
         Args:
             texts: List of text strings
             
@@ -47,50 +83,236 @@ class Embedder:
             List of embedding vectors
         """
         try:
-            # OpenAI allows batch embedding (up to 2048 inputs)
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=texts
+            embeddings = await asyncio.to_thread(
+                self.cache.get_many, texts, self.model, self.dimension
             )
-            return [item.embedding for item in response.data]
+            hits = sum(embedding is not None for embedding in embeddings)
+            telemetry.CACHE_LOOKUPS.inc(hits, cache="embedding", outcome="hit")
+            telemetry.CACHE_LOOKUPS.inc(len(texts) - hits, cache="embedding", outcome="miss")
+            
+            # Embed each distinct missing text once
+            missing = list(dict.fromkeys(
+                text for text, embedding in zip(texts, embeddings) if embedding is None
+            ))
+            if not missing:
+                return embeddings
+            
+            fresh = await self._embed_uncached(missing)
+            
+            by_text = dict(zip(missing, fresh))
+            return [
+                embedding if embedding is not None else by_text[text]
+                for text, embedding in zip(texts, embeddings)
+            ]
         except Exception as e:
             raise Exception(f"Batch embedding failed: {str(e)}")
     
-    def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    async def embed_queries(self, queries: List[str]) -> List[List[float]]:
         """
-        Split text into overlapping chunks
+        Embeddings for retrieval queries, from memory when already known
+        
+        Requests keep asking the same few queries (the default and the
+        facets of each analysis type), so they are held in an in-process
+        LRU and answered without a database lookup or a round trip. Misses
+        go through embed_batch and are also written to the cache's query
+        table, which warm_queries() reloads at startup.
         
         Args:
-            text: Input text
-            chunk_size: Characters per chunk
-            overlap: Overlap between chunks
+            queries: Query strings
             
         Returns:
-            List of text chunks
+            One embedding per query, in order
         """
-        if len(text) <= chunk_size:
-            return [text]
+        hits = sum(query in self._queries for query in queries)
+        self.query_hits += hits
+        self.query_misses += len(queries) - hits
+        telemetry.CACHE_LOOKUPS.inc(hits, cache="query", outcome="hit")
+        telemetry.CACHE_LOOKUPS.inc(len(queries) - hits, cache="query", outcome="miss")
+        return await self._embed_queries(queries)
+    
+    async def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """embed_queries() without counting the lookups"""
+        found = []
+        for query in queries:
+            embedding = self._queries.get(query)
+            if embedding is not None:
+                self._queries.move_to_end(query)
+            found.append(embedding)
+        
+        missing = list(dict.fromkeys(
+            query for query, embedding in zip(queries, found) if embedding is None
+        ))
+        if not missing:
+            return found
         
-        chunks = []
-        start = 0
+        embeddings = await self.embed_batch(missing)
+        self._remember(missing, embeddings)
+        await asyncio.to_thread(
+            self.cache.put_queries, missing, embeddings, self.model, self.dimension, self.query_cache_size
+        )
+        by_query = dict(zip(missing, embeddings))
+        return [
+            embedding if embedding is not None else by_query[query]
+            for query, embedding in zip(queries, found)
+        ]
+    
+    async def warm_queries(self, presets: List[str]) -> int:
+        """
+        Load stored query embeddings and embed any preset not yet known
+        
+        Returns:
+            Number of presets that had to be embedded
+        """
+        stored = await asyncio.to_thread(
+            self.cache.get_queries, self.model, self.dimension, self.query_cache_size
+        )
+        # Oldest first, so the newest end up most recently used
+        self._remember([query for query, _ in reversed(stored)], [embedding for _, embedding in reversed(stored)])
+        
+        missing = [query for query in dict.fromkeys(presets) if query not in self._queries]
+        if missing:
+            # Warming is not traffic, so it is not counted as lookups
+            await self._embed_queries(missing)
+        return len(missing)
+    
+    def _remember(self, queries: List[str], embeddings: List[List[float]]):
+        """Add query embeddings to the in-process LRU, evicting the oldest"""
+        for query, embedding in zip(queries, embeddings):
+            self._queries[query] = embedding
+            self._queries.move_to_end(query)
+        while len(self._queries) > self.query_cache_size:
+            self._queries.popitem(last=False)
+    
+    def plan_batches(self, token_counts: List[int]) -> List[List[int]]:
+        """
+        Group input positions into sub-batches that respect the request limits
         
-        while start < len(text):
-            end = start + chunk_size
+        Args:
+            token_counts: Token count of each input, in input order
             
-            # Try to break at sentence end
-            if end < len(text):
-                # Look for period, question mark, or exclamation within last 100 chars
-                chunk = text[start:end]
-                last_period = max(
-                    chunk.rfind('. '),
-                    chunk.rfind('? '),
-                    chunk.rfind('! ')
-                )
-                
-                if last_period > chunk_size * 0.5:  # At least 50% through
-                    end = start + last_period + 2
+        Returns:
+            Lists of consecutive input positions, one list per backend call
+        """
+        batches = []
+        current = []
+        current_tokens = 0
+        
+        for position, tokens in enumerate(token_counts):
+            if current and (
+                len(current) >= self.max_batch_inputs
+                or current_tokens + tokens > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(position)
+            current_tokens += tokens
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts with the backend in concurrent, token-budgeted sub-batches
+        
+        Each finished sub-batch is written to the cache immediately, so a
+        failure late in a large document does not discard earlier progress.
+        """
+        token_counts = await asyncio.to_thread(self.count_tokens, texts)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        
+        async def run(batch: List[int]):
+            inputs = [texts[position] for position in batch]
+            async with self._semaphore:
+                with telemetry.span(
+                    "embedding.request",
+                    backend=self.backend.name,
+                    model=self.model,
+                    inputs=len(inputs),
+                    tokens=sum(token_counts[position] for position in batch),
+                ):
+                    vectors = await self.backend.embed(inputs)
+            for position, vector in zip(batch, vectors):
+                results[position] = vector
+            await asyncio.to_thread(
+                self.cache.put_many, inputs, vectors, self.model, self.dimension
+            )
+        
+        await asyncio.gather(*(run(batch) for batch in self.plan_batches(token_counts)))
+        return results
+    
+    def chunker(self, chunk_tokens: int = 256, overlap_tokens: int = 32) -> TokenChunker:
+        """Token chunker that counts with this model's tokenizer"""
+        return TokenChunker(chunk_tokens, overlap_tokens, encoding=self._encoding)
+    
+    def chunk_spans(self, text: str, chunk_tokens: int = 256, overlap_tokens: int = 32) -> List[Span]:
+        """
+        Split text into overlapping, token-sized chunks
+        
+        Args:
+            text: Input text
+            chunk_tokens: Maximum tokens per chunk
+            overlap_tokens: Tokens shared between neighbouring chunks
             
-            chunks.append(text[start:end].strip())
-            start = end - overlap
+        Returns:
+            (start, end) character offsets of each chunk in text
+        """
+        return self.chunker(chunk_tokens, overlap_tokens).spans(text)
+    
+    def chunk_text(
+        self,
+        text: str,
+        chunk_tokens: int = 256,
+        overlap_tokens: int = 32,
+        *,
+        chunk_size: Optional[int] = None,
+        overlap: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Split text into overlapping, token-sized chunks
         
-        return chunks
\ No newline at end of file
+        Args:
+            text: Input text
+            chunk_tokens: Maximum tokens per chunk
+            overlap_tokens: Tokens shared between neighbouring chunks
+            chunk_size: Deprecated; characters per chunk, converted to tokens
+            overlap: Deprecated; overlap in characters, converted to tokens
+            
+        Returns:
+            List of text chunks
+        """
+        if chunk_size is not None or overlap is not None:
+            chunk_tokens, overlap_tokens = self._from_char_sizes(chunk_size, overlap, chunk_tokens, overlap_tokens)
+        return [text[start:end] for start, end in self.chunk_spans(text, chunk_tokens, overlap_tokens)]
+    
+    @staticmethod
+    def _from_char_sizes(
+        chunk_size: Optional[int], overlap: Optional[int], chunk_tokens: int, overlap_tokens: int
+    ) -> Tuple[int, int]:
+        """Token sizes for the character sizes chunk_text() took before it chunked by tokens"""
+        warnings.warn(
+            "chunk_text(chunk_size=, overlap=) counts characters and is deprecated; "
+            "use chunk_tokens= and overlap_tokens=",
+            DeprecationWarning,
+            stacklevel=3,
+        )
+        if chunk_size is not None:
+            chunk_tokens = max(1, tokens_from_chars(chunk_size))
+        if overlap is not None:
+            overlap_tokens = tokens_from_chars(overlap)
+        return chunk_tokens, min(overlap_tokens, chunk_tokens - 1)
+    
+    def get_stats(self) -> dict:
+        """Get embedding cache statistics"""
+        lookups = self.query_hits + self.query_misses
+        return {
+            **self.cache.get_stats(),
+            "query_cache": {
+                "entries": len(self._queries),
+                "max_entries": self.query_cache_size,
+                "hits": self.query_hits,
+                "misses": self.query_misses,
+                "hit_rate": round(self.query_hits / lookups, 4) if lookups else 0.0,
+            },
+        }
\ No newline at end of file
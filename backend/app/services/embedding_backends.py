@@ -0,0 +1,256 @@
+import os
+import re
+import zlib
+import random
+import asyncio
+from abc import ABC, abstractmethod
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+import openai
+from dotenv import load_dotenv
+
+from app.services.lexical_index import tokenize
+from app.services import telemetry
+
+load_dotenv()
+
+
+class EmbeddingBackend(ABC):
+    """
+    Turns a batch of texts into embedding vectors
+
+    The Embedder in front of a backend caches, deduplicates and splits
+    inputs into sub-batches; a backend only embeds the batch it is given,
+    at most max_concurrency batches at a time.
+    """
+
+    name = ""
+
+    def __init__(self, model: str, dimension: int, max_concurrency: int = 1):
+        """
+        Args:
+            model: Identifies the vectors in caches and stores; differs
+                whenever the backend would produce different vectors
+            dimension: Length of every vector
+            max_concurrency: Batches embedded at once
+        """
+        self.model = model
+        self.dimension = dimension
+        self.max_concurrency = max_concurrency
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """One embedding per text, in order"""
+
+
+class OpenAIBackend(EmbeddingBackend):
+    """Embeddings from the OpenAI API, retried on rate limits and server errors"""
+
+    name = "openai"
+
+    def __init__(self):
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        super().__init__(
+            model=os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"),
+            dimension=int(os.getenv("EMBEDDING_DIMENSION", "1536")),
+            max_concurrency=int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4")),
+        )
+        self.max_retries = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+        # Retries are handled here, not by the SDK. Without a key the
+        # service still starts; embedding fails until one is set
+        self.client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0) if self.api_key else None
+
+    def _request_options(self) -> dict:
+        """Extra embeddings.create arguments for the configured model"""
+        # Only the text-embedding-3 family accepts a custom output dimension
+        if self.model.startswith("text-embedding-3"):
+            return {"dimensions": self.dimension}
+        return {}
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        self._require_client()
+        response = await self._create_with_retry(texts)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            telemetry.EMBEDDING_TOKENS.inc(usage.prompt_tokens or 0, model=self.model)
+        # The API reports each item's position within the request
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def _require_client(self):
+        if self.client is None:
+            raise RuntimeError("OPENAI_API_KEY not found")
+
+    async def _create_with_retry(self, inputs: List[str]):
+        """Call embeddings.create, backing off on rate limits and server errors"""
+        attempt = 0
+        while True:
+            try:
+                return await self.client.embeddings.create(
+                    model=self.model,
+                    input=inputs,
+                    **self._request_options()
+                )
+            except (
+                openai.RateLimitError,
+                openai.InternalServerError,
+                openai.APIConnectionError,
+            ) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                print(f"   Embedding request failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """
+        Seconds to wait before the next attempt
+
+        Honours retry-after-ms / retry-after and the x-ratelimit-reset-*
+        headers when the server sends them, otherwise falls back to
+        exponential backoff with jitter.
+        """
+        response = getattr(error, "response", None)
+        headers = response.headers if response is not None else {}
+
+        if headers.get("retry-after-ms"):
+            try:
+                return float(headers["retry-after-ms"]) / 1000
+            except ValueError:
+                pass
+
+        if headers.get("retry-after"):
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(value)
+                    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+                except (TypeError, ValueError):
+                    pass
+
+        # e.g. "1s", "6m0s", "250ms"
+        resets = [
+            OpenAIBackend._parse_reset(headers.get(name, ""))
+            for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        ]
+        resets = [reset for reset in resets if reset is not None]
+        if resets:
+            return min(60.0, min(resets))
+
+        backoff = min(30.0, 0.5 * (2 ** attempt))
+        return backoff * (0.5 + random.random() / 2)
+
+    @staticmethod
+    def _parse_reset(value: str) -> Optional[float]:
+        """Parse a duration such as '1m30s' or '250ms' into seconds"""
+        parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+        if not parts:
+            return None
+        scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+        return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+class LocalBackend(EmbeddingBackend):
+    """
+    Embeddings from a sentence-transformers model run on the CPU
+
+    No network round trip and no API key. Inputs are encoded in batches
+    of LOCAL_EMBEDDING_BATCH_SIZE on a worker thread, one batch job at a
+    time, with LOCAL_EMBEDDING_THREADS intra-op threads (0 leaves the
+    torch default). LOCAL_EMBEDDING_QUANTIZE=true converts the model's
+    linear layers to dynamic int8, which is usually about twice as fast
+    on CPUs at a small cost in accuracy.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        try:
+            import torch
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=local needs sentence-transformers (pip install sentence-transformers)"
+            ) from e
+
+        threads = int(os.getenv("LOCAL_EMBEDDING_THREADS", "0"))
+        if threads > 0:
+            torch.set_num_threads(threads)
+        self.batch_size = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+        self.quantized = os.getenv("LOCAL_EMBEDDING_QUANTIZE", "false").lower() == "true"
+
+        model_name = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        self._model = SentenceTransformer(model_name, device="cpu")
+        if self.quantized:
+            self._model = torch.quantization.quantize_dynamic(self._model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        # Quantized vectors differ slightly, so they are cached apart
+        super().__init__(
+            model=f"{model_name}+int8" if self.quantized else model_name,
+            dimension=self._model.get_sentence_embedding_dimension(),
+        )
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self._encode, texts)
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return vectors.astype(np.float32).tolist()
+
+
+class HashingBackend(EmbeddingBackend):
+    """
+    Deterministic hashed bag-of-words vectors, for offline tests and benchmarks
+
+    Each lexical term and pair of adjacent terms is hashed (CRC32, so the
+    same in every process) to a column and a sign, and the vector is L2
+    normalised. Texts sharing words score high, so retrieval works
+    end to end without a model or a network.
+    """
+
+    name = "hashing"
+
+    def __init__(self):
+        super().__init__(model="hashing-v1", dimension=int(os.getenv("EMBEDDING_DIMENSION", "1536")))
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(lambda: self.vectors(texts).tolist())
+
+    def vectors(self, texts: List[str]) -> np.ndarray:
+        """Embeddings of texts as a float32 matrix"""
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            terms = tokenize(text)
+            features = terms + [f"{first} {second}" for first, second in zip(terms, terms[1:])]
+            if not features:
+                continue
+            hashes = np.fromiter(
+                (zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.uint32, count=len(features)
+            )
+            signs = np.where(hashes >> 31, -1.0, 1.0)
+            vectors[row] = np.bincount(hashes % self.dimension, weights=signs, minlength=self.dimension)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+BACKENDS = {backend.name: backend for backend in (OpenAIBackend, LocalBackend, HashingBackend)}
+
+
+def create_backend(name: Optional[str] = None) -> EmbeddingBackend:
+    """The embedding backend called name (default: EMBEDDING_BACKEND, else openai)"""
+    name = (name or os.getenv("EMBEDDING_BACKEND", "openai")).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unsupported embedding backend: {name}")
+    return BACKENDS[name]()
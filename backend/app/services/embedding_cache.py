@@ -0,0 +1,221 @@
+import os
+import sqlite3
+import hashlib
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """Persistent, content-addressed embedding cache backed by SQLite"""
+
+    def __init__(self, path: Optional[str] = None, max_mb: Optional[float] = None):
+        """
+        Open (or create) the cache database
+
+        Args:
+            path: SQLite file location (EMBEDDING_CACHE_PATH)
+            max_mb: Upper bound on stored vector bytes before LRU eviction
+                (EMBEDDING_CACHE_MAX_MB)
+        """
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache.sqlite3")
+        if max_mb is None:
+            max_mb = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # One connection shared by the executor threads, serialised by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key BLOB PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)"
+        )
+        # Retrieval queries, kept apart so document ingestion never evicts them
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS query_embeddings (
+                model TEXT NOT NULL,
+                dimension INTEGER NOT NULL,
+                query TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (model, dimension, query)
+            ) WITHOUT ROWID
+            """
+        )
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+
+    @staticmethod
+    def make_key(text: str, model: str, dimension: int) -> bytes:
+        """Hash of (model, dimension, text) used as the cache key"""
+        digest = hashlib.sha256()
+        digest.update(f"{model}\x00{dimension}\x00".encode("utf-8"))
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+
+    def get_many(self, texts: List[str], model: str, dimension: int) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for a list of texts
+
+        Returns:
+            One entry per input text: the cached vector, or None on a miss
+        """
+        keys = [self.make_key(text, model, dimension) for text in texts]
+        found = {}
+
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+
+            results = []
+            for key in keys:
+                blob = found.get(key)
+                if blob is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    results.append(np.frombuffer(blob, dtype=np.float32).tolist())
+
+        return results
+
+    def put_many(self, texts: List[str], embeddings: List[List[float]], model: str, dimension: int):
+        """Store embeddings as compact float32 blobs, evicting old entries if needed"""
+        now = time.time()
+        rows = [
+            (
+                self.make_key(text, model, dimension),
+                np.asarray(embedding, dtype=np.float32).tobytes(),
+                now,
+            )
+            for text, embedding in zip(texts, embeddings)
+        ]
+
+        with self._lock:
+            # Keys are content hashes, so an existing row already holds this vector
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+            inserted = self._conn.total_changes - before
+            if rows:
+                self._entries += inserted
+                self._bytes += inserted * len(rows[0][1])
+
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def get_queries(self, model: str, dimension: int, limit: int) -> List[Tuple[str, List[float]]]:
+        """The most recently stored query embeddings for a model, newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT query, vector FROM query_embeddings WHERE model = ? AND dimension = ? "
+                "ORDER BY stored_at DESC LIMIT ?",
+                (model, dimension, limit),
+            ).fetchall()
+        return [(query, np.frombuffer(blob, dtype=np.float32).tolist()) for query, blob in rows]
+
+    def put_queries(
+        self,
+        queries: List[str],
+        embeddings: List[List[float]],
+        model: str,
+        dimension: int,
+        keep: Optional[int] = None,
+    ):
+        """Persist query embeddings, keyed by (model, dimension, query), keeping the newest keep"""
+        now = time.time()
+        rows = [
+            (model, dimension, query, np.asarray(embedding, dtype=np.float32).tobytes(), now)
+            for query, embedding in zip(queries, embeddings)
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO query_embeddings (model, dimension, query, vector, stored_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            if keep is not None:
+                self._conn.execute(
+                    """
+                    DELETE FROM query_embeddings WHERE model = ? AND dimension = ? AND query NOT IN (
+                        SELECT query FROM query_embeddings WHERE model = ? AND dimension = ?
+                        ORDER BY stored_at DESC LIMIT ?
+                    )
+                    """,
+                    (model, dimension, model, dimension, keep),
+                )
+            self._conn.execute("COMMIT")
+
+    def _evict(self):
+        """Drop least-recently-used rows until the cache is at 90% of its budget"""
+        average = self._bytes / max(self._entries, 1)
+        excess = self._bytes - int(self.max_bytes * 0.9)
+        count = max(1, int(excess / max(average, 1)) + 1)
+
+        cursor = self._conn.execute(
+            """
+            DELETE FROM embeddings WHERE key IN (
+                SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?
+            )
+            """,
+            (count,),
+        )
+        self.evictions += cursor.rowcount
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+
+    def get_stats(self) -> dict:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": self._entries,
+            "size_mb": round(self._bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
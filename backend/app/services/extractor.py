@@ -1,19 +1,30 @@
-import requests
-import io
+import asyncio
+import threading
 import base64
-from typing import Optional
-from bs4 import BeautifulSoup
-import pdfplumber
-from PyPDF2 import PdfReader
+import hashlib
+from typing import AsyncIterator, Iterator, Optional, Union
+from app.services.html_text import extract_html_text
+from app.services.http_cache import DocumentFetcher
+from app.services.pdf_pages import PDFPagePool
+from app.services import telemetry
 
 class TextExtractor:
     """Extracts text from PDFs, URLs, or plain text"""
     
+    # Worker processes are started on the first large PDF
+    page_pool = PDFPagePool()
+    # Pooled, cached downloads shared by every request
+    fetcher = DocumentFetcher()
+    
     @staticmethod
-    def extract(input_type: str, input_data: str) -> str:
+    async def extract(input_type: str, input_data: str) -> str:
         """
         Extract text based on input type
         
+        Network I/O is awaited on the event loop; HTML and PDF parsing are
+        CPU-bound and run in the default executor so other requests keep
+        being served while a large document is parsed.
+        
         Args:
             input_type: 'pdf', 'url', or 'text'
             input_data: PDF URL, web URL, or plain text
@@ -24,127 +35,156 @@ class TextExtractor:
         if input_type == "text":
             return input_data
         elif input_type == "url":
-            return TextExtractor._extract_from_url(input_data)
+            return await TextExtractor._extract_from_url(input_data)
         elif input_type == "pdf":
             # Check if input_data is base64 or a URL
             if input_data.startswith("http://") or input_data.startswith("https://"):
-                return TextExtractor._extract_from_pdf_url(input_data)
+                return await TextExtractor._extract_from_pdf_url(input_data)
             else:
                 # Assume it's base64 encoded
-                return TextExtractor._extract_from_pdf_base64(input_data)
+                return await TextExtractor._extract_from_pdf_base64(input_data)
         else:
             raise ValueError(f"Unsupported input type: {input_type}")
     
     @staticmethod
-    def _extract_from_url(url: str) -> str:
+    async def _extract_from_url(url: str) -> str:
         """Extract text from web URL"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
+            with telemetry.span("download", url=url) as span:
+                content = await TextExtractor.fetcher.get(url, timeout=30)
+                span.set_attribute("bytes", len(content))
             
-            # Get text
-            text = soup.get_text()
-            
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            return text
+            with telemetry.span("parse.html", bytes=len(content)):
+                return await asyncio.to_thread(TextExtractor._parse_html, content)
         except Exception as e:
             raise Exception(f"Failed to extract from URL: {str(e)}")
     
     @staticmethod
-    def _extract_from_pdf_url(pdf_url: str) -> str:
+    def _parse_html(content: bytes) -> str:
+        """Convert raw HTML into whitespace-normalised visible text (HTML_PARSER backend)"""
+        return extract_html_text(content)
+    
+    @staticmethod
+    async def _extract_from_pdf_url(pdf_url: str) -> str:
         """Download and extract text from PDF URL"""
         try:
-            # Download PDF
-            response = requests.get(pdf_url, timeout=60)
-            response.raise_for_status()
-            
-            pdf_file = io.BytesIO(response.content)
-            
-            # Try pdfplumber first (better for tables)
-            try:
-                text_parts = []
-                with pdfplumber.open(pdf_file) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text_parts.append(page_text)
-                
-                if text_parts:
-                    return "\n\n".join(text_parts)
-            except:
-                pass
-            
-            # Fallback to PyPDF2
-            pdf_file.seek(0)
-            reader = PdfReader(pdf_file)
-            text_parts = []
-            
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    text_parts.append(text)
+            pdf_bytes = await TextExtractor._download_pdf(pdf_url)
             
-            if not text_parts:
-                raise Exception("No text could be extracted from PDF")
-            
-            return "\n\n".join(text_parts)
+            with telemetry.span("parse.pdf", bytes=len(pdf_bytes)):
+                return await asyncio.to_thread(TextExtractor._parse_pdf, pdf_bytes)
             
         except Exception as e:
             raise Exception(f"Failed to extract from PDF: {str(e)}")
     
     @staticmethod
-    def _extract_from_pdf_base64(base64_data: str) -> str:
+    async def _download_pdf(pdf_url: str) -> bytes:
+        """Download a PDF into memory (or read it from the HTTP cache)"""
+        with telemetry.span("download", url=pdf_url) as span:
+            content = await TextExtractor.fetcher.get(pdf_url, timeout=60)
+            span.set_attribute("bytes", len(content))
+            return content
+    
+    @staticmethod
+    async def load_pdf(input_data: str) -> bytes:
+        """
+        Raw bytes of a PDF given as a URL or base64 string
+        
+        PDF parsers need random access to the file, so the document itself
+        is held in memory; streaming applies to the extracted text.
+        """
+        if input_data.startswith("http://") or input_data.startswith("https://"):
+            try:
+                return await TextExtractor._download_pdf(input_data)
+            except Exception as e:
+                raise Exception(f"Failed to extract from PDF: {str(e)}")
+        try:
+            return base64.b64decode(input_data)
+        except Exception as e:
+            raise Exception(f"Failed to extract from base64 PDF: {str(e)}")
+    
+    @staticmethod
+    async def _extract_from_pdf_base64(base64_data: str) -> str:
         """Extract text from base64-encoded PDF"""
         try:
             # Decode base64 to bytes
             pdf_bytes = base64.b64decode(base64_data)
-            pdf_file = io.BytesIO(pdf_bytes)
-            
-            # Try pdfplumber first (better for tables)
-            try:
-                text_parts = []
-                with pdfplumber.open(pdf_file) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text_parts.append(page_text)
-                
-                if text_parts:
-                    return "\n\n".join(text_parts)
-            except:
-                pass
-            
-            # Fallback to PyPDF2
-            pdf_file.seek(0)
-            reader = PdfReader(pdf_file)
-            text_parts = []
-            
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    text_parts.append(text)
-            
-            if not text_parts:
-                raise Exception("No text could be extracted from PDF")
-            
-            return "\n\n".join(text_parts)
             
+            with telemetry.span("parse.pdf", bytes=len(pdf_bytes)):
+                return await asyncio.to_thread(TextExtractor._parse_pdf, pdf_bytes)
+        
         except Exception as e:
             raise Exception(f"Failed to extract from base64 PDF: {str(e)}")
     
+    @staticmethod
+    def _parse_pdf(pdf_bytes: bytes) -> str:
+        """Extract text from raw PDF bytes (blocking; run it in an executor)"""
+        text_parts = list(TextExtractor.iter_pdf_pages(pdf_bytes))
+        
+        if not text_parts:
+            raise Exception("No text could be extracted from PDF")
+        
+        return "\n\n".join(text_parts)
+    
+    @staticmethod
+    def iter_pdf_pages(pdf_bytes: bytes) -> Iterator[str]:
+        """
+        Yield the text of each non-empty page in order (blocking)
+        
+        Large documents are extracted in parallel by the page pool;
+        pdfplumber is tried first and PyPDF2 only re-reads the individual
+        pages it fails on or finds empty.
+        """
+        return TextExtractor.page_pool.iter_pages(pdf_bytes)
+    
+    @staticmethod
+    async def stream_pdf_pages(pdf_bytes: bytes, window: int = 8) -> AsyncIterator[str]:
+        """
+        Parse a PDF in a worker thread and yield page texts as they are ready
+        
+        At most `window` parsed pages wait to be consumed; the parser
+        pauses when the consumer falls behind, which bounds memory and
+        lets the consumer's own I/O (embedding requests) overlap parsing.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        slots = threading.Semaphore(window)
+        stop = threading.Event()
+        
+        def produce():
+            try:
+                for page_text in TextExtractor.iter_pdf_pages(pdf_bytes):
+                    slots.acquire()
+                    if stop.is_set():
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, (page_text, None))
+                loop.call_soon_threadsafe(queue.put_nowait, (None, None))
+            except Exception as e:
+                error = Exception(f"Failed to extract from PDF: {str(e)}")
+                loop.call_soon_threadsafe(queue.put_nowait, (None, error))
+        
+        producer = asyncio.ensure_future(asyncio.to_thread(produce))
+        try:
+            while True:
+                page_text, error = await queue.get()
+                if error is not None:
+                    raise error
+                if page_text is None:
+                    break
+                slots.release()
+                yield page_text
+        finally:
+            # Unblock and stop the parser if the consumer gave up early
+            stop.set()
+            slots.release()
+            await producer
+    
+    @staticmethod
+    def fingerprint(content: Union[str, bytes]) -> str:
+        """Stable content hash of (cleaned) document text or raw document bytes"""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return hashlib.sha256(content).hexdigest()
+    
     @staticmethod
     def clean_text(text: str) -> str:
         """Clean and normalize extracted text"""
@@ -0,0 +1,75 @@
+from typing import List, Optional
+
+from app.models.schema import DEFAULT_QUERY
+
+# Evidence each analysis style needs, phrased the way filings word it
+ANALYSIS_FACETS = {
+    "comprehensive-review": [
+        "revenue growth and segment performance",
+        "gross margin and operating margin",
+        "debt, liquidity and cash flows",
+        "principal risk factors and uncertainties",
+    ],
+    "executive-summary": [
+        "financial results for the period: revenue, net income and earnings per share",
+        "management outlook and guidance",
+    ],
+    "risk-assessment": [
+        "principal risk factors and uncertainties",
+        "legal proceedings, litigation and regulatory matters",
+        "debt covenants, refinancing and liquidity risk",
+    ],
+    "financial-metrics": [
+        "revenue, net income and earnings per share",
+        "gross margin and operating margin",
+        "free cash flow and capital expenditures",
+    ],
+}
+
+FOCUS_FACETS = {
+    "general-overview": [],
+    "risk-&-revenue": [
+        "revenue drivers and sales trends",
+        "risk factors affecting revenue and demand",
+    ],
+    "profitability-&-margins": [
+        "gross margin and operating margin trends",
+        "cost of revenue and operating expenses",
+    ],
+    "debt-&-liquidity": [
+        "debt, borrowings and maturities",
+        "liquidity, cash and credit facilities",
+    ],
+}
+
+
+def facet_queries(
+    query: Optional[str], analysis_type: str, focus_area: str, max_queries: int = 5
+) -> List[str]:
+    """
+    Retrieval queries for a request: its own query, then its facets
+
+    Focus-area facets come before analysis-type facets, since the focus
+    is the narrower ask. Duplicates are dropped and the list is cut to
+    max_queries; max_queries=1 retrieves for the request query alone.
+    """
+    queries = [query] if query else []
+    queries += FOCUS_FACETS.get(focus_area, []) + ANALYSIS_FACETS.get(analysis_type, [])
+    return list(dict.fromkeys(queries))[:max(1, max_queries)]
+
+
+def preset_queries(max_queries: int = 5) -> List[str]:
+    """
+    Every query a request retrieves with unless it asks its own question
+
+    The default query and the facets of each analysis type and focus
+    area combination, also without a query, cut as facet_queries() cuts
+    them. Custom questions add only themselves, so these cover the facets
+    of every request.
+    """
+    queries = []
+    for analysis_type in ANALYSIS_FACETS:
+        for focus_area in FOCUS_FACETS:
+            for query in (DEFAULT_QUERY, None):
+                queries += facet_queries(query, analysis_type, focus_area, max_queries)
+    return list(dict.fromkeys(queries))
@@ -0,0 +1,154 @@
+import os
+import re
+import codecs
+import importlib.util
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+# lxml is optional; the stdlib backend covers the fast path. It and
+# BeautifulSoup are imported by the backends that use them, on first use
+HAS_LXML = importlib.util.find_spec("lxml") is not None
+
+# Subtrees whose text never reaches the analysis
+SKIPPED_TAGS = frozenset({"script", "style", "nav", "footer", "header"})
+# BeautifulSoup leaves <template> content out of get_text(); the streaming backends match it
+STREAM_SKIPPED_TAGS = SKIPPED_TAGS | {"template"}
+
+FEED_SIZE = 1 << 20  # Characters handed to the streaming parsers at a time
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse every run of whitespace to a single space"""
+    return " ".join(text.split())
+
+
+def decode_html(content: bytes) -> str:
+    """
+    Decode HTML bytes the way BeautifulSoup would
+
+    Byte-order mark first, then a <meta> charset declaration, then UTF-8,
+    and finally windows-1252, which accepts any byte.
+    """
+    for bom, encoding in ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+        if content.startswith(bom):
+            return content.decode(encoding)
+
+    candidates = ["utf-8", "windows-1252"]
+    declared = _META_CHARSET.search(content[:4096])
+    if declared:
+        candidates.insert(0, declared.group(1).decode("ascii", "ignore"))
+    for encoding in candidates:
+        try:
+            return content.decode(encoding)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return content.decode("windows-1252", errors="replace")
+
+
+def _bs4_text(content: bytes) -> str:
+    """Reference backend: full BeautifulSoup tree, unwanted subtrees decomposed"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, 'html.parser')
+
+    # Remove script and style elements
+    for script in soup(list(SKIPPED_TAGS)):
+        script.decompose()
+
+    return soup.get_text()
+
+
+class _TextCollector:
+    """Parser target that keeps text outside skipped subtrees; no tree is built"""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.skip_depth = 0
+
+    def start(self, tag, attrib=None):
+        if tag in STREAM_SKIPPED_TAGS:
+            self.skip_depth += 1
+
+    def end(self, tag):
+        if tag in STREAM_SKIPPED_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def close(self):
+        return "".join(self.parts)
+
+
+def _lxml_text(content: bytes) -> str:
+    """libxml2 HTML tokenizer driving a collecting target, fed in slices"""
+    from lxml import etree
+
+    text = decode_html(content)
+    parser = etree.HTMLParser(target=_TextCollector(), huge_tree=True)
+    for start in range(0, len(text), FEED_SIZE):
+        parser.feed(text[start:start + FEED_SIZE])
+    return parser.close()
+
+
+class _StdlibTextParser(HTMLParser):
+    """html.parser tokenizer with the collecting logic inlined"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.collector = _TextCollector()
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+def _stdlib_text(content: bytes) -> str:
+    """Pure-Python streaming backend for when lxml is not installed"""
+    text = decode_html(content)
+    parser = _StdlibTextParser()
+    for start in range(0, len(text), FEED_SIZE):
+        parser.feed(text[start:start + FEED_SIZE])
+    parser.close()
+    return parser.collector.close()
+
+
+HTML_BACKENDS: Dict[str, Callable[[bytes], str]] = {
+    "lxml": _lxml_text,
+    "stdlib": _stdlib_text,
+    "bs4": _bs4_text,
+}
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """Backend name from name or HTML_PARSER; 'auto' picks the fastest available"""
+    name = (name or os.getenv("HTML_PARSER", "auto")).lower()
+    if name == "auto":
+        return "lxml" if HAS_LXML else "stdlib"
+    if name not in HTML_BACKENDS:
+        raise ValueError(f"Unsupported HTML parser: {name}")
+    if name == "lxml" and not HAS_LXML:
+        raise ValueError("HTML_PARSER=lxml but lxml is not installed")
+    return name
+
+
+def extract_html_text(content: bytes, backend: Optional[str] = None) -> str:
+    """
+    Visible text of an HTML document, whitespace-normalised
+
+    Text inside script, style, nav, header and footer elements is
+    dropped. The streaming backends skip those subtrees while tokenizing
+    instead of building and pruning a tree, which keeps large filings
+    (multi-megabyte inline XBRL) fast and small in memory.
+    """
+    return normalize_whitespace(HTML_BACKENDS[resolve_backend(backend)](content))
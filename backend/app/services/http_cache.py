@@ -0,0 +1,321 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+class HTTPCache:
+    """
+    On-disk cache of downloaded documents, validated with conditional GETs
+
+    Bodies are stored as files named by the URL hash; validators (ETag,
+    Last-Modified) and freshness live in a small SQLite index. Entries are
+    evicted least-recently-used once the bodies exceed the size budget.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_mb: Optional[float] = None):
+        """
+        Open (or create) the cache
+
+        Args:
+            directory: Cache location (HTTP_CACHE_DIR)
+            max_mb: Upper bound on stored body bytes before LRU eviction
+                (HTTP_CACHE_MAX_MB)
+        """
+        self.directory = directory or os.getenv("HTTP_CACHE_DIR", "./data/http_cache")
+        if max_mb is None:
+            max_mb = float(os.getenv("HTTP_CACHE_MAX_MB", "1024"))
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(self.directory, "index.sqlite3"), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fresh_until REAL NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)"
+        )
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".body")
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Stored entry for url: validators, freshness and body, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, fresh_until FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._body_path(url), "rb") as f:
+                    body = f.read()
+            except OSError:
+                # Body went missing; forget the entry
+                self._delete(url)
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url)
+            )
+        etag, last_modified, fresh_until = row
+        return {"etag": etag, "last_modified": last_modified, "fresh_until": fresh_until, "body": body}
+
+    def store(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str], fresh_until: float):
+        """Save a response body and its validators, evicting old entries if needed"""
+        path = self._body_path(url)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, fresh_until, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, fresh_until, len(body), time.time()),
+            )
+            if previous is None:
+                self._entries += 1
+            else:
+                self._bytes -= previous[0]
+            self._bytes += len(body)
+
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def refresh(self, url: str, fresh_until: float):
+        """Extend an entry's freshness after a 304 Not Modified"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fresh_until = ?, last_access = ? WHERE url = ?",
+                (fresh_until, time.time(), url),
+            )
+
+    def _delete(self, url: str):
+        row = self._conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return
+        self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+        self._entries -= 1
+        self._bytes -= row[0]
+        try:
+            os.remove(self._body_path(url))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop least-recently-used entries until the cache is at 90% of its budget"""
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT url FROM responses ORDER BY last_access ASC").fetchall()
+        for (url,) in rows:
+            if self._bytes <= target:
+                break
+            self._delete(url)
+            self.evictions += 1
+
+    def get_stats(self) -> dict:
+        """Get cache statistics"""
+        return {
+            "directory": self.directory,
+            "entries": self._entries,
+            "size_mb": round(self._bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class DocumentFetcher:
+    """
+    Shared, pooled HTTP client for document downloads
+
+    One keep-alive connection pool serves every request, with a cap on
+    concurrent requests per host. Responses go through an HTTPCache:
+    fresh entries are served without touching the network, stale ones
+    are revalidated with If-None-Match / If-Modified-Since, so re-fetching
+    an unchanged filing costs a 304 at most.
+
+    Clients and host limits are bound to an event loop, so each loop gets
+    its own. A client is closed on its loop when the loop shuts down (as
+    asyncio.run and uvicorn do, cancelling the tasks left) or by aclose().
+    """
+
+    def __init__(self, cache: Optional[HTTPCache] = None):
+        self._cache = cache
+        self.max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+        self.max_per_host = int(os.getenv("HTTP_MAX_PER_HOST", "4"))
+        # Used when the server gives no Cache-Control max-age
+        self.default_ttl = float(os.getenv("HTTP_CACHE_TTL_SECONDS", "300"))
+
+        # Event loop -> its pooled client, per-host request limits and the task closing the client
+        self._clients: Dict[
+            asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, Dict[str, asyncio.Semaphore], asyncio.Task]
+        ] = {}
+
+    @property
+    def cache(self) -> HTTPCache:
+        """Disk cache, opened on first use so importing has no side effects"""
+        if self._cache is None:
+            self._cache = HTTPCache()
+        return self._cache
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+        )
+
+    def _get_client(self) -> Tuple[httpx.AsyncClient, Dict[str, asyncio.Semaphore]]:
+        """Pooled client of the running event loop, and its per-host limits"""
+        loop = asyncio.get_running_loop()
+        for closed in [other for other in self._clients if other.is_closed()]:
+            del self._clients[closed]
+        if loop not in self._clients:
+            client = self._new_client()
+            self._clients[loop] = (client, {}, asyncio.create_task(self._close_at_shutdown(client)))
+        client, limits, _ = self._clients[loop]
+        return client, limits
+
+    async def _close_at_shutdown(self, client: httpx.AsyncClient):
+        """Wait until the loop cancels its remaining tasks, then close client while the loop still runs"""
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            if not client.is_closed:
+                await self._close(client)
+
+    def _host_limit(self, limits: Dict[str, asyncio.Semaphore], url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        limit = limits.get(host)
+        if limit is None:
+            limit = asyncio.Semaphore(self.max_per_host)
+            limits[host] = limit
+        return limit
+
+    async def get(self, url: str, timeout: float = 30) -> bytes:
+        """
+        Body of url, from the cache when it is still valid
+
+        Raises:
+            httpx.HTTPStatusError: for error responses
+        """
+        entry = await asyncio.to_thread(self.cache.lookup, url)
+        if entry is not None and entry["fresh_until"] > time.time():
+            self.cache.hits += 1
+            return entry["body"]
+
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        client, limits = self._get_client()
+        async with self._host_limit(limits, url):
+            response = await client.get(url, headers=headers, timeout=timeout)
+            if response.status_code == 304 and entry is None:
+                # Not Modified with nothing cached to reuse: fetch it outright, past any caches
+                response = await client.get(url, headers={"Cache-Control": "no-cache"}, timeout=timeout)
+                if response.status_code == 304:
+                    raise httpx.HTTPStatusError(
+                        f"304 Not Modified for {url} without a cached copy", request=response.request, response=response
+                    )
+
+        if response.status_code == 304:
+            self.cache.revalidated += 1
+            await asyncio.to_thread(self.cache.refresh, url, self._fresh_until(response))
+            return entry["body"]
+
+        response.raise_for_status()
+        self.cache.misses += 1
+
+        etag, last_modified, cacheable = self._validators(response)
+        if cacheable:
+            await asyncio.to_thread(
+                self.cache.store, url, response.content, etag, last_modified, self._fresh_until(response)
+            )
+        return response.content
+
+    def _fresh_until(self, response: httpx.Response) -> float:
+        """Expiry time from Cache-Control max-age, else the default TTL"""
+        cache_control = response.headers.get("cache-control", "").lower()
+        if "no-cache" in cache_control:
+            return 0.0
+        match = re.search(r"max-age=(\d+)", cache_control)
+        ttl = float(match.group(1)) if match else self.default_ttl
+        return time.time() + ttl
+
+    @staticmethod
+    def _validators(response: httpx.Response) -> Tuple[Optional[str], Optional[str], bool]:
+        """(ETag, Last-Modified, whether the response may be stored)"""
+        cache_control = response.headers.get("cache-control", "").lower()
+        if "no-store" in cache_control:
+            return None, None, False
+        etag = response.headers.get("etag")
+        # With neither validator, the response date still lets the server answer 304
+        last_modified = response.headers.get("last-modified") or (
+            None if etag else response.headers.get("date")
+        )
+        return etag, last_modified, True
+
+    async def aclose(self):
+        """Close the pooled connections of every event loop"""
+        current = asyncio.get_running_loop()
+        clients, self._clients = self._clients, {}
+        for loop, (client, _, closer) in clients.items():
+            if loop is current:
+                await self._close(client)
+                closer.cancel()
+            elif loop.is_running():
+                # Still serving another thread; close it there
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._close(client), loop))
+                loop.call_soon_threadsafe(closer.cancel)
+
+    @staticmethod
+    async def _close(client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"Failed to close HTTP client: {e}")
+
+    def get_stats(self) -> dict:
+        """Get cache statistics"""
+        return self.cache.get_stats()
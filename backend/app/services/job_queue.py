@@ -0,0 +1,208 @@
+import os
+import json
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.schema import AnalyzeRequest, AnalyzeResponse
+from app.services.job_store import JobStore
+
+if TYPE_CHECKING:
+    from app.services.pipeline_provider import PipelineProvider
+    from app.services.rag import RAGPipeline
+
+
+class JobQueue:
+    """
+    Runs analysis jobs in the background with a fixed number of workers
+
+    Jobs are queued in a JobStore and claimed oldest first, so they survive
+    restarts and clients only poll for the outcome; how many pipelines run
+    at once is set here rather than by how many clients are waiting.
+
+    While jobs run, their leases are renewed every third of the lease
+    time. A job cancelled through another process sharing the store is
+    stopped here at the next renewal, and jobs of processes that stopped
+    without requeueing them are recovered once their leases expire.
+    """
+
+    def __init__(
+        self,
+        pipelines: "PipelineProvider",
+        store: Optional[JobStore] = None,
+        concurrency: Optional[int] = None,
+        poll_seconds: float = 5.0,
+    ):
+        """
+        Args:
+            pipelines: Provides the pipeline that runs each job, built when
+                the first job runs
+            store: Job records (by default a JobStore on JOB_STORE_PATH,
+                opened on first use)
+            concurrency: Jobs run at once (JOB_CONCURRENCY)
+            poll_seconds: Idle workers look for jobs queued by other
+                processes sharing the store this often
+        """
+        if concurrency is None:
+            concurrency = int(os.getenv("JOB_CONCURRENCY", "2"))
+        self.pipelines = pipelines
+        self._store = store
+        self._store_lock = threading.Lock()
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        # Last pipeline stage of each job running here
+        self._stages: Dict[str, str] = {}
+        self._cancelled = set()
+        self._wakeup = asyncio.Event()
+
+    @property
+    def store(self) -> JobStore:
+        """Job records, opened on first use so importing has no side effects"""
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = JobStore()
+        return self._store
+
+    async def start(self):
+        """Recover interrupted jobs and start the workers"""
+        await self._recover()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self._workers.append(asyncio.create_task(self._keep_leases()))
+
+    async def stop(self):
+        """Stop the workers; jobs they were running go back to the queue"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, request: AnalyzeRequest) -> dict:
+        """Queue an analysis and return its job record"""
+        payload = json.dumps(jsonable_encoder(request, by_alias=True))
+        job = await asyncio.to_thread(self.store.create, payload)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        """A job's record, with the current stage if it is running here"""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is not None:
+            job["stage"] = self._stages.get(job_id)
+        return job
+
+    async def recent(self, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """Most recent job records, with the stages of those running here"""
+        jobs = await asyncio.to_thread(self.store.recent, status, limit)
+        for job in jobs:
+            job["stage"] = self._stages.get(job["id"])
+        return jobs
+
+    async def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job; False if it had already finished
+
+        A job running here stops at once; one running in another process
+        stops at that process's next lease renewal.
+        """
+        if not await asyncio.to_thread(self.store.cancel, job_id):
+            return False
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+        return True
+
+    async def _recover(self):
+        requeued, failed = await asyncio.to_thread(self.store.recover)
+        if requeued or failed:
+            print(f" Recovered interrupted jobs: {requeued} requeued, {failed} failed")
+        if requeued:
+            self._wakeup.set()
+
+    async def _keep_leases(self):
+        """Renew the leases of jobs running here and recover expired ones, until stopped"""
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            try:
+                for job_id in await asyncio.to_thread(self.store.heartbeat, list(self._running)):
+                    # Cancelled elsewhere, or recovered after the lease ran out
+                    task = self._running.get(job_id)
+                    if task is not None:
+                        self._cancelled.add(job_id)
+                        task.cancel()
+                await self._recover()
+            except Exception as e:
+                print(f" Job lease renewal failed: {str(e)}")
+
+    async def _work(self):
+        """Claim and run jobs until stopped"""
+        while True:
+            # Cleared before claiming, so a submit during the claim still wakes us
+            self._wakeup.clear()
+            claimed = await asyncio.to_thread(self.store.claim_next)
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(*claimed)
+
+    async def _run(self, job_id: str, payload: str):
+        """Run one claimed job and record its outcome"""
+        print(f" Running job {job_id}")
+
+        def progress(event: str, data: dict):
+            if event != "llm_delta":
+                self._stages[job_id] = event
+
+        try:
+            request = AnalyzeRequest(**json.loads(payload))
+            task = asyncio.create_task(self._process(request, progress))
+        except Exception as e:
+            await asyncio.to_thread(self.store.fail, job_id, 400, str(e))
+            return
+
+        self._running[job_id] = task
+        try:
+            response = await task
+        except asyncio.CancelledError:
+            if job_id in self._cancelled:
+                print(f" Job {job_id} cancelled or no longer leased here")
+                return
+            # The worker itself is stopping: leave the job for the next start
+            await asyncio.shield(asyncio.to_thread(self.store.requeue, job_id))
+            raise
+        except ValueError as e:
+            await asyncio.to_thread(self.store.fail, job_id, 400, str(e))
+        except Exception as e:
+            await asyncio.to_thread(self.store.fail, job_id, 500, f"Analysis failed: {str(e)}")
+        else:
+            result = json.dumps(jsonable_encoder(response))
+            await asyncio.to_thread(self.store.finish, job_id, result)
+        finally:
+            self._running.pop(job_id, None)
+            self._stages.pop(job_id, None)
+            self._cancelled.discard(job_id)
+
+    async def _process(self, request: AnalyzeRequest, progress) -> AnalyzeResponse:
+        try:
+            pipeline: "RAGPipeline" = await self.pipelines.get()
+        except Exception as e:
+            # Not the request's fault, so not a 400 even if the build raised ValueError
+            raise RuntimeError(f"Pipeline unavailable: {str(e)}") from e
+        return await pipeline.process_document(request, progress)
+
+    def get_stats(self) -> dict:
+        """Worker and job statistics"""
+        return {
+            "concurrency": self.concurrency,
+            "running_here": len(self._running),
+            "jobs": self.store.get_stats(),
+        }
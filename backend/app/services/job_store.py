@@ -0,0 +1,283 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+# Job lifecycle: queued -> running -> succeeded | failed | cancelled
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+_COLUMNS = (
+    "id, status, attempts, created_at, started_at, finished_at, error_status, error"
+)
+
+
+class JobStore:
+    """
+    Persistent analysis job records backed by SQLite
+
+    Several processes (e.g. uvicorn workers) can share one database. A
+    process claiming a job takes a lease on it and renews it with
+    heartbeat() while the job runs; only jobs whose lease has expired
+    are taken to belong to a stopped process and recovered.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        retention_hours: Optional[float] = None,
+        lease_seconds: Optional[float] = None,
+    ):
+        """
+        Open (or create) the job database
+
+        Args:
+            path: SQLite file location (JOB_STORE_PATH)
+            max_attempts: Runs a job may start before an interrupted one is
+                failed instead of requeued (JOB_MAX_ATTEMPTS)
+            retention_hours: Age after which finished jobs are deleted
+                (JOB_RETENTION_HOURS)
+            lease_seconds: How long a claimed job stays with this process
+                without a heartbeat (JOB_LEASE_SECONDS)
+        """
+        self.path = path or os.getenv("JOB_STORE_PATH", "./data/jobs.sqlite3")
+        if max_attempts is None:
+            max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        if retention_hours is None:
+            retention_hours = float(os.getenv("JOB_RETENTION_HOURS", "168"))
+        if lease_seconds is None:
+            lease_seconds = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_hours * 3600
+        self.lease_seconds = lease_seconds
+        # Holder of the leases taken through this store
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection shared by the executor threads, serialised by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                request TEXT NOT NULL,
+                result TEXT,
+                error_status INTEGER,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner TEXT,
+                lease_until REAL
+            )
+            """
+        )
+        # Databases created before leases
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at)"
+        )
+
+    def create(self, request: str) -> dict:
+        """Queue a job for a serialized AnalyzeRequest and return its record"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, request, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, request, time.time()),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """A job's record without its request or result, or None if unknown"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._record(row) if row else None
+
+    def get_result(self, job_id: str) -> Optional[str]:
+        """The serialized AnalyzeResponse of a succeeded job"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = 'succeeded'", (job_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def recent(self, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """Most recent jobs first, optionally only those with a status"""
+        query = f"SELECT {_COLUMNS} FROM jobs"
+        params: tuple = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, params + (limit,)).fetchall()
+        return [self._record(row) for row in rows]
+
+    def claim_next(self) -> Optional[Tuple[str, str]]:
+        """
+        Mark the oldest queued job as running, leased to this process
+
+        The claim is one write transaction, so several processes sharing
+        the database never start the same job twice.
+
+        Returns:
+            (job id, serialized request), or None if nothing is queued
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, request FROM jobs WHERE status = 'queued' "
+                    "ORDER BY created_at, rowid LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    now = time.time()
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1, "
+                        "owner = ?, lease_until = ? WHERE id = ?",
+                        (now, self.owner, now + self.lease_seconds, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def heartbeat(self, job_ids: List[str]) -> List[str]:
+        """
+        Renew this process's leases on the given running jobs
+
+        Returns:
+            Those of job_ids it no longer holds (cancelled, or recovered
+            after the lease ran out), which should stop running here
+        """
+        if not job_ids:
+            return []
+        placeholders = ", ".join("?" * len(job_ids))
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET lease_until = ? "
+                f"WHERE owner = ? AND status = 'running' AND id IN ({placeholders})",
+                (time.time() + self.lease_seconds, self.owner, *job_ids),
+            )
+            held = {
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT id FROM jobs WHERE owner = ? AND status = 'running' AND id IN ({placeholders})",
+                    (self.owner, *job_ids),
+                )
+            }
+        return [job_id for job_id in job_ids if job_id not in held]
+
+    def finish(self, job_id: str, result: str) -> bool:
+        """Record a running job's serialized result; False if it was cancelled or lost its lease"""
+        return self._settle(job_id, "succeeded", result=result)
+
+    def fail(self, job_id: str, error_status: int, error: str) -> bool:
+        """Record why a running job failed; False if it was cancelled or lost its lease"""
+        return self._settle(job_id, "failed", error_status=error_status, error=error)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job; False if it had already finished
+
+        Only the record changes; the process running the job stops it when
+        its next heartbeat() reports the job gone.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                "WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            )
+        return cursor.rowcount > 0
+
+    def requeue(self, job_id: str):
+        """Return a running job to the queue when the server shuts down cleanly"""
+        with self._lock:
+            # A clean stop does not use up one of the job's attempts
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, attempts = attempts - 1, "
+                "owner = NULL, lease_until = NULL WHERE id = ? AND status = 'running' AND owner = ?",
+                (job_id, self.owner),
+            )
+
+    def recover(self) -> Tuple[int, int]:
+        """
+        Deal with jobs left running by a server that stopped, and prune old ones
+
+        A running job whose lease has expired was interrupted: its process
+        stopped without requeueing it. Such jobs are queued again unless
+        they have used up their attempts, in which case they fail; a job
+        that keeps taking the server down with it is not retried forever.
+        Jobs other live processes are running keep their leases, so this
+        is safe to call at any time, from any process.
+
+        Returns:
+            (jobs requeued, jobs failed)
+        """
+        now = time.time()
+        expired = "status = 'running' AND (lease_until IS NULL OR lease_until < ?)"
+        with self._lock:
+            failed = self._conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, error_status = 500, "
+                "error = 'Interrupted by a server restart too many times' "
+                f"WHERE {expired} AND attempts >= ?",
+                (now, now, self.max_attempts),
+            ).rowcount
+            requeued = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, owner = NULL, lease_until = NULL "
+                f"WHERE {expired}",
+                (now,),
+            ).rowcount
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed', 'cancelled') AND finished_at < ?",
+                (now - self.retention_seconds,),
+            )
+        return requeued, failed
+
+    def _settle(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[str] = None,
+        error_status: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error_status = ?, error = ?, finished_at = ? "
+                "WHERE id = ? AND status = 'running' AND owner = ?",
+                (status, result, error_status, error, time.time(), job_id, self.owner),
+            )
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def _record(row: tuple) -> dict:
+        return dict(zip((column.strip() for column in _COLUMNS.split(",")), row))
+
+    def get_stats(self) -> dict:
+        """Job counts by status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(ACTIVE_STATUSES + FINISHED_STATUSES, 0)
+        counts.update(rows)
+        return {"path": self.path, **counts}
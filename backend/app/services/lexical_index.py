@@ -0,0 +1,127 @@
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Words, tickers, section numbers ("1a"), amounts ("$4.2b", "12.5%") and
+# hyphenated forms ("10-k") stay whole; surrounding punctuation is dropped
+_TOKEN = re.compile(r"[$]?[\w%]+(?:[.,'\-/][\w%]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "their this to was were which will with our we what how".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased lexical terms of text, without stopwords"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    Immutable BM25 inverted index over a set of texts
+
+    Postings are stored in compressed sparse row form: one offsets array
+    per term into flat document-position and term-frequency arrays, so
+    the whole index is a handful of numpy arrays plus the vocabulary.
+    A query gathers the postings of its terms, scores them in one
+    vectorized pass and sums per document with a bincount.
+    """
+
+    def __init__(self, ids: Sequence[int], texts: Sequence[str], k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            ids: Vector ID of each text, returned by search()
+            texts: Texts to index
+            k1: Term-frequency saturation
+            b: Document-length normalisation
+        """
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+
+        term_ids, positions = [], []
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for position, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[position] = len(tokens)
+            term_ids.extend(self.vocabulary.setdefault(token, len(self.vocabulary)) for token in tokens)
+            positions.extend([position] * len(tokens))
+
+        # One posting per (term, document), its count as the term frequency
+        keys = np.asarray(term_ids, dtype=np.int64) * max(1, len(texts)) + np.asarray(positions, dtype=np.int64)
+        keys, frequencies = np.unique(keys, return_counts=True)
+        posting_terms = keys // max(1, len(texts))
+        self.positions = (keys % max(1, len(texts))).astype(np.int32)
+        self.frequencies = frequencies.astype(np.float32)
+        self.offsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(posting_terms, minlength=len(self.vocabulary)), out=self.offsets[1:])
+
+        # Per-document length factor of the BM25 denominator
+        average = float(lengths.mean()) if len(texts) and lengths.mean() > 0 else 1.0
+        self.length_norm = (k1 * (1 - b + b * lengths / average)).astype(np.float32)
+        document_frequency = np.diff(self.offsets).astype(np.float32)
+        self.idf = np.log1p((len(texts) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Texts ranked by BM25 score for query
+
+        Returns:
+            (vector ID, score) tuples with a positive score, best first
+        """
+        terms = [self.vocabulary[token] for token in dict.fromkeys(tokenize(query)) if token in self.vocabulary]
+        if not terms or top_k <= 0:
+            return []
+
+        slices = [slice(self.offsets[term], self.offsets[term + 1]) for term in terms]
+        positions = np.concatenate([self.positions[s] for s in slices])
+        frequencies = np.concatenate([self.frequencies[s] for s in slices])
+        idf = np.repeat(self.idf[terms], [s.stop - s.start for s in slices])
+
+        contributions = idf * frequencies * (self.k1 + 1) / (frequencies + self.length_norm[positions])
+        scores = np.bincount(positions, weights=contributions, minlength=len(self.ids))
+
+        k = min(top_k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(self.ids[position]), float(scores[position])) for position in best]
+
+    def get_stats(self) -> dict:
+        return {
+            "documents": len(self.ids),
+            "terms": len(self.vocabulary),
+            "postings": len(self.positions),
+        }
+
+
+def fuse_scores(
+    vector_hits: List[Tuple[int, float]], lexical_hits: List[Tuple[int, float]], lexical_weight: float
+) -> List[Tuple[int, float]]:
+    """
+    Merge vector and BM25 results into one ranking
+
+    Each list's scores are min-max scaled to [0, 1] (its best hit is 1),
+    then combined as (1 - lexical_weight) * vector + lexical_weight * BM25;
+    a hit missing from one list scores 0 there. An exact match of a rare
+    term can so lift a chunk the embedding ranked low, and vice versa.
+
+    Returns:
+        (vector ID, fused score) tuples, best first
+    """
+    fused: Dict[int, float] = {}
+    for hits, weight in ((vector_hits, 1 - lexical_weight), (lexical_hits, lexical_weight)):
+        if not hits:
+            continue
+        scores = np.array([score for _, score in hits], dtype=np.float64)
+        low, span = scores.min(), scores.max() - scores.min()
+        scaled = (scores - low) / span if span > 0 else np.ones_like(scores)
+        for (vector_id, _), value in zip(hits, scaled):
+            fused[vector_id] = fused.get(vector_id, 0.0) + weight * float(value)
+    return sorted(fused.items(), key=lambda hit: hit[1], reverse=True)
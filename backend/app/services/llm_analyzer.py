@@ -1,32 +1,38 @@
 import os
 import json
-from typing import List
+from typing import Callable, List, Optional
 
 import openai
 from dotenv import load_dotenv
 
 from app.models.schema import AnalyzeResponse, KeyMetrics
+from app.services import telemetry
 
 load_dotenv()
 
+# Bump whenever the prompts or response post-processing change, so cached
+# analyses produced by an older prompt are not served for new requests.
+PROMPT_VERSION = "1"
+
 
 class LLMAnalyzer:
     """Uses LLM to generate structured financial analysis."""
 
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY not found")
-
-        self.client = openai.OpenAI(api_key=self.api_key)
+        # Without a key the service still starts (ingestion and retrieval need
+        # none with a local embedding backend); analyses fail until one is set
+        self.client = openai.AsyncOpenAI(api_key=self.api_key) if self.api_key else None
         self.model = os.getenv("LLM_MODEL", "gpt-4-turbo-preview")
+        self.prompt_version = PROMPT_VERSION
 
-    def analyze(
+    async def analyze(
         self,
         context_chunks: List[str],
         query: str,
         analysis_type: str,
         focus_area: str,
+        on_delta: Optional[Callable[[str], None]] = None,
     ) -> AnalyzeResponse:
         """
         Analyze financial document with LLM.
@@ -36,10 +42,13 @@ class LLMAnalyzer:
             query: User query (optional free-form question)
             analysis_type: High-level analysis style from the UI
             focus_area: Primary financial focus area from the UI
+            on_delta: Called with each piece of the model's JSON output as
+                it is generated; the completion is streamed when given
 
         Returns:
             AnalyzeResponse with structured insights
         """
+        self._require_client()
 
         # Combine context
         context = "\n\n---\n\n".join(context_chunks)
@@ -125,19 +134,40 @@ Financial document context:
 Return ONLY the JSON object that follows the specified schema."""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.3,
-                max_tokens=1500,
-                response_format={"type": "json_object"},  # Enforce JSON mode
-            )
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ]
+            with telemetry.span("llm.completion", model=self.model, streamed=on_delta is not None):
+                if on_delta is None:
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=0.3,
+                        max_tokens=1500,
+                        response_format={"type": "json_object"},  # Enforce JSON mode
+                    )
+                    telemetry.record_llm_usage(self.model, getattr(response, "usage", None))
+                    result_text = response.choices[0].message.content
+                else:
+                    result_text = await self._stream_completion(messages, on_delta)
+
+            return self.parse_analysis(result_text, context_chunks)
 
+        except Exception as e:
+            raise Exception(f"LLM analysis failed: {str(e)}")
+
+    @staticmethod
+    def parse_analysis(result_text: str, context_chunks: List[str]) -> AnalyzeResponse:
+        """
+        Turn the model's JSON output into an AnalyzeResponse.
+
+        Tolerates a summary given as a string, an out-of-range or
+        non-numeric confidence score and a missing citation count; output
+        that is not JSON at all yields a low-confidence placeholder.
+        """
+        try:
             # Parse JSON response
-            result_text = response.choices[0].message.content
             result_json = json.loads(result_text)
 
             # Normalise summary: allow either string or list in raw JSON
@@ -196,13 +226,39 @@ Return ONLY the JSON object that follows the specified schema."""
                 sources_used=len(context_chunks),
                 citations_used=len(context_chunks),
             )
-        except Exception as e:
-            raise Exception(f"LLM analysis failed: {str(e)}")
 
-    def generate_simple_summary(self, text: str, max_length: int = 200) -> str:
+    def _require_client(self):
+        if self.client is None:
+            raise RuntimeError("OPENAI_API_KEY not found")
+
+    async def _stream_completion(self, messages: List[dict], on_delta: Callable[[str], None]) -> str:
+        """Run the analysis completion streamed, passing on each delta; returns the full text"""
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.3,
+            max_tokens=1500,
+            response_format={"type": "json_object"},  # Enforce JSON mode
+            stream=True,
+            # The final chunk then carries the token usage, with no choices
+            stream_options={"include_usage": True},
+        )
+        parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                telemetry.record_llm_usage(self.model, getattr(chunk, "usage", None))
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                on_delta(delta)
+        return "".join(parts)
+
+    async def generate_simple_summary(self, text: str, max_length: int = 200) -> str:
         """Generate a simple summary (fallback method)."""
+        self._require_client()
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
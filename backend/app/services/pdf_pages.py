@@ -0,0 +1,263 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional, Tuple, Union
+
+try:
+    import resource
+except ImportError:  # Windows: no address-space limits
+    resource = None
+
+PdfSource = Union[str, bytes]
+# (start, end) page range, the pool it went to, its result and when its time is up
+PageTask = Tuple[Tuple[int, int], ProcessPoolExecutor, Future, float]
+
+
+def _open(source: PdfSource):
+    """File path or in-memory PDF as something the parsers can read"""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def page_count(source: PdfSource) -> int:
+    """Number of pages, from whichever parser can read the file"""
+    # The parsers are imported on first use, keeping app startup fast
+    import pdfplumber
+    from PyPDF2 import PdfReader
+
+    try:
+        return len(PdfReader(_open(source)).pages)
+    except Exception:
+        with pdfplumber.open(_open(source)) as pdf:
+            return len(pdf.pages)
+
+
+def iter_page_texts(
+    source: PdfSource, start: int, end: int, use_pdfplumber: bool = True
+) -> Iterator[Optional[str]]:
+    """
+    Yield the text of pages [start, end), None for pages with no text
+
+    pdfplumber is tried first (better for tables). Only pages it fails on
+    or returns nothing for are re-read with PyPDF2, so one bad page no
+    longer throws away the rest of the document.
+    """
+    import pdfplumber
+    from PyPDF2 import PdfReader
+
+    reader = None
+
+    def fallback(number: int) -> Optional[str]:
+        nonlocal reader
+        try:
+            if reader is None:
+                reader = PdfReader(_open(source))
+            return reader.pages[number].extract_text() or None
+        except Exception:
+            return None
+
+    pdf = None
+    if use_pdfplumber:
+        try:
+            pdf = pdfplumber.open(_open(source))
+        except Exception:
+            pdf = None
+
+    try:
+        for number in range(start, end):
+            text = None
+            if pdf is not None:
+                try:
+                    page = pdf.pages[number]
+                    try:
+                        text = page.extract_text() or None
+                    finally:
+                        # Drop the page's layout objects before moving on
+                        page.close()
+                except Exception:
+                    text = None
+            yield text or fallback(number)
+    finally:
+        if pdf is not None:
+            pdf.close()
+
+
+def extract_page_texts(
+    source: PdfSource, start: int, end: int, use_pdfplumber: bool = True
+) -> List[Optional[str]]:
+    """Worker entry point: texts of pages [start, end) in order"""
+    return list(iter_page_texts(source, start, end, use_pdfplumber))
+
+
+def _limit_memory(headroom_mb: int):
+    """Worker initializer: cap the address space at current usage plus headroom"""
+    if resource is None or headroom_mb <= 0:
+        return
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = current + headroom_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    # Oversized pages then fail with MemoryError and take the per-page fallback
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+class PDFPagePool:
+    """
+    Extracts PDF page text in parallel across worker processes
+
+    The document is split into ranges of pages that workers extract
+    independently; results are yielded in page order as soon as each
+    range (and every range before it) is done. A range's time budget runs
+    from when it leaves the pool's queue, whether or not anyone is waiting
+    for it yet. A range that exceeds it or kills its worker gets the pool
+    replaced and is re-read a page at a time; only pages that fail again
+    are read in-process with PyPDF2. Documents extracted at the same time
+    share the pool, so their ranges lost with a replaced pool are
+    resubmitted to the new one. Small documents skip the pool entirely.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        pages_per_task: Optional[int] = None,
+        page_timeout: Optional[float] = None,
+        memory_mb: Optional[int] = None,
+        min_pages: Optional[int] = None,
+    ):
+        """
+        Args:
+            workers: Worker processes (PDF_WORKERS, default: CPU count)
+            pages_per_task: Pages per submitted range (PDF_PAGES_PER_TASK)
+            page_timeout: Seconds allowed per page of a range (PDF_PAGE_TIMEOUT)
+            memory_mb: Extra memory a worker may allocate (PDF_WORKER_MEMORY_MB)
+            min_pages: Smaller documents are parsed in-process (PDF_PARALLEL_MIN_PAGES)
+        """
+        self.workers = workers or int(os.getenv("PDF_WORKERS", "0")) or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task or int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+        self.page_timeout = page_timeout or float(os.getenv("PDF_PAGE_TIMEOUT", "10"))
+        self.memory_mb = memory_mb if memory_mb is not None else int(os.getenv("PDF_WORKER_MEMORY_MB", "1024"))
+        self.min_pages = min_pages if min_pages is not None else int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs threads and an event loop is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_limit_memory,
+                    initargs=(self.memory_mb,),
+                )
+            return self._executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor):
+        """Kill every worker of executor (a hung one cannot be cancelled) unless it was already replaced"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _submit(self, path: str, page_range: Tuple[int, int]) -> PageTask:
+        start, end = page_range
+        executor = self._get_executor()
+        future = executor.submit(extract_page_texts, path, start, end)
+        return page_range, executor, future, time.monotonic() + self.page_timeout * (end - start)
+
+    def _lost(self, task: PageTask) -> bool:
+        """Whether a task went down with a pool that has since been replaced"""
+        _, executor, future, _ = task
+        if executor is self._executor:
+            return False
+        return not future.done() or future.cancelled() or future.exception() is not None
+
+    def _result(self, path: str, task: PageTask) -> List[Optional[str]]:
+        """Texts of a submitted page range, recovering from timeouts and crashed workers"""
+        while True:
+            (start, end), executor, future, deadline = task
+            try:
+                return future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except (FutureTimeout, CancelledError, BrokenProcessPool) as e:
+                if isinstance(e, FutureTimeout) and not future.running() and not future.done():
+                    # Still queued behind other ranges (maybe other documents'); not hung
+                    task = ((start, end), executor, future, time.monotonic() + self.page_timeout * (end - start))
+                    continue
+                if not isinstance(e, FutureTimeout) and self._lost(task):
+                    # Another range (maybe another document's) got the pool replaced
+                    task = self._submit(path, (start, end))
+                    continue
+                reason = "timed out" if isinstance(e, FutureTimeout) else "crashed"
+                self._reset_executor(executor)
+                if end - start == 1:
+                    print(f"PDF page {start + 1} {reason}; re-reading it with PyPDF2")
+                    return extract_page_texts(path, start, end, use_pdfplumber=False)
+                # One page at a time, so only the pages that fail again lose pdfplumber
+                print(f"PDF pages {start + 1}-{end} {reason}; retrying them one page at a time")
+                pages = [self._submit(path, (page, page + 1)) for page in range(start, end)]
+                return [text for page in pages for text in self._result(path, page)]
+
+    def iter_pages(self, pdf_bytes: bytes) -> Iterator[str]:
+        """Yield the text of each non-empty page in order (blocking)"""
+        count = page_count(pdf_bytes)
+
+        if self.workers <= 1 or count < self.min_pages:
+            for text in iter_page_texts(pdf_bytes, 0, count):
+                if text:
+                    yield text
+            return
+
+        # Workers read the file from disk rather than each receiving a copy
+        handle, path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(handle, "wb") as f:
+            f.write(pdf_bytes)
+
+        ranges = [
+            (start, min(start + self.pages_per_task, count))
+            for start in range(0, count, self.pages_per_task)
+        ]
+        # Enough queued work to keep every worker busy without parsing far ahead
+        max_in_flight = self.workers * 2
+        in_flight = deque()
+        submitted = 0
+
+        try:
+            while in_flight or submitted < len(ranges):
+                while submitted < len(ranges) and len(in_flight) < max_in_flight:
+                    in_flight.append(self._submit(path, ranges[submitted]))
+                    submitted += 1
+
+                texts = self._result(path, in_flight.popleft())
+                # Ranges queued on a pool replaced meanwhile go to the new one
+                in_flight = deque(
+                    self._submit(path, task[0]) if self._lost(task) else task for task in in_flight
+                )
+
+                for text in texts:
+                    if text:
+                        yield text
+        finally:
+            for _, _, future, _ in in_flight:
+                future.cancel()
+            os.remove(path)
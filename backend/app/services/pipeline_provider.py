@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from app.services.rag import RAGPipeline
+
+
+def _build_pipeline() -> "RAGPipeline":
+    # Importing the pipeline pulls in faiss, numpy and the OpenAI client
+    from app.services.rag import RAGPipeline
+    return RAGPipeline()
+
+
+class PipelineProvider:
+    """
+    Builds the shared RAGPipeline on first use rather than at import time
+
+    Building one creates the API clients and loads the vector index, which
+    takes a while and needs credentials, so importing the app stays fast
+    and works without them. The first caller builds the pipeline in a
+    worker thread; concurrent callers wait for that build. A failed build
+    is retried by the next caller.
+
+    States, for readiness checks:
+
+    - cold: not built yet
+    - building: being built
+    - warming: built, preset query embeddings still being loaded
+    - ready: built (and warmed up, if warm_up() was called)
+    - failed: the last build attempt raised; see error
+    """
+
+    def __init__(self, factory: Optional[Callable[[], "RAGPipeline"]] = None):
+        self.factory = factory or _build_pipeline
+        self.error: Optional[str] = None
+        self.build_seconds: Optional[float] = None
+        self.warm_up_seconds: Optional[float] = None
+        self._pipeline: Optional["RAGPipeline"] = None
+        self._lock = threading.Lock()
+        self._building = False
+        self._warm_up: Optional[asyncio.Task] = None
+
+    @property
+    def pipeline(self) -> Optional["RAGPipeline"]:
+        """The pipeline if it has been built, without building it"""
+        return self._pipeline
+
+    @property
+    def state(self) -> str:
+        if self._pipeline is None:
+            if self._building:
+                return "building"
+            return "failed" if self.error is not None else "cold"
+        return "warming" if self._warm_up is not None and not self._warm_up.done() else "ready"
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    async def get(self) -> "RAGPipeline":
+        """The pipeline, built on the first call"""
+        if self._pipeline is None:
+            await asyncio.to_thread(self._build)
+        return self._pipeline
+
+    def start_warm_up(self) -> asyncio.Task:
+        """
+        Build the pipeline and precompute the preset query embeddings in the background
+
+        Runs once; later calls return the same task, unless it failed to
+        build the pipeline or was cancelled, in which case it starts over.
+        A failed query warm-up only means queries are embedded on demand,
+        so it is reported but does not fail the task.
+        """
+        task = self._warm_up
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            self._warm_up = asyncio.create_task(self._run_warm_up())
+        return self._warm_up
+
+    async def warm_up(self) -> "RAGPipeline":
+        """Wait for start_warm_up(); cancelling the caller leaves it running"""
+        return await asyncio.shield(self.start_warm_up())
+
+    def cancel_warm_up(self):
+        """Abandon a warm-up still in progress"""
+        if self._warm_up is not None and not self._warm_up.done():
+            self._warm_up.cancel()
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "build_seconds": round(self.build_seconds, 3) if self.build_seconds is not None else None,
+            "warm_up_seconds": round(self.warm_up_seconds, 3) if self.warm_up_seconds is not None else None,
+        }
+
+    async def _run_warm_up(self) -> "RAGPipeline":
+        pipeline = await self.get()
+        started = time.perf_counter()
+        try:
+            await pipeline.warm_up()
+        except Exception as e:
+            print(f" Query embedding warm-up failed: {e}")
+        self.warm_up_seconds = time.perf_counter() - started
+        return pipeline
+
+    def _build(self):
+        with self._lock:
+            if self._pipeline is not None:
+                return
+            self._building = True
+            started = time.perf_counter()
+            try:
+                self._pipeline = self.factory()
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                self._building = False
+            self.error = None
+            self.build_seconds = time.perf_counter() - started
+            print(f" Pipeline ready in {self.build_seconds:.2f}s")
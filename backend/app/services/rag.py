@@ -1,98 +1,728 @@
+import asyncio
 import os
-from typing import List, Tuple
+import re
+import json
+import time
+import hashlib
+import weakref
+import contextlib
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from fastapi.encoders import jsonable_encoder
 from app.services.extractor import TextExtractor
-from app.services.embedder import Embedder
+from app.services.embedder import Embedder, tokens_from_chars
+from app.services.embedding_backends import EmbeddingBackend
 from app.services.vector_store import VectorStore
+from app.services.context import ContextAssembler
+from app.services.facets import facet_queries, preset_queries
+from app.services.lexical_index import fuse_scores
+from app.services.token_chunker import Span, TokenChunker
 from app.services.llm_analyzer import LLMAnalyzer
+from app.services.result_cache import ResultCache
+from app.services import telemetry
 from app.models.schema import AnalyzeRequest, AnalyzeResponse
 
+# Receives (event name, event data) as the pipeline moves through its stages
+ProgressCallback = Callable[[str, dict], None]
+
+def _chunk_setting(name: str, deprecated: str, default: int) -> int:
+    """Token count from name, else from the character count a deprecated variable still sets"""
+    if os.getenv(name) is None and os.getenv(deprecated) is not None:
+        print(f" {deprecated} is deprecated (it counts characters); set {name} in tokens instead")
+        return tokens_from_chars(int(os.getenv(deprecated)))
+    return int(os.getenv(name, str(default)))
+
+class PipelineProgress:
+    """
+    Reports pipeline stages, with timings, to an optional callback
+    
+    Every stage event carries stage_ms (time since the previous event)
+    and elapsed_ms (time since the request started). Each stage is also
+    recorded in the stage metrics and, when tracing is on, as a span.
+    """
+    
+    def __init__(self, callback: Optional[ProgressCallback] = None):
+        self.callback = callback
+        self.started = self.last = time.perf_counter()
+    
+    def __call__(self, event: str, **data):
+        """Report a finished stage"""
+        now = time.perf_counter()
+        telemetry.observe_stage(event, now - self.last, data)
+        if self.callback is not None:
+            data["stage_ms"] = round((now - self.last) * 1000, 1)
+            data["elapsed_ms"] = round((now - self.started) * 1000, 1)
+            self.callback(event, data)
+        self.last = now
+    
+    def delta(self, text: str):
+        """Pass on a piece of streamed LLM output"""
+        if self.callback is not None:
+            self.callback("llm_delta", {"text": text})
+    
+    @property
+    def streaming(self) -> bool:
+        """Whether anyone is listening for LLM output"""
+        return self.callback is not None
+
 class RAGPipeline:
     """End-to-end RAG pipeline for financial document analysis"""
     
     def __init__(self):
         self.extractor = TextExtractor()
         self.embedder = Embedder()
-        self.vector_store = VectorStore(dimension=1536)
+        self.vector_store = VectorStore(dimension=self.embedder.dimension)
         self.analyzer = LLMAnalyzer()
+        self.result_cache = ResultCache()
         
-        # Load existing index if available
-        self.vector_store.load()
+        # Load existing index if available; from here on every add is logged
+        self.vector_store.load(self.index_name(self.embedder.backend))
+        self._compaction: Optional[asyncio.Task] = None
         
         # Config
-        self.chunk_size = int(os.getenv("CHUNK_SIZE", "1000"))
-        self.chunk_overlap = int(os.getenv("CHUNK_OVERLAP", "200"))
-        self.top_k = 5  # Number of chunks to retrieve
+        self.chunk_tokens = max(1, _chunk_setting("CHUNK_TOKENS", "CHUNK_SIZE", 256))
+        self.chunk_overlap_tokens = _chunk_setting("CHUNK_OVERLAP_TOKENS", "CHUNK_OVERLAP", 32)
+        # Retrieval: candidates per query, packed into a prompt-token budget
+        self.context_candidates = int(os.getenv("CONTEXT_CANDIDATES", "20"))
+        self.context_token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1100"))
+        # Queries per request: its own plus facets of its analysis type and focus area
+        self.retrieval_queries = int(os.getenv("RETRIEVAL_MAX_QUERIES", "5"))
+        # Share of BM25 keyword scores in each query's ranking; 0 retrieves by vectors alone
+        self.lexical_weight = float(os.getenv("LEXICAL_WEIGHT", "0.5"))
+        self.context = ContextAssembler(self.context_token_budget, self.embedder.count_tokens)
+        
+        # Streaming PDF ingestion: pages in flight and chunks per embedding request
+        self.stream_pdfs = os.getenv("PDF_STREAMING", "true").lower() == "true"
+        self.page_window = int(os.getenv("PDF_PAGE_WINDOW", "8"))
+        self.stream_batch_chunks = int(os.getenv("STREAM_EMBEDDING_BATCH", "64"))
+        
+        # Batch analysis: LLM calls in flight at once across a batch
+        self.batch_llm_concurrency = int(os.getenv("BATCH_LLM_CONCURRENCY", "16"))
+        
+        # Canned questions (one per line) to embed at startup with the presets
+        self.query_presets_path = os.getenv("QUERY_PRESETS_PATH")
+        
+        # One ingest lock per document so identical concurrent uploads embed once
+        self._ingest_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
     
-    def process_document(self, request: AnalyzeRequest) -> AnalyzeResponse:
+    @staticmethod
+    def index_name(backend: EmbeddingBackend) -> str:
+        """Vector store of a backend's vectors; those of different backends are not comparable"""
+        if backend.name == "openai":
+            return "financial_docs"
+        return "financial_docs-" + re.sub(r"[^\w.-]+", "_", backend.model)
+    
+    async def process_document(
+        self, request: AnalyzeRequest, progress: Optional[ProgressCallback] = None
+    ) -> AnalyzeResponse:
         """
         Full pipeline: Extract → Chunk → Embed → Store → Retrieve → Analyze
         
+        Every network call is awaited and CPU-heavy text processing runs in
+        a worker thread, so concurrent requests overlap instead of queueing
+        behind one another on the event loop.
+        
         Args:
             request: AnalyzeRequest with document info
+            progress: Called with (event, data) as each stage finishes
+                (extracted, cached, chunked, embedded, retrieved, analyzed)
+                and with every llm_delta of the streamed LLM output
             
         Returns:
             AnalyzeResponse with structured insights
         """
-        
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with telemetry.span(
+                "analysis",
+                input_type=request.type,
+                analysis_type=request.analysis_type,
+                focus_area=request.focus_area,
+            ):
+                response = await self._process_document(request, PipelineProgress(progress))
+            outcome = "ok"
+            return response
+        finally:
+            telemetry.ANALYSIS_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+    
+    async def _process_document(self, request: AnalyzeRequest, stages: PipelineProgress) -> AnalyzeResponse:
+        """process_document() without the end-to-end metrics"""
         # Step 1: Extract text
-        print(f" Extracting text from {request.type}...")
-        raw_text = self.extractor.extract(request.type, request.input)
-        clean_text = self.extractor.clean_text(raw_text)
+        document_id, clean_text, pdf_bytes = await self._extract(request, stages)
         
-        if not clean_text or len(clean_text) < 50:
-            raise ValueError("Extracted text is too short or empty")
+        # Serve identical requests from the result cache
+        cache_key = self._result_cache_key(document_id, request)
+        cached = self._cached_result(cache_key, request, stages)
+        if cached is not None:
+            return cached
+        
+        # Steps 2-4: Chunk, embed and store (skipped if already indexed)
+        if pdf_bytes is not None:
+            await self._ingest_stream(document_id, pdf_bytes, stages)
+        else:
+            await self._ingest(document_id, clean_text, stages)
+        
+        # All retrieval queries at once; presets are already in memory
+        query_embeddings = await self.embedder.embed_queries(self._queries(request))
+        return await self._analyze(request, document_id, query_embeddings, cache_key, stages)
+    
+    async def warm_up(self):
+        """
+        Have the embeddings of the default, facet and canned queries ready
+        
+        Loads the query embeddings stored by earlier runs and embeds the
+        presets still missing, in one request, so common requests reach
+        retrieval without waiting on the embedding API.
+        """
+        presets = preset_queries(self.retrieval_queries)
+        if self.query_presets_path:
+            with open(self.query_presets_path, encoding="utf-8") as f:
+                presets += [line.strip() for line in f if line.strip()]
+        embedded = await self.embedder.warm_queries(presets)
+        print(f" Query embeddings ready: {len(presets)} presets, {embedded} not stored before")
+    
+    async def process_batch(
+        self, requests: Sequence[AnalyzeRequest]
+    ) -> List[Union[AnalyzeResponse, Exception]]:
+        """
+        Analyze several documents together, e.g. a peer group of filings
+        
+        Documents are extracted concurrently. The chunks of every document
+        not yet indexed, and then every query, go to the embedder as one
+        list, so they share embedding requests instead of each document
+        paying its own round trips. LLM calls run concurrently, at most
+        batch_llm_concurrency at a time, so the batch takes about as long
+        as its slowest document rather than the sum of all of them.
+        
+        Args:
+            requests: AnalyzeRequests, one per document
+            
+        Returns:
+            Per request, in order, its AnalyzeResponse or the exception
+            that failed it; one failing document does not fail the rest
+        """
+        print(f" Batch analysis of {len(requests)} documents...")
+        with telemetry.span("analysis.batch", documents=len(requests)):
+            return await self._process_batch(requests)
+    
+    async def _process_batch(
+        self, requests: Sequence[AnalyzeRequest]
+    ) -> List[Union[AnalyzeResponse, Exception]]:
+        """process_batch() inside its span"""
+        results: List[Union[AnalyzeResponse, Exception, None]] = [None] * len(requests)
         
-        # Step 2: Chunk text
-        print(f"  Chunking text (size={self.chunk_size}, overlap={self.chunk_overlap})...")
-        chunks = self.embedder.chunk_text(
-            clean_text,
-            chunk_size=self.chunk_size,
-            overlap=self.chunk_overlap
+        # Step 1: Extract every document at once
+        extracted = await asyncio.gather(
+            *(self._extract(request, PipelineProgress()) for request in requests),
+            return_exceptions=True,
         )
-        print(f"   Created {len(chunks)} chunks")
+        pending = []
+        documents: Dict[str, Tuple[Optional[str], Optional[bytes]]] = {}
+        for i, (request, item) in enumerate(zip(requests, extracted)):
+            if isinstance(item, BaseException):
+                results[i] = self._batch_error(item)
+                continue
+            document_id, clean_text, pdf_bytes = item
+            cache_key = self._result_cache_key(document_id, request)
+            cached = self._cached_result(cache_key, request, PipelineProgress())
+            if cached is not None:
+                results[i] = cached
+                continue
+            pending.append((i, document_id, cache_key))
+            documents[document_id] = (clean_text, pdf_bytes)
+        
+        # Steps 2-4: Chunk, embed and store the new documents together
+        failed = await self._ingest_many(documents)
+        for i, document_id, _ in pending:
+            if document_id in failed:
+                results[i] = failed[document_id]
+        pending = [item for item in pending if item[1] not in failed]
         
-        # Step 3: Generate embeddings
-        print(f" Generating embeddings...")
-        embeddings = self.embedder.embed_batch(chunks)
+        # Embed all queries in one request; a failure is retried per document
+        queries = list(dict.fromkeys(
+            query for i, _, _ in pending for query in self._queries(requests[i])
+        ))
+        query_embeddings = {}
+        if queries:
+            try:
+                query_embeddings = dict(zip(queries, await self.embedder.embed_queries(queries)))
+            except Exception as e:
+                print(f"  Shared query embedding failed ({e}); embedding per document")
         
-        # Step 4: Store in vector DB
-        print(f" Storing vectors in FAISS...")
-        # Clear previous session data (for fresh analysis each time)
-        # You can comment this out to keep accumulating documents
-        self.vector_store.clear()
-        self.vector_store.add_vectors(embeddings, chunks)
+        # Steps 5-6: Retrieve and analyze, with bounded LLM concurrency
+        semaphore = asyncio.Semaphore(self.batch_llm_concurrency)
         
-        # Step 5: Retrieve relevant chunks
-        print(f" Retrieving top {self.top_k} relevant chunks...")
-        query_embedding = self.embedder.embed_text(request.query)
-        results = self.vector_store.search(query_embedding, top_k=self.top_k)
+        async def analyze(i: int, document_id: str, cache_key: str) -> AnalyzeResponse:
+            request = requests[i]
+            own_queries = self._queries(request)
+            if all(query in query_embeddings for query in own_queries):
+                own_embeddings = [query_embeddings[query] for query in own_queries]
+            else:
+                own_embeddings = await self.embedder.embed_queries(own_queries)
+            async with semaphore:
+                return await self._analyze(request, document_id, own_embeddings, cache_key, PipelineProgress())
         
-        # Extract just the texts (discard distances)
-        context_chunks = [text for text, _ in results]
+        outcomes = await asyncio.gather(*(analyze(*item) for item in pending), return_exceptions=True)
+        for (i, _, _), outcome in zip(pending, outcomes):
+            results[i] = self._batch_error(outcome) if isinstance(outcome, BaseException) else outcome
+        
+        print(f" Batch complete: {sum(not isinstance(r, Exception) for r in results)}/{len(results)} succeeded")
+        return results
+    
+    async def _extract(
+        self, request: AnalyzeRequest, stages: PipelineProgress
+    ) -> Tuple[str, Optional[str], Optional[bytes]]:
+        """
+        Extract a request's document
+        
+        Returns:
+            The document ID and either its cleaned text or, when PDFs are
+            streamed, the raw PDF to be parsed during ingestion
+        """
+        print(f" Extracting text from {request.type}...")
+        if request.type == "pdf" and self.stream_pdfs:
+            # Pages are parsed later, while earlier ones are being embedded;
+            # the raw file identifies the document
+            pdf_bytes = await self.extractor.load_pdf(request.input)
+            document_id = self.extractor.fingerprint(pdf_bytes)
+            stages("extracted", document_id=document_id, pdf_bytes=len(pdf_bytes), streaming=True)
+            return document_id, None, pdf_bytes
+        
+        raw_text = await self.extractor.extract(request.type, request.input)
+        clean_text = await asyncio.to_thread(self.extractor.clean_text, raw_text)
+        
+        if not clean_text or len(clean_text) < 50:
+            raise ValueError("Extracted text is too short or empty")
+        
+        # Each document lives in its own vector namespace
+        document_id = self.extractor.fingerprint(clean_text)
+        stages("extracted", document_id=document_id, chars=len(clean_text))
+        return document_id, clean_text, None
+    
+    def _cached_result(
+        self, cache_key: str, request: AnalyzeRequest, stages: PipelineProgress
+    ) -> Optional[AnalyzeResponse]:
+        """The cached analysis for a request, unless missing or bypassed"""
+        if request.bypass_cache:
+            return None
+        cached = self.result_cache.get(cache_key)
+        telemetry.CACHE_LOOKUPS.inc(cache="result", outcome="miss" if cached is None else "hit")
+        if cached is None:
+            return None
+        print(f" Returning cached analysis")
+        stages("cached")
+        return AnalyzeResponse(**json.loads(cached))
+    
+    async def _analyze(
+        self,
+        request: AnalyzeRequest,
+        document_id: str,
+        query_embeddings: List[List[float]],
+        cache_key: str,
+        stages: PipelineProgress,
+    ) -> AnalyzeResponse:
+        """Retrieve context from an indexed document, run the LLM and cache the result"""
+        # Step 5: Retrieve relevant chunks and pack them into the token budget
+        print(f" Retrieving up to {self.context_candidates} candidate chunks for {len(query_embeddings)} queries...")
+        # Searching, BM25 fusion (building the document's index on first use)
+        # and packing are CPU work; keep them off the event loop
+        context_chunks, context_tokens = await asyncio.to_thread(
+            self._build_context, self._queries(request), query_embeddings, document_id
+        )
         
         if not context_chunks:
             raise ValueError("No relevant context found")
+        stages(
+            "retrieved",
+            queries=len(query_embeddings),
+            passages=len(context_chunks),
+            context_tokens=context_tokens,
+        )
         
         # Step 6: LLM Analysis
         print(f" Analyzing with LLM...")
-        response = self.analyzer.analyze(
+        response = await self.analyzer.analyze(
             context_chunks=context_chunks,
             query=request.query,
             analysis_type=request.analysis_type,
             focus_area=request.focus_area,
+            on_delta=stages.delta if stages.streaming else None,
         )
+        stages("analyzed")
+        
+        self.result_cache.set(cache_key, json.dumps(jsonable_encoder(response)))
         
         print(f" Analysis complete!")
         return response
     
+    async def _ingest(
+        self, document_id: str, clean_text: str, stages: Optional[PipelineProgress] = None
+    ):
+        """
+        Chunk, embed and store a document under its own namespace
+        
+        Documents that are already indexed are left untouched, so repeated
+        analyses of the same filing skip straight to retrieval.
+        """
+        stages = stages or PipelineProgress()
+        async with self._ingest_lock(document_id):
+            if self.vector_store.has_namespace(document_id):
+                print(f"  Document already indexed, reusing stored vectors")
+                stages("chunked", reused=True)
+                stages("embedded", reused=True)
+                return
+            
+            # Step 2: Chunk text
+            print(f"  Chunking text (tokens={self.chunk_tokens}, overlap={self.chunk_overlap_tokens})...")
+            spans = await asyncio.to_thread(
+                self.embedder.chunk_spans,
+                clean_text,
+                chunk_tokens=self.chunk_tokens,
+                overlap_tokens=self.chunk_overlap_tokens
+            )
+            chunks = [clean_text[start:end] for start, end in spans]
+            print(f"   Created {len(chunks)} chunks")
+            stages("chunked", chunks=len(chunks))
+            
+            # Step 3: Generate embeddings
+            print(f" Generating embeddings...")
+            embeddings = await self.embedder.embed_batch(chunks)
+            stages("embedded", chunks=len(chunks))
+            
+            # Step 4: Store in vector DB (appends to the write-ahead log)
+            print(f" Storing vectors in FAISS...")
+            await asyncio.to_thread(
+                self.vector_store.add_vectors, embeddings, chunks, namespace=document_id, spans=spans
+            )
+        
+        self._maybe_compact()
+    
+    async def _ingest_stream(
+        self, document_id: str, pdf_bytes: bytes, stages: Optional[PipelineProgress] = None
+    ):
+        """
+        Parse, chunk, embed and store a PDF page by page
+        
+        Pages come from a parser thread through a bounded window, are
+        cleaned and fed to an incremental chunker, and every full batch of
+        chunks is sent for embedding straight away, so API calls overlap
+        the parsing of later pages and no full-document string is built.
+        The document becomes visible only once all of it is stored.
+        """
+        stages = stages or PipelineProgress()
+        async with self._ingest_lock(document_id):
+            if self.vector_store.has_namespace(document_id):
+                print(f"  Document already indexed, reusing stored vectors")
+                stages("chunked", reused=True)
+                stages("embedded", reused=True)
+                return
+            
+            print(f"  Streaming PDF pages (window={self.page_window}, batch={self.stream_batch_chunks})...")
+            pages = self.extractor.stream_pdf_pages(pdf_bytes, window=self.page_window)
+            chunks, spans, tasks, text_chars = await self._chunk_and_embed(pages)
+            
+            if text_chars < 50:
+                for task in tasks:
+                    task.cancel()
+                raise ValueError("Extracted text is too short or empty")
+            # Pages are parsed and chunked; embedding requests are still in flight
+            stages("chunked", chunks=len(chunks), chars=text_chars)
+            
+            try:
+                batches = await asyncio.gather(*tasks)
+            except Exception:
+                for task in tasks:
+                    task.cancel()
+                raise
+            embeddings = [embedding for batch in batches for embedding in batch]
+            print(f"   Embedded {len(chunks)} chunks from streamed pages")
+            stages("embedded", chunks=len(chunks))
+            
+            # Step 4: Store in vector DB (appends to the write-ahead log)
+            print(f" Storing vectors in FAISS...")
+            await asyncio.to_thread(
+                self.vector_store.add_vectors, embeddings, chunks, namespace=document_id, spans=spans
+            )
+        
+        self._maybe_compact()
+    
+    async def _ingest_many(
+        self, documents: Dict[str, Tuple[Optional[str], Optional[bytes]]]
+    ) -> Dict[str, Exception]:
+        """
+        Chunk, embed and store several documents with shared embedding requests
+        
+        Args:
+            documents: Document ID -> (clean text, None) or (None, PDF bytes)
+            
+        Returns:
+            The documents that could not be ingested, with their errors
+        """
+        failed: Dict[str, Exception] = {}
+        async with contextlib.AsyncExitStack() as locks:
+            # Sorted, so two batches sharing documents cannot deadlock
+            for document_id in sorted(documents):
+                await locks.enter_async_context(self._ingest_lock(document_id))
+            todo = [d for d in sorted(documents) if not self.vector_store.has_namespace(d)]
+            if not todo:
+                return failed
+            
+            print(f"  Chunking {len(todo)} documents (tokens={self.chunk_tokens}, overlap={self.chunk_overlap_tokens})...")
+            chunked = await asyncio.gather(
+                *(self._chunk_document(*documents[d]) for d in todo), return_exceptions=True
+            )
+            ready = []
+            for document_id, item in zip(todo, chunked):
+                if isinstance(item, BaseException):
+                    failed[document_id] = self._batch_error(item)
+                else:
+                    ready.append((document_id, *item))
+            
+            # Pool the chunks of all documents and spread them evenly over as
+            # many concurrent requests as the embedder allows, each still
+            # split further if it exceeds the API limits
+            all_chunks = [chunk for _, chunks, _ in ready for chunk in chunks]
+            print(f" Generating embeddings for {len(all_chunks)} chunks from {len(ready)} documents...")
+            step = max(1, -(-len(all_chunks) // self.embedder.max_concurrency))
+            try:
+                parts = await asyncio.gather(*(
+                    self.embedder.embed_batch(all_chunks[i:i + step])
+                    for i in range(0, len(all_chunks), step)
+                ))
+                embeddings = [embedding for part in parts for embedding in part]
+            except Exception as e:
+                # Retry per document to isolate the failure; finished requests are cached
+                print(f"  Shared embedding failed ({e}); embedding per document")
+                embeddings, embedded = [], []
+                for item in ready:
+                    try:
+                        embeddings.extend(await self.embedder.embed_batch(item[1]))
+                        embedded.append(item)
+                    except Exception as error:
+                        failed[item[0]] = error
+                ready = embedded
+            
+            print(f" Storing vectors in FAISS...")
+            position = 0
+            for document_id, chunks, spans in ready:
+                await asyncio.to_thread(
+                    self.vector_store.add_vectors,
+                    embeddings[position:position + len(chunks)],
+                    chunks,
+                    namespace=document_id,
+                    spans=spans,
+                )
+                position += len(chunks)
+        
+        self._maybe_compact()
+        return failed
+    
+    async def _chunk_document(
+        self, clean_text: Optional[str], pdf_bytes: Optional[bytes]
+    ) -> Tuple[List[str], List[Span]]:
+        """Chunks and spans of extracted text, or of a PDF parsed page by page"""
+        if pdf_bytes is None:
+            spans = await asyncio.to_thread(
+                self.embedder.chunk_spans,
+                clean_text,
+                chunk_tokens=self.chunk_tokens,
+                overlap_tokens=self.chunk_overlap_tokens
+            )
+            return [clean_text[start:end] for start, end in spans], spans
+        
+        chunker = self.embedder.chunker(self.chunk_tokens, self.chunk_overlap_tokens)
+        chunked, text_chars = [], 0
+        async for page_text in self.extractor.stream_pdf_pages(pdf_bytes, window=self.page_window):
+            chars, page_chunks = await asyncio.to_thread(self._clean_and_chunk, chunker, page_text)
+            text_chars += chars
+            chunked.extend(page_chunks)
+        chunked.extend(await asyncio.to_thread(chunker.finish))
+        if text_chars < 50:
+            raise ValueError("Extracted text is too short or empty")
+        return [chunk for _, _, chunk in chunked], [(start, end) for start, end, _ in chunked]
+    
+    def _clean_and_chunk(self, chunker: TokenChunker, page_text: str) -> Tuple[int, List[Tuple[int, int, str]]]:
+        """
+        Clean one streamed page and feed it to the chunker
+        
+        Regex cleaning and tokenizing are CPU-bound, so callers run this in
+        a worker thread, one page at a time, to keep the event loop free.
+        
+        Returns:
+            Characters of cleaned text, and the (start, end, chunk) tuples completed
+        """
+        page_text = self.extractor.clean_text(page_text)
+        return len(page_text), chunker.feed(page_text)
+    
+    @staticmethod
+    def _batch_error(error: BaseException) -> Exception:
+        """Keep a batch item's error, re-raising cancellation"""
+        if not isinstance(error, Exception):
+            raise error
+        return error
+    
+    async def _chunk_and_embed(
+        self, pages: AsyncIterator[str]
+    ) -> Tuple[List[str], List[Span], List[asyncio.Task], int]:
+        """
+        Chunk streamed pages and start an embedding task per full batch
+        
+        Returns:
+            All chunks, their spans in the page stream, the embedding tasks
+            in chunk order, and the number of cleaned text characters seen
+        """
+        chunker = self.embedder.chunker(self.chunk_tokens, self.chunk_overlap_tokens)
+        chunks: List[str] = []
+        spans: List[Span] = []
+        tasks: List[asyncio.Task] = []
+        pending: List[str] = []
+        text_chars = 0
+        
+        def submit(batch: List[str]):
+            tasks.append(asyncio.create_task(self.embedder.embed_batch(batch)))
+        
+        try:
+            async for page_text in pages:
+                chars, page_chunks = await asyncio.to_thread(self._clean_and_chunk, chunker, page_text)
+                text_chars += chars
+                for start, end, chunk in page_chunks:
+                    chunks.append(chunk)
+                    spans.append((start, end))
+                    pending.append(chunk)
+                    if len(pending) >= self.stream_batch_chunks:
+                        submit(pending)
+                        pending = []
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
+        
+        for start, end, chunk in await asyncio.to_thread(chunker.finish):
+            chunks.append(chunk)
+            spans.append((start, end))
+            pending.append(chunk)
+        if pending:
+            submit(pending)
+        
+        return chunks, spans, tasks, text_chars
+    
+    def _build_context(
+        self, queries: List[str], query_embeddings: List[List[float]], document_id: str
+    ) -> Tuple[List[str], int]:
+        """
+        Context passages for the prompt, and the tokens they use
+        
+        Every query (the request's own and its facets) is searched in one
+        matrix search and, with a lexical weight, in the document's BM25
+        index, each query's two rankings fused into one. The hits of all
+        queries are interleaved by rank, so each facet is represented near
+        the top, and deduplicated; the assembler then keeps the best within
+        the token budget, merging chunks that overlap in the document into
+        single passages in reading order.
+        """
+        hit_lists = self.vector_store.search_ids_many(
+            query_embeddings, top_k=self.context_candidates, namespace=document_id
+        )
+        if self.lexical_weight > 0:
+            lexical_lists = self.vector_store.search_lexical(
+                queries, top_k=self.context_candidates, namespace=document_id
+            )
+            hit_lists = [
+                fuse_scores(hits, lexical_hits, self.lexical_weight)
+                for hits, lexical_hits in zip(hit_lists, lexical_lists)
+            ]
+        candidates = []
+        for vector_id, score in self._interleave(hit_lists, self.context_candidates):
+            text = self.vector_store.get_text(vector_id)
+            if text is not None:
+                candidates.append((text, self.vector_store.get_span(vector_id), score))
+        
+        passages, tokens = self.context.assemble(candidates)
+        print(f"   Packed {len(candidates)} candidates into {len(passages)} passages ({tokens} tokens)")
+        return passages, tokens
+    
+    @staticmethod
+    def _interleave(hit_lists: List[List[Tuple[int, float]]], limit: int) -> List[Tuple[int, float]]:
+        """Round-robin merge of per-query hits, first query first, without repeats"""
+        merged: Dict[int, float] = {}
+        for rank in range(max(map(len, hit_lists), default=0)):
+            for hits in hit_lists:
+                if rank < len(hits) and hits[rank][0] not in merged:
+                    merged[hits[rank][0]] = hits[rank][1]
+                    if len(merged) == limit:
+                        return list(merged.items())
+        return list(merged.items())
+    
+    def _queries(self, request: AnalyzeRequest) -> List[str]:
+        """Retrieval queries for a request: its own query and its facets"""
+        return facet_queries(
+            request.query, request.analysis_type, request.focus_area, self.retrieval_queries
+        )
+    
+    def _ingest_lock(self, document_id: str) -> asyncio.Lock:
+        """Per-document lock so identical concurrent uploads are ingested once"""
+        lock = self._ingest_locks.get(document_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._ingest_locks[document_id] = lock
+        return lock
+    
+    def _maybe_compact(self):
+        """Fold the write-ahead log into a new index generation in the background"""
+        if self._compaction is not None and not self._compaction.done():
+            return
+        if self.vector_store.needs_compaction():
+            self._compaction = asyncio.create_task(self._compact())
+    
+    async def _compact(self):
+        """Save the vector store without blocking the event loop"""
+        print(f" Compacting vector store...")
+        try:
+            await asyncio.to_thread(self.vector_store.save)
+        except Exception as e:
+            print(f" Vector store compaction failed: {e}")
+    
+    def _result_cache_key(self, document_id: str, request: AnalyzeRequest) -> str:
+        """
+        Cache key for a finished analysis
+        
+        Combines the document fingerprint with every parameter that can
+        change the answer: the request options, the models, the prompt
+        version and the retrieval configuration.
+        """
+        parts = [
+            document_id,
+            request.analysis_type,
+            request.focus_area,
+            request.query or "",
+            "\x01".join(self._queries(request)),
+            self.analyzer.model,
+            self.analyzer.prompt_version,
+            self.embedder.model,
+            str(self.embedder.dimension),
+            f"{self.chunk_tokens}t/{self.chunk_overlap_tokens}t/{self.context_candidates}/{self.context_token_budget}t",
+            f"lexical={self.lexical_weight}",
+        ]
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+    
     def get_stats(self) -> dict:
         """Get pipeline statistics"""
         return {
             "vector_store": self.vector_store.get_stats(),
+            "embedding_backend": self.embedder.backend.name,
             "embedding_model": self.embedder.model,
+            "embedding_cache": self.embedder.get_stats(),
             "llm_model": self.analyzer.model,
+            "result_cache": self.result_cache.get_stats(),
+            "http_cache": self.extractor.fetcher.get_stats(),
             "chunk_config": {
-                "size": self.chunk_size,
-                "overlap": self.chunk_overlap
+                "tokens": self.chunk_tokens,
+                "overlap_tokens": self.chunk_overlap_tokens
+            },
+            "context_config": {
+                "candidates": self.context_candidates,
+                "max_queries": self.retrieval_queries,
+                "lexical_weight": self.lexical_weight,
+                "token_budget": self.context_token_budget
             }
         }
\ No newline at end of file
@@ -0,0 +1,332 @@
+import os
+import json
+import time
+import secrets
+import bisect
+import threading
+import contextlib
+import contextvars
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels, in the Prometheus data model"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {value:g}" for key, value in items]
+
+
+class Histogram:
+    """Histogram with fixed upper bounds and labels, in the Prometheus data model"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = sorted(buckets)
+        # Per label set: count per bucket (last one +Inf), sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + [float("inf")], counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labels, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """The process's metrics, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, documentation: str, buckets: Sequence[float], labels: Sequence[str] = ()
+    ) -> Histogram:
+        metric = Histogram(name, documentation, buckets, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "finsight_stage_seconds",
+    "Duration of each analysis pipeline stage",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    labels=("stage",),
+)
+ANALYSIS_SECONDS = REGISTRY.histogram(
+    "finsight_analysis_seconds",
+    "End-to-end duration of single-document analyses",
+    (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+    labels=("outcome",),
+)
+DOCUMENT_CHARS = REGISTRY.histogram(
+    "finsight_document_chars",
+    "Characters of cleaned text per analysed document",
+    (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7),
+)
+DOCUMENT_CHUNKS = REGISTRY.histogram(
+    "finsight_document_chunks",
+    "Chunks per newly indexed document",
+    (1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+EMBEDDING_TOKENS = REGISTRY.counter(
+    "finsight_embedding_tokens_total",
+    "Embedding input tokens billed, from the API usage field",
+    labels=("model",),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "finsight_llm_tokens_total",
+    "LLM tokens billed, from the API usage field",
+    labels=("model", "kind"),
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "finsight_cache_lookups_total",
+    "Cache lookups by cache (result, embedding, query) and outcome (hit, miss)",
+    labels=("cache", "outcome"),
+)
+
+
+def observe_stage(stage: str, seconds: float, data: dict):
+    """Record a finished pipeline stage in the metrics and as a span"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if "chars" in data:
+        DOCUMENT_CHARS.observe(data["chars"])
+    if stage == "chunked" and "chunks" in data:
+        DOCUMENT_CHUNKS.observe(data["chunks"])
+    tracer.record(f"stage.{stage}", seconds, **data)
+
+
+def record_llm_usage(model: str, usage):
+    """Count the tokens an LLM response's usage field reports, if any"""
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, kind="prompt")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, kind="completion")
+
+
+class Span:
+    """
+    A timed operation in a trace, with the fields of an OpenTelemetry span
+
+    Exported as one OTLP/JSON-shaped object per line (traceId, spanId,
+    parentSpanId, name, start/end in Unix nanoseconds, attributes and
+    status), or mirrored to the OpenTelemetry API.
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: dict, start_ns: int):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes)
+        self.start_ns = start_ns
+        self.error: Optional[str] = None
+        self.otel = tracer._start_otel(self, parent)
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_error(self, message: str):
+        self.error = message
+
+    def end(self, end_ns: Optional[int] = None):
+        self.tracer._export(self, end_ns or time.time_ns())
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is off"""
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def set_error(self, message: str):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    """
+    Timed spans around pipeline work, nested through a context variable
+
+    TRACING selects where spans go:
+
+    - off (default): nowhere, at no cost beyond a flag check
+    - file: one JSON line per finished span, appended to TRACE_FILE
+    - otel: through the OpenTelemetry API, to whatever SDK and exporter
+      the process configured (e.g. OTLP to a local collector via
+      opentelemetry-instrument); needs the opentelemetry packages
+    """
+
+    def __init__(self, mode: Optional[str] = None, path: Optional[str] = None):
+        self.mode = (mode or os.getenv("TRACING", "off")).lower()
+        if self.mode not in ("off", "file", "otel"):
+            raise ValueError(f"Unsupported tracing mode: {self.mode}")
+        self.path = path or os.getenv("TRACE_FILE", "./data/traces.jsonl")
+        self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+        self._file = None
+        self._lock = threading.Lock()
+        self._otel_tracer = None
+        if self.mode == "otel":
+            from opentelemetry import trace
+            self._otel_tracer = trace.get_tracer("finsight")
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes) -> Iterator:
+        """Time the enclosed block as a child of the current span"""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        span = Span(self, name, self._current.get(), attributes, time.time_ns())
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self._current.reset(token)
+            span.end()
+
+    def record(self, name: str, seconds: float, **attributes):
+        """Record a span that ended now and lasted seconds, as a child of the current span"""
+        if not self.enabled:
+            return
+        end_ns = time.time_ns()
+        Span(self, name, self._current.get(), attributes, end_ns - int(seconds * 1e9)).end(end_ns)
+
+    def _start_otel(self, span: Span, parent: Optional[Span]):
+        if self._otel_tracer is None:
+            return None
+        from opentelemetry import trace
+        context = trace.set_span_in_context(parent.otel) if parent is not None and parent.otel is not None else None
+        return self._otel_tracer.start_span(
+            span.name, context=context, start_time=span.start_ns,
+            attributes={key: value if isinstance(value, (bool, int, float)) else str(value)
+                        for key, value in span.attributes.items() if value is not None},
+        )
+
+    def _export(self, span: Span, end_ns: int):
+        if span.otel is not None:
+            from opentelemetry.trace import Status, StatusCode
+            for key, value in span.attributes.items():
+                if value is not None:
+                    span.otel.set_attribute(key, value if isinstance(value, (bool, int, float)) else str(value))
+            if span.error is not None:
+                span.otel.set_status(Status(StatusCode.ERROR, span.error))
+            span.otel.end(end_time=end_ns)
+            return
+
+        record = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id or "",
+            "name": span.name,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in span.attributes.items()
+                if value is not None
+            ],
+            "status": {"code": 2, "message": span.error} if span.error is not None else {"code": 1},
+        }
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", buffering=1)
+            self._file.write(line)
+
+
+tracer = Tracer()
+
+
+def span(name: str, **attributes):
+    """Shorthand for tracer.span()"""
+    return tracer.span(name, **attributes)
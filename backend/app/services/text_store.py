@@ -0,0 +1,72 @@
+import os
+import mmap
+from typing import Iterable, Optional
+
+import numpy as np
+
+BLOB_FILE = "texts.bin"
+OFFSETS_FILE = "offsets.npy"
+PRESENT_FILE = "present.npy"
+
+
+class MappedTextStore:
+    """
+    Read-only columnar text store backed by memory-mapped files
+
+    All texts are concatenated into one UTF-8 blob; an int64 offsets array
+    (n + 1 entries) marks where each one starts and ends, and a uint8 array
+    flags entries that were deleted. Opening the store maps the files
+    without reading them, so it costs the same for ten texts or ten
+    million, and pages are shared between every process that opens them.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode="r")
+        self.present = np.load(os.path.join(directory, PRESENT_FILE), mmap_mode="r")
+
+        self._file = open(os.path.join(directory, BLOB_FILE), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, position: int) -> Optional[str]:
+        """Text at position, or None if it was deleted"""
+        if not self.present[position]:
+            return None
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return self._blob[start:end].decode("utf-8")
+
+    def close(self):
+        """Release the memory maps"""
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
+
+    @staticmethod
+    def write(directory: str, texts: Iterable[Optional[str]]) -> int:
+        """
+        Write texts (None marks a deleted entry) as a new store
+
+        Texts are streamed to the blob, so only the offsets are held in memory.
+
+        Returns:
+            Number of entries written
+        """
+        offsets = [0]
+        present = []
+        with open(os.path.join(directory, BLOB_FILE), "wb") as blob:
+            for text in texts:
+                data = text.encode("utf-8") if text is not None else b""
+                blob.write(data)
+                offsets.append(offsets[-1] + len(data))
+                present.append(text is not None)
+            blob.flush()
+            os.fsync(blob.fileno())
+
+        np.save(os.path.join(directory, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+        np.save(os.path.join(directory, PRESENT_FILE), np.asarray(present, dtype=np.uint8))
+        return len(present)
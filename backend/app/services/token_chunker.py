@@ -0,0 +1,202 @@
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+Span = Tuple[int, int]
+
+# Stand-in tokenizer when tiktoken cannot load: a word piece of up to four
+# characters or one symbol, with its leading whitespace (about cl100k's rate)
+_ESTIMATE_TOKEN = re.compile(r"\s*(?:\w{1,4}|[^\w\s])")
+# Sentence ends; a chunk may close on the first token after one
+_SENTENCE_END = re.compile(r"[.?!](?=\s)")
+
+
+def load_encoding(model: str):
+    """tiktoken encoding for the model, or None to fall back to an estimate"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use
+        print(f"tiktoken unavailable ({e}); estimating token counts")
+        return None
+
+
+def token_starts(text: str, encoding=None) -> np.ndarray:
+    """
+    Character offset at which each token of text starts
+
+    With a tiktoken encoding the offsets come from the byte length of each
+    token, mapped back to characters in one vectorized pass; a token that
+    begins mid-character is attributed to that character.
+    """
+    if encoding is None:
+        return np.fromiter(
+            (match.start() for match in _ESTIMATE_TOKEN.finditer(text)), dtype=np.int64
+        )
+
+    tokens = encoding.encode_ordinary(text)
+    if not tokens:
+        return np.zeros(0, dtype=np.int64)
+    pieces = encoding.decode_tokens_bytes(tokens)
+    data = np.frombuffer(b"".join(pieces), dtype=np.uint8)
+    byte_starts = np.zeros(len(pieces), dtype=np.int64)
+    np.cumsum([len(piece) for piece in pieces[:-1]], out=byte_starts[1:])
+
+    # Every byte that is not a UTF-8 continuation byte begins a character
+    continuation = (data & 0xC0) == 0x80
+    chars_before = np.cumsum(~continuation) - (~continuation)
+    return chars_before[byte_starts] - continuation[byte_starts]
+
+
+class TokenChunker:
+    """
+    Overlapping chunker measured in tokens, producing spans instead of copies
+
+    Chunks hold at most chunk_tokens tokens and start overlap_tokens
+    before the previous chunk's end, always at least one token further
+    on, so the loop terminates whatever the settings. A chunk closes on a
+    sentence end when one falls in its second half. Chunks are returned
+    as (start, end) character offsets into the source with surrounding
+    whitespace trimmed; each document is tokenized once and each chunk
+    costs a binary search, so long documents chunk in linear time.
+
+    Text can also be fed a piece at a time (e.g. PDF pages, joined by
+    single spaces); only the unfinished tail is kept between pieces.
+    """
+
+    def __init__(self, chunk_tokens: int = 256, overlap_tokens: int = 32, encoding=None):
+        """
+        Args:
+            chunk_tokens: Maximum tokens per chunk
+            overlap_tokens: Tokens shared with the previous chunk
+            encoding: tiktoken encoding (None estimates token boundaries)
+        """
+        if chunk_tokens < 1:
+            raise ValueError("chunk_tokens must be at least 1")
+        if not 0 <= overlap_tokens < chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.encoding = encoding
+
+        # Streaming state: unfinished text, its token starts and its offset in the stream
+        self._buffer = ""
+        self._starts = np.zeros(0, dtype=np.int64)
+        self._offset = 0
+        self._last_end = 0
+
+    def spans(self, text: str) -> List[Span]:
+        """(start, end) character offsets of every chunk of text"""
+        spans, _, _ = self._plan(text, token_starts(text, self.encoding), 0, final=True)
+        return spans
+
+    def chunks(self, text: str) -> List[str]:
+        """Chunk texts, for callers that need the strings"""
+        return [text[start:end] for start, end in self.spans(text)]
+
+    def feed(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Append a piece of a stream and return every chunk now complete
+
+        Returns:
+            (start, end, text) per chunk, offsets relative to the whole stream
+        """
+        if not text:
+            return []
+        starts = token_starts(text, self.encoding)
+        if self._buffer:
+            starts += len(self._buffer) + 1
+            self._buffer = f"{self._buffer} {text}"
+            self._starts = np.concatenate([self._starts, starts])
+        else:
+            self._buffer = text
+            self._starts = starts
+        return self._drain(final=False)
+
+    def finish(self) -> List[Tuple[int, int, str]]:
+        """Return the remaining chunks of the stream and reset"""
+        chunks = self._drain(final=True)
+        self._buffer = ""
+        self._starts = np.zeros(0, dtype=np.int64)
+        self._offset = 0
+        self._last_end = 0
+        return chunks
+
+    def _drain(self, final: bool) -> List[Tuple[int, int, str]]:
+        spans, next_token, last_end = self._plan(self._buffer, self._starts, self._last_end, final)
+        chunks = [
+            (self._offset + start, self._offset + end, self._buffer[start:end])
+            for start, end in spans
+        ]
+        if next_token < len(self._starts):
+            # Keep only the text from the next chunk's first token onwards
+            cut = int(self._starts[next_token])
+            self._buffer = self._buffer[cut:]
+            self._starts = self._starts[next_token:] - cut
+            self._offset += cut
+            self._last_end = max(0, last_end - next_token)
+        else:
+            self._offset += len(self._buffer)
+            self._buffer = ""
+            self._starts = self._starts[:0]
+            self._last_end = 0
+        return chunks
+
+    def _plan(
+        self, text: str, starts: np.ndarray, last_end: int, final: bool
+    ) -> Tuple[List[Span], int, int]:
+        """
+        Chunk spans over tokenized text
+
+        Every chunk ends past last_end, the end token of the chunk before.
+        Unless final, a chunk is only emitted once a token exists beyond
+        its end. Returns the spans, the first token of the next chunk and
+        the end token of the last chunk.
+        """
+        count = len(starts)
+        # Token indices a chunk may end before: the first token after a sentence end
+        breaks = np.unique(np.searchsorted(
+            starts,
+            np.fromiter((m.end() for m in _SENTENCE_END.finditer(text)), dtype=np.int64),
+        ))
+        half = self.chunk_tokens // 2
+
+        spans: List[Span] = []
+        first = 0
+        while first < count:
+            last = first + self.chunk_tokens
+            if last >= count:
+                if not final:
+                    break
+                last = count
+            else:
+                i = np.searchsorted(breaks, last, side="right") - 1
+                if i >= 0 and breaks[i] > max(first + half, last_end):
+                    last = int(breaks[i])
+
+            span = self._trim(text, int(starts[first]), int(starts[last]) if last < count else len(text))
+            # Skip a chunk that adds nothing but whitespace to the one before
+            if span is not None and (not spans or span[1] > spans[-1][1]):
+                spans.append(span)
+            last_end = last
+            if last >= count:
+                return spans, count, last_end
+            first = max(last - self.overlap_tokens, first + 1)
+        return spans, first, last_end
+
+    @staticmethod
+    def _trim(text: str, start: int, end: int) -> Optional[Span]:
+        """Span without surrounding whitespace, None if nothing is left"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return (start, end) if end > start else None
@@ -1,117 +1,924 @@
 import os
+import json
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 import numpy as np
 import faiss
-from typing import List, Tuple
-import pickle
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.lexical_index import BM25Index
+from app.services.text_store import MappedTextStore
+from app.services.vector_wal import WriteAheadLog, OP_ADD
+
+DEFAULT_NAMESPACE = "default"
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+
+# On-disk layout; bump FORMAT_VERSION whenever the files below change incompatibly
+FORMAT_NAME = "finsight-vector-store"
+FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+STAGING_FILE = "staging.faiss"
+NAMESPACES_FILE = "namespaces.json"
+NAMESPACE_IDS_FILE = "namespace_ids.npy"
+SPANS_FILE = "spans.npy"  # (start, end) of each chunk in its document, -1 if unknown
+EMPTY_GENERATION = "v-000000"  # Names the write-ahead log of a store never saved
+
+class _ReadWriteLock:
+    """
+    Any number of readers or one writer; a waiting writer holds off new readers
+    
+    FAISS indexes can serve concurrent searches, but not a search while
+    vectors are added, trained on or moved between indexes.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+    
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+    
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+class _Generation:
+    """
+    Index, texts and namespaces of one opened generation
+    
+    The store swaps in a whole new object when it opens a generation, so a
+    search that took the current one sees a consistent index, ID range and
+    namespace map for its entire run. Fields are never reassigned once the
+    object is visible; a change to one (draining staging, counting
+    tombstones) swaps in a copy. Adds and removes still grow and edit the
+    shared containers in place, under the store lock.
+    """
+    
+    __slots__ = (
+        "index_type", "index", "index_mutable", "staging", "base_texts", "base_count",
+        "texts", "base_spans", "spans", "removed_base", "namespaces", "tombstones",
+    )
+    
+    def __init__(
+        self,
+        index_type: str,
+        index,
+        staging,
+        index_mutable: bool = True,
+        base_texts: Optional[MappedTextStore] = None,
+        base_spans: Optional[np.ndarray] = None,
+        namespaces: Optional[Dict[str, np.ndarray]] = None,
+        tombstones: int = 0,
+    ):
+        self.index_type = index_type
+        self.index = index
+        self.staging = staging
+        self.index_mutable = index_mutable  # False while the main index is a read-only memory map
+        self.base_texts = base_texts  # Texts of the saved IDs [0, base_count)
+        self.base_count = len(base_texts) if base_texts is not None else 0
+        self.texts: List[Optional[str]] = []  # Texts added since the last save, ID - base_count
+        self.base_spans = base_spans  # Document spans of the saved IDs
+        self.spans: List[Optional[Tuple[int, int]]] = []  # Spans of the texts added since the last save
+        self.removed_base: set = set()  # Saved IDs deleted since the last save
+        self.namespaces = namespaces if namespaces is not None else {}  # Namespace -> vector IDs
+        self.tombstones = tombstones  # Removed vectors still present in the index
+    
+    def replace(self, **changes) -> "_Generation":
+        """Copy sharing every container, with the given fields replaced"""
+        copy = object.__new__(_Generation)
+        for field in self.__slots__:
+            setattr(copy, field, changes[field] if field in changes else getattr(self, field))
+        return copy
+    
+    @property
+    def next_id(self) -> int:
+        return self.base_count + len(self.texts)
+    
+    def get_text(self, vector_id: int) -> Optional[str]:
+        if vector_id < self.base_count:
+            if vector_id in self.removed_base:
+                return None
+            return self.base_texts.get(vector_id)
+        return self.texts[vector_id - self.base_count]
+    
+    def get_span(self, vector_id: int) -> Optional[Tuple[int, int]]:
+        if vector_id < self.base_count:
+            if self.base_spans is None or self.base_spans[vector_id][0] < 0:
+                return None
+            start, end = self.base_spans[vector_id]
+            return int(start), int(end)
+        return self.spans[vector_id - self.base_count]
+    
+    def is_live(self, vector_id: int) -> bool:
+        if vector_id < self.base_count:
+            return vector_id not in self.removed_base and bool(self.base_texts.present[vector_id])
+        return self.texts[vector_id - self.base_count] is not None
 
 class VectorStore:
-    """FAISS-based vector store for semantic search"""
+    """
+    FAISS-based vector store for semantic search
+    
+    Every vector carries a stable integer ID and belongs to a namespace
+    (typically one per document). Searches can be restricted to a namespace
+    with an ID selector, so concurrent requests never see each other's
+    chunks and no request has to clear the shared index.
+    
+    Vectors are L2-normalised and compared by inner product, i.e. cosine
+    similarity, which matches how OpenAI embeddings are meant to be used.
+    The index structure is configurable:
+    
+    - flat:  exact brute-force search (default, best for small corpora)
+    - hnsw:  graph-based ANN, tuned with efSearch
+    - ivfpq: inverted lists with product quantization, tuned with nprobe.
+             Needs training; vectors wait in a flat staging index until
+             enough have arrived to train on.
+    
+    IDs are assigned sequentially and equal the vector's position: the main
+    index holds IDs [0, N) and the staging index holds the newer suffix.
+    Saved stores are opened memory-mapped and read-only, so loading costs
+    the same for any corpus size and the pages are shared between worker
+    processes; vectors added afterwards are staged until the next save()
+    folds them into a new on-disk generation. Deleted vectors are
+    tombstoned rather than physically removed, which keeps IDs and
+    positions aligned. A vector may also record the character span its
+    text covers in the source document, so neighbouring chunks can be
+    merged when a prompt is assembled.
+    
+    Once load() has attached a store name, every add and removal is first
+    appended to a write-ahead log next to the current generation, so a
+    restart replays it and nothing acknowledged is lost. Writes cost what
+    the new vectors cost; save() compacts the log into a new generation
+    once it grows past VECTOR_WAL_COMPACT_MB.
+    """
     
-    def __init__(self, dimension: int = 1536):
+    def __init__(self, dimension: int = 1536, index_type: Optional[str] = None):
         """
         Initialize vector store
         
         Args:
             dimension: Embedding dimension (1536 for text-embedding-3-small)
+            index_type: 'flat', 'hnsw' or 'ivfpq' (default: VECTOR_INDEX_TYPE)
         """
         self.dimension = dimension
-        self.index = faiss.IndexFlatL2(dimension)  # L2 distance
-        self.texts: List[str] = []  # Store original texts
+        self.index_type = (index_type or os.getenv("VECTOR_INDEX_TYPE", "flat")).lower()
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {self.index_type}")
+        
+        # Index build and search parameters
+        self.hnsw_m = int(os.getenv("HNSW_M", "32"))
+        self.hnsw_ef_construction = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+        self.ef_search = int(os.getenv("HNSW_EF_SEARCH", "64"))
+        self.ivf_nlist = int(os.getenv("IVF_NLIST", "1024"))
+        self.pq_m = int(os.getenv("PQ_M", "64"))
+        self.pq_nbits = int(os.getenv("PQ_NBITS", "8"))
+        self.nprobe = int(os.getenv("IVF_NPROBE", "16"))
+        self.train_size = int(os.getenv("IVF_TRAIN_SIZE", str(self.ivf_nlist * 39)))
+        # Namespaces this small are scanned exactly instead of through the ANN structure
+        self.exact_search_threshold = int(os.getenv("EXACT_SEARCH_THRESHOLD", "4096"))
+        # BM25 indexes of recently searched namespaces, built from their texts on demand
+        self.lexical_cache_size = int(os.getenv("LEXICAL_INDEX_CACHE", "32"))
+        self._lexical: "OrderedDict[str, BM25Index]" = OrderedDict()
+        # Flat scans switch to one blocked matrix product (BLAS) once queries x
+        # dimension reaches this global; FAISS defaults to 128000, so a handful
+        # of facet queries would each rescan the index. From two queries on,
+        # the matrix product reads the vectors once for all of them.
+        faiss.cvar.distance_compute_blas_threshold = min(
+            faiss.cvar.distance_compute_blas_threshold, 2 * dimension
+        )
+        
+        # Replaced as a whole, never field by field; readers take it once
+        self._state = self._empty_generation(self.index_type)
+        # Re-entrant so save() can reopen the new generation without releasing it
+        self._lock = threading.RLock()
+        # Searches share the FAISS indexes; writers to them (lock held) exclude searches
+        self._index_lock = _ReadWriteLock()
         self.index_path = os.getenv("FAISS_INDEX_PATH", "./data/faiss_index")
         
+        # Write-ahead log, attached by load()
+        self.name: Optional[str] = None
+        self.wal: Optional[WriteAheadLog] = None
+        self.wal_enabled = os.getenv("VECTOR_WAL_ENABLED", "true").lower() == "true"
+        self.wal_fsync = os.getenv("VECTOR_WAL_FSYNC", "true").lower() == "true"
+        self.compact_bytes = int(float(os.getenv("VECTOR_WAL_COMPACT_MB", "64")) * 1024 * 1024)
+        
         # Create directory if doesn't exist (Windows-safe)
         if not os.path.exists(self.index_path):
             os.makedirs(self.index_path)
     
-    def add_vectors(self, embeddings: List[List[float]], texts: List[str]):
+    @property
+    def next_id(self) -> int:
+        """ID the next added vector receives"""
+        return self._state.next_id
+    
+    def _new_index(self, index_type: str):
+        """Empty index of the given type (inner product); labels are positions"""
+        if index_type == "hnsw":
+            index = faiss.index_factory(self.dimension, f"HNSW{self.hnsw_m}", faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.hnsw_ef_construction
+            return index
+        if index_type == "ivfpq":
+            return faiss.index_factory(
+                self.dimension,
+                f"IVF{self.ivf_nlist},PQ{self.pq_m}x{self.pq_nbits}",
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        return faiss.IndexFlatIP(self.dimension)
+    
+    def _empty_generation(self, index_type: str) -> _Generation:
+        return _Generation(index_type, self._new_index(index_type), self._new_staging_index())
+    
+    def _new_staging_index(self):
+        """Flat index holding vectors not yet in the main index"""
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self.dimension))
+    
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        """float32 copy of vectors scaled to unit length"""
+        vectors = np.array(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        faiss.normalize_L2(vectors)
+        return vectors
+    
+    def get_text(self, vector_id: int) -> Optional[str]:
+        """Text stored for a vector ID, or None if it was removed"""
+        return self._state.get_text(vector_id)
+    
+    def get_span(self, vector_id: int) -> Optional[Tuple[int, int]]:
+        """(start, end) of a vector's text within its document, if it was recorded"""
+        return self._state.get_span(vector_id)
+    
+    def add_vectors(
+        self,
+        embeddings: List[List[float]],
+        texts: List[str],
+        namespace: str = DEFAULT_NAMESPACE,
+        spans: Optional[Sequence[Tuple[int, int]]] = None,
+    ) -> List[int]:
         """
         Add vectors to the index
         
         Args:
-            embeddings: List of embedding vectors
+            embeddings: List of embedding vectors (or a 2-D numpy array)
             texts: Corresponding text chunks
+            namespace: Namespace (e.g. document fingerprint) the vectors belong to
+            spans: (start, end) character offsets of each text in its document
+        
+        Returns:
+            IDs assigned to the new vectors
         """
         if len(embeddings) != len(texts):
             raise ValueError("Number of embeddings must match number of texts")
+        if spans is not None and len(spans) != len(texts):
+            raise ValueError("Number of spans must match number of texts")
         
-        # Convert to numpy array
-        vectors = np.array(embeddings, dtype=np.float32)
+        # Convert to unit-length float32 matrix
+        vectors = self._normalize(embeddings)
+        spans = [(int(start), int(end)) for start, end in spans] if spans is not None else None
+        
+        with self._lock:
+            # Durable before it becomes visible; taken back out if it cannot be applied
+            if self.wal is not None:
+                metadata = {"namespace": namespace}
+                if spans is not None:
+                    metadata["spans"] = spans
+                self.wal.append_add(self.next_id, vectors, texts, metadata)
+            try:
+                ids = self._apply_add(vectors, texts, namespace, spans)
+            except Exception:
+                if self.wal is not None:
+                    self.wal.undo_last()
+                raise
+        
+        return ids.tolist()
+    
+    def _apply_add(
+        self,
+        vectors: np.ndarray,
+        texts: List[str],
+        namespace: str,
+        spans: Optional[Sequence[Tuple[int, int]]] = None,
+    ) -> np.ndarray:
+        """Assign IDs and store normalised vectors with their texts (lock held)"""
+        start = self.next_id
+        ids = np.arange(start, start + len(texts), dtype=np.int64)
         
         # Add to FAISS index
-        self.index.add(vectors)
+        self._insert(vectors, ids)
         
         # Store texts
-        self.texts.extend(texts)
+        state = self._state
+        state.texts.extend(texts)
+        state.spans.extend([tuple(span) for span in spans] if spans is not None else [None] * len(texts))
+        
+        existing = state.namespaces.get(namespace)
+        state.namespaces[namespace] = ids if existing is None else np.concatenate([existing, ids])
+        self._lexical.pop(namespace, None)
+        return ids
+    
+    def _insert(self, vectors: np.ndarray, ids: np.ndarray):
+        """Add normalised vectors to the main index, or stage them if it cannot take them"""
+        with self._index_lock.write():
+            state = self._state
+            if state.index_mutable and state.index.is_trained and state.staging.ntotal == 0:
+                state.index.add(vectors)
+                return
+            
+            state.staging.add_with_ids(vectors, ids)
+            if not state.index.is_trained and state.staging.ntotal >= self.train_size:
+                self._train_from_staging()
+    
+    def train(self, sample) -> bool:
+        """
+        Train the index on a representative sample of embeddings
+        
+        Only IVF-PQ needs training; flat and HNSW indexes ignore this.
+        Staged vectors are moved into the trained index.
+        
+        Returns:
+            True if the index is trained afterwards
+        """
+        with self._lock, self._index_lock.write():
+            index = self._state.index
+            if not index.is_trained:
+                index.train(self._normalize(sample))
+                self._drain_staging()
+            return index.is_trained
     
-    def search(self, query_embedding: List[float], top_k: int = 5) -> List[Tuple[str, float]]:
+    def _train_from_staging(self):
+        """Train on the staged vectors and move them into the main index (write lock held)"""
+        state = self._state
+        vectors = state.staging.index.reconstruct_n(0, state.staging.ntotal)
+        print(f"Training {state.index_type} index on {len(vectors)} vectors...")
+        state.index.train(vectors)
+        self._drain_staging()
+    
+    def _drain_staging(self):
+        """Move staged vectors into the (trained, in-memory) main index (write lock held)"""
+        state = self._state
+        if state.index_type == "ivfpq":
+            # Lets IVF reconstruct vectors by position for exact namespace scans
+            faiss.extract_index_ivf(state.index).make_direct_map()
+        if state.staging.ntotal == 0:
+            return
+        # Staged IDs are exactly [index.ntotal, next_id), in insertion order
+        state.index.add(state.staging.index.reconstruct_n(0, state.staging.ntotal))
+        self._state = state.replace(staging=self._new_staging_index())
+    
+    def has_namespace(self, namespace: str) -> bool:
+        """Whether any vectors are stored under namespace"""
+        return namespace in self._state.namespaces
+    
+    def remove_namespace(self, namespace: str) -> int:
+        """
+        Delete every vector stored under namespace
+        
+        The vectors stay behind as tombstones so IDs keep matching index
+        positions (and the memory-mapped base never has to be written):
+        their texts are released and they never appear in results.
+        
+        Returns:
+            Number of vectors removed
+        """
+        with self._lock:
+            if namespace not in self._state.namespaces:
+                return 0
+            if self.wal is not None:
+                self.wal.append_remove({"namespace": namespace})
+            return self._apply_remove(namespace)
+    
+    def _apply_remove(self, namespace: str) -> int:
+        """Tombstone the vectors of namespace (lock held)"""
+        self._lexical.pop(namespace, None)
+        state = self._state
+        ids = state.namespaces.pop(namespace, None)
+        if ids is None:
+            return 0
+        for vector_id in ids.tolist():
+            if vector_id < state.base_count:
+                state.removed_base.add(vector_id)
+            else:
+                state.texts[vector_id - state.base_count] = None
+                state.spans[vector_id - state.base_count] = None
+        self._state = state.replace(tombstones=state.tombstones + len(ids))
+        return len(ids)
+    
+    @staticmethod
+    def _selector(ids: np.ndarray):
+        """ID selector matching exactly the given (sorted) IDs"""
+        if ids[-1] - ids[0] + 1 == len(ids):
+            # Contiguous IDs (one add_vectors call): cheap range check
+            return faiss.IDSelectorRange(int(ids[0]), int(ids[-1]) + 1)
+        return faiss.IDSelectorBatch(np.ascontiguousarray(ids))
+    
+    def _search_params(
+        self, index_type: str, selector=None, ef_search: Optional[int] = None, nprobe: Optional[int] = None
+    ):
+        """Per-query search parameters for an index type"""
+        if index_type == "hnsw":
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search or self.ef_search)
+        if index_type == "ivfpq":
+            return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe or self.nprobe)
+        return faiss.SearchParameters(sel=selector)
+    
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        namespace: Optional[str] = None,
+        ef_search: Optional[int] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
         """
         Search for similar vectors
         
         Args:
             query_embedding: Query vector
             top_k: Number of results to return
-            
+            namespace: Restrict the search to this namespace (None searches everything)
+            ef_search: HNSW search breadth override
+            nprobe: IVF lists-to-visit override
+        
+        Returns:
+            List of (text, cosine similarity) tuples, most similar first
+        """
+        hits = self.search_ids(query_embedding, top_k, namespace, ef_search, nprobe)
+        results = []
+        for vector_id, score in hits:
+            text = self.get_text(vector_id)
+            if text is not None:
+                results.append((text, score))
+        return results
+    
+    def search_ids(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        namespace: Optional[str] = None,
+        ef_search: Optional[int] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Search for similar vectors, returning their IDs
+        
+        Same arguments as search(); texts and spans are looked up with
+        get_text() and get_span().
+        
+        Returns:
+            List of (vector ID, cosine similarity) tuples, most similar first
+        """
+        return self.search_ids_many([query_embedding], top_k, namespace, ef_search, nprobe)[0]
+    
+    def search_ids_many(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 5,
+        namespace: Optional[str] = None,
+        ef_search: Optional[int] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Search for several query vectors at once
+        
+        All queries go to each index as one matrix in a single search
+        call, which FAISS answers with one blocked matrix product instead
+        of a scan per query. Same other arguments as search().
+        
         Returns:
-            List of (text, distance) tuples
+            Per query, in order, its (vector ID, cosine similarity) tuples
         """
-        if self.index.ntotal == 0:
+        if len(query_embeddings) == 0:
             return []
         
-        # Convert to numpy array
-        query_vector = np.array([query_embedding], dtype=np.float32)
+        # Convert to unit-length numpy array, one row per query
+        query_vectors = self._normalize(query_embeddings)
+        
+        # Shared with other searches, never overlapping an add. The generation
+        # is taken inside: a drain moves vectors from staging into the index.
+        # It stays the same throughout, even if save() swaps in the next one.
+        with self._index_lock.read():
+            return self._search_generation(self._state, query_vectors, top_k, namespace, ef_search, nprobe)
+    
+    def _search_generation(
+        self,
+        state: _Generation,
+        query_vectors: np.ndarray,
+        top_k: int,
+        namespace: Optional[str],
+        ef_search: Optional[int],
+        nprobe: Optional[int],
+    ) -> List[List[Tuple[int, float]]]:
+        """search_ids_many() on one generation (read lock held)"""
+        total = state.index.ntotal + state.staging.ntotal
+        if total == 0:
+            return [[] for _ in query_vectors]
+        
+        # Main index and staging each get the slice of the namespace they hold
+        subsets = (None, None)
+        k = min(top_k, total)
+        # Over-fetch so removed-but-present vectors cannot crowd out real hits
+        fetch = min(k + state.tombstones, total)
+        if namespace is not None:
+            ids = state.namespaces.get(namespace)
+            if ids is None or len(ids) == 0:
+                return [[] for _ in query_vectors]
+            k = min(top_k, len(ids))
+            fetch = k
+            
+            if state.index_type != "flat" and len(ids) <= self.exact_search_threshold:
+                # Filtered ANN search degrades on tiny subsets; scan them exactly
+                return self._exact_search(state, query_vectors, ids, k)
+            
+            # IDs below index.ntotal live in the main index, the rest are staged.
+            # Splitting also keeps range selectors inside the index they are
+            # applied to, which flat indexes require.
+            split = int(np.searchsorted(ids, state.index.ntotal))
+            subsets = (ids[:split], ids[split:])
+        
+        # Search the main index and the vectors staged since the last save
+        hits = [[] for _ in query_vectors]
+        for index, subset in zip((state.index, state.staging), subsets):
+            if index.ntotal == 0 or (subset is not None and len(subset) == 0):
+                continue
+            selector = self._selector(subset) if subset is not None else None
+            if index is state.index:
+                params = self._search_params(state.index_type, selector, ef_search, nprobe)
+            else:
+                params = faiss.SearchParameters(sel=selector)
+            scores, indices = index.search(query_vectors, min(fetch, index.ntotal), params=params)
+            for query_hits, query_scores, query_indices in zip(hits, scores, indices):
+                query_hits.extend(zip(query_scores, query_indices))
+        
+        results = []
+        for query_hits in hits:
+            query_hits.sort(key=lambda hit: hit[0], reverse=True)
+            results.append(self._to_results(state, query_hits, k))
+        return results
+    
+    def search_lexical(self, queries: List[str], top_k: int, namespace: str) -> List[List[Tuple[int, float]]]:
+        """
+        BM25 keyword search within a namespace, for several queries
+        
+        Catches exact terms embeddings blur: tickers, "EBITDA", "Item 1A",
+        "$4.2B". The namespace's inverted index is built from its stored
+        texts on first use and kept for the next searches.
         
-        # Search
-        distances, indices = self.index.search(query_vector, min(top_k, self.index.ntotal))
+        Returns:
+            Per query, in order, its (vector ID, BM25 score) tuples, best first
+        """
+        index = self.lexical_index(namespace)
+        if index is None:
+            return [[] for _ in queries]
+        return [index.search(query, top_k) for query in queries]
+    
+    def lexical_index(self, namespace: str) -> Optional[BM25Index]:
+        """Cached BM25 index of a namespace, built if missing (None for an unknown namespace)"""
+        with self._lock:
+            index = self._lexical.get(namespace)
+            if index is not None:
+                self._lexical.move_to_end(namespace)
+                return index
+            state = self._state
+            ids = state.namespaces.get(namespace)
+        if ids is None:
+            return None
         
-        # Return results
+        # Built without the lock; kept only if the namespace did not change meanwhile
+        live = [(vector_id, state.get_text(vector_id)) for vector_id in ids.tolist()]
+        live = [(vector_id, text) for vector_id, text in live if text is not None]
+        index = BM25Index([vector_id for vector_id, _ in live], [text for _, text in live])
+        with self._lock:
+            if self._state.namespaces.get(namespace) is ids and self.lexical_cache_size > 0:
+                self._lexical[namespace] = index
+                while len(self._lexical) > self.lexical_cache_size:
+                    self._lexical.popitem(last=False)
+        return index
+    
+    def _exact_search(
+        self, state: _Generation, query_vectors: np.ndarray, ids: np.ndarray, k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """Brute-force cosine search over a small set of stored IDs"""
+        in_index = state.index.ntotal
+        vectors = np.vstack([
+            (state.index if vector_id < in_index else state.staging).reconstruct(vector_id)
+            for vector_id in ids.tolist()
+        ])
+        ids = np.asarray(ids)
         results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx < len(self.texts):
-                results.append((self.texts[idx], float(dist)))
+        for scores in query_vectors @ vectors.T:
+            order = np.argsort(-scores)[:k]
+            results.append(self._to_results(state, zip(scores[order], ids[order]), k))
+        return results
+    
+    @staticmethod
+    def _to_results(state: _Generation, hits, k: int) -> List[Tuple[int, float]]:
+        """Turn (score, id) pairs into (id, score) results, skipping empty slots"""
+        results = []
+        for score, idx in hits:
+            if 0 <= idx < state.next_id and state.is_live(int(idx)):
+                results.append((int(idx), float(score)))
+            if len(results) == k:
+                break
         
         return results
     
-    def save(self, name: str = "financial_docs"):
-        """Save index and texts to disk"""
-        index_file = os.path.join(self.index_path, f"{name}.index")
-        texts_file = os.path.join(self.index_path, f"{name}.pkl")
+    def _store_dir(self, name: str) -> str:
+        return os.path.join(self.index_path, name)
+    
+    @staticmethod
+    def _current_generation(store_dir: str) -> Optional[str]:
+        """Generation directory the CURRENT pointer names, if any"""
+        pointer = os.path.join(store_dir, CURRENT_FILE)
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer) as f:
+            return f.read().strip() or None
+    
+    def save(self, name: Optional[str] = None):
+        """
+        Save index, texts and namespaces to disk, then reopen them memory-mapped
+        
+        Every save writes a complete new generation directory and atomically
+        repoints CURRENT at it, so a crash mid-save leaves the previous
+        generation and its write-ahead log intact and readers never see a
+        half-written store. Staged vectors and the log are folded into the
+        new generation on the way, and the log starts over empty.
+        
+        Adds wait for the save to finish; searches keep running.
         
-        # Save FAISS index
-        faiss.write_index(self.index, index_file)
+        Args:
+            name: Store to write (default: the one last loaded)
+        """
+        name = name or self.name or "financial_docs"
+        store_dir = self._store_dir(name)
+        os.makedirs(store_dir, exist_ok=True)
+        
+        with self._lock:
+            previous = self._current_generation(store_dir)
+            number = int(previous.rsplit("-", 1)[1]) + 1 if previous else 1
+            generation = f"v-{number:06d}"
+            target = os.path.join(store_dir, generation)
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            os.makedirs(target)
+            
+            # Staging is folded into a private copy: the mapped base is
+            # read-only, and the live index keeps serving searches meanwhile
+            state = self._state
+            index = state.index
+            if not state.index_mutable:
+                index = faiss.read_index(os.path.join(store_dir, previous, INDEX_FILE))
+            staging = state.staging
+            if index.is_trained and staging.ntotal:
+                if index is state.index:
+                    index = faiss.clone_index(index)
+                index.add(staging.index.reconstruct_n(0, staging.ntotal))
+                staging = self._new_staging_index()
+            
+            faiss.write_index(index, os.path.join(target, INDEX_FILE))
+            if staging.ntotal:
+                faiss.write_index(staging, os.path.join(target, STAGING_FILE))
+            MappedTextStore.write(target, (state.get_text(i) for i in range(state.next_id)))
+            spans = np.full((state.next_id, 2), -1, dtype=np.int64)
+            if state.base_spans is not None:
+                spans[:state.base_count] = state.base_spans
+            for position, span in enumerate(state.spans, start=state.base_count):
+                if span is not None:
+                    spans[position] = span
+            np.save(os.path.join(target, SPANS_FILE), spans)
+            
+            # Namespace names and ID ranges in JSON, their IDs in one flat array
+            ranges = {}
+            offset = 0
+            for namespace, ids in state.namespaces.items():
+                ranges[namespace] = [offset, len(ids)]
+                offset += len(ids)
+            all_ids = (
+                np.concatenate([np.asarray(ids) for ids in state.namespaces.values()])
+                if state.namespaces
+                else np.zeros(0)
+            )
+            np.save(os.path.join(target, NAMESPACE_IDS_FILE), all_ids.astype(np.int64))
+            with open(os.path.join(target, NAMESPACES_FILE), "w") as f:
+                json.dump(ranges, f)
+            
+            manifest = {
+                "format": FORMAT_NAME,
+                "version": FORMAT_VERSION,
+                "index_type": state.index_type,
+                "dimension": self.dimension,
+                "count": state.next_id,
+                "tombstones": state.tombstones,
+            }
+            with open(os.path.join(target, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            # Atomically switch to the new generation
+            pointer = os.path.join(store_dir, CURRENT_FILE)
+            with open(pointer + ".tmp", "w") as f:
+                f.write(generation)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(pointer + ".tmp", pointer)
+            
+            # Everything in the old log is now part of the new generation
+            if self.wal is not None:
+                self.wal.close(delete=True)
+                self.wal = None
+            self.load(name)
         
-        # Save texts
-        with open(texts_file, 'wb') as f:
-            pickle.dump(self.texts, f)
+        if previous and previous != generation:
+            # Processes still mapping the old files keep their pages until they reload
+            shutil.rmtree(os.path.join(store_dir, previous), ignore_errors=True)
     
     def load(self, name: str = "financial_docs") -> bool:
-        """Load index and texts from disk"""
-        index_file = os.path.join(self.index_path, f"{name}.index")
-        texts_file = os.path.join(self.index_path, f"{name}.pkl")
+        """
+        Open the current saved generation and replay its write-ahead log
+        
+        Nothing proportional to the saved corpus is read up front: the
+        index, texts and namespace IDs are memory-mapped and paged in from
+        disk on demand. Only the log (vectors added since the last save)
+        is read in full. Afterwards every mutation is logged.
+        
+        A log that cannot be replayed is moved aside (wal-*.log.failed-*)
+        and the store continues from the saved generation alone, with a
+        fresh log, so later writes are durable again.
         
+        Returns:
+            True if any stored vectors were restored
+        
+        Raises:
+            OSError: If no write-ahead log can be opened; writes would not be durable
+        """
+        store_dir = self._store_dir(name)
+        
+        with self._lock:
+            if self.wal is not None:
+                self.wal.close()
+                self.wal = None
+            
+            generation = self._current_generation(store_dir)
+            opened = self._open_generation(os.path.join(store_dir, generation)) if generation else None
+            loaded = opened is not None
+            if opened is not None:
+                # One assignment: searches see the old generation or the new one, never a mix.
+                # The previous maps are released once in-flight searches drop them.
+                self._state = opened
+                self._lexical.clear()
+            
+            self.name = name
+            if self.wal_enabled:
+                os.makedirs(store_dir, exist_ok=True)
+                path = os.path.join(store_dir, f"wal-{generation or EMPTY_GENERATION}.log")
+                wal = None
+                try:
+                    wal = WriteAheadLog(path, fsync=self.wal_fsync)
+                    replayed = self._replay(wal)
+                except Exception as e:
+                    if wal is not None:
+                        wal.close()
+                    failed = f"{path}.failed-{time.strftime('%Y%m%d-%H%M%S')}"
+                    os.replace(path, failed)
+                    print(f"Failed to replay write-ahead log, moved it to {failed}: {e}")
+                    # Drop whatever the replay applied before it failed
+                    opened = self._open_generation(os.path.join(store_dir, generation)) if generation else None
+                    self._state = opened or self._empty_generation(self._state.index_type)
+                    self._lexical.clear()
+                    loaded = opened is not None
+                    wal = WriteAheadLog(path, fsync=self.wal_fsync)
+                    replayed = 0
+                self.wal = wal
+                loaded = loaded or replayed > 0
+                if replayed:
+                    print(f"Replayed {replayed} write-ahead log records")
+            
+            return loaded
+    
+    def _replay(self, wal: WriteAheadLog) -> int:
+        """Apply every logged mutation on top of the opened generation"""
+        for record in wal.replay():
+            namespace = record["metadata"]["namespace"]
+            if record["op"] == OP_ADD:
+                if record["first_id"] != self.next_id:
+                    raise ValueError(
+                        f"log record starts at ID {record['first_id']}, store is at {self.next_id}"
+                    )
+                self._apply_add(record["vectors"], record["texts"], namespace, record["metadata"].get("spans"))
+            else:
+                self._apply_remove(namespace)
+        return wal.records
+    
+    def needs_compaction(self) -> bool:
+        """Whether the write-ahead log has grown enough to fold into a new generation"""
+        return self.wal is not None and self.wal.size >= self.compact_bytes
+    
+    def _open_generation(self, target: str) -> Optional[_Generation]:
+        """Memory-map a saved generation directory (None if it cannot be opened)"""
         try:
-            if os.path.exists(index_file) and os.path.exists(texts_file):
-                # Load FAISS index
-                self.index = faiss.read_index(index_file)
-                
-                # Load texts
-                with open(texts_file, 'rb') as f:
-                    self.texts = pickle.load(f)
-                
-                return True
+            with open(os.path.join(target, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+            if manifest.get("format") != FORMAT_NAME or manifest.get("version") != FORMAT_VERSION:
+                raise ValueError(f"unsupported store format {manifest.get('format')} v{manifest.get('version')}")
+            if manifest["dimension"] != self.dimension:
+                raise ValueError(f"store dimension {manifest['dimension']} does not match {self.dimension}")
+            
+            # Zero-copy mapping; the index must never be written through it
+            index_file = os.path.join(target, INDEX_FILE)
+            flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+            index = faiss.read_index(index_file, flags)
+            mapped = index.is_trained and index.ntotal > 0
+            if not mapped:
+                # Empty or untrained: tiny, and it still has to grow in memory
+                index = faiss.read_index(index_file)
+            staging_file = os.path.join(target, STAGING_FILE)
+            staging = faiss.read_index(staging_file) if os.path.exists(staging_file) else self._new_staging_index()
+            
+            base_texts = MappedTextStore(target)
+            # Generations written before spans were recorded have no spans file
+            spans_file = os.path.join(target, SPANS_FILE)
+            base_spans = np.load(spans_file, mmap_mode="r") if os.path.exists(spans_file) else None
+            namespace_ids = np.load(os.path.join(target, NAMESPACE_IDS_FILE), mmap_mode="r")
+            with open(os.path.join(target, NAMESPACES_FILE)) as f:
+                ranges = json.load(f)
+            
+            return _Generation(
+                manifest["index_type"],
+                index,
+                staging,
+                index_mutable=not mapped,
+                base_texts=base_texts,
+                base_spans=base_spans,
+                namespaces={
+                    namespace: namespace_ids[start:start + count]
+                    for namespace, (start, count) in ranges.items()
+                },
+                tombstones=manifest["tombstones"],
+            )
         except Exception as e:
             print(f"Failed to load index: {e}")
         
-        return False
+        return None
     
     def clear(self):
-        """Clear the index and texts"""
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.texts = []
+        """
+        Remove every vector, text and namespace
+        
+        IDs start over at 0, which the write-ahead log of the saved
+        generation cannot describe, so a logged store is cleared on disk
+        too: an empty generation is saved and a fresh log started. Without
+        a log only memory is cleared and the files on disk are kept.
+        """
+        with self._lock:
+            self._state = self._empty_generation(self._state.index_type)
+            self._lexical.clear()
+            if self.wal is not None:
+                self.save()
     
     def get_stats(self) -> dict:
         """Get index statistics"""
+        state = self._state
         return {
-            "total_vectors": self.index.ntotal,
+            "total_vectors": state.index.ntotal + state.staging.ntotal,
+            "staged_vectors": state.staging.ntotal,
+            "index_type": state.index_type,
+            "trained": bool(state.index.is_trained),
+            "memory_mapped": not state.index_mutable,
+            "metric": "cosine",
             "dimension": self.dimension,
-            "total_texts": len(self.texts)
-        }
\ No newline at end of file
+            "total_texts": state.next_id,
+            "namespaces": len(state.namespaces),
+            "lexical_indexes": len(self._lexical),
+            "wal_records": self.wal.records if self.wal is not None else 0,
+            "wal_bytes": self.wal.size if self.wal is not None else 0
+        }
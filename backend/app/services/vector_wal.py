@@ -0,0 +1,169 @@
+import os
+import json
+import struct
+import zlib
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+MAGIC = b"FSWAL001"
+RECORD_HEADER = struct.Struct("<II")  # payload length, crc32 of payload
+ADD_HEADER = struct.Struct("<BqII")  # op, first id, count, dimension
+TEXT_LENGTH = struct.Struct("<I")
+
+OP_ADD = 1
+OP_REMOVE = 2
+
+
+class WriteAheadLog:
+    """
+    Append-only log of vector store mutations
+
+    Each record is length-prefixed and checksummed, so a write torn by a
+    crash is detected on replay and cut off; everything before it is
+    recovered. Adds carry (first id, vectors, texts, metadata) and removes
+    carry the namespace, which is all a store needs to rebuild the state
+    it had on top of its last saved generation.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        """
+        Open (or create) the log at path
+
+        Args:
+            path: Log file location
+            fsync: Flush every record to stable storage before returning
+        """
+        self.path = path
+        self.fsync = fsync
+        self.records = 0
+        self._last: Optional[int] = None  # Offset of the last appended record
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            if self._file.read(len(MAGIC)) != MAGIC:
+                self._file.close()
+                raise ValueError(f"{path} is not a vector store write-ahead log")
+        else:
+            self._file.write(MAGIC)
+            self._sync()
+
+    @property
+    def size(self) -> int:
+        """Current log size in bytes"""
+        return self._file.seek(0, os.SEEK_END)
+
+    def append_add(self, first_id: int, vectors: np.ndarray, texts: List[str], metadata: dict):
+        """Log vectors first_id, first_id + 1, ... with their texts"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        meta = json.dumps(metadata).encode("utf-8")
+        parts = [
+            ADD_HEADER.pack(OP_ADD, first_id, len(texts), vectors.shape[1]),
+            TEXT_LENGTH.pack(len(meta)),
+            meta,
+            vectors.tobytes(),
+        ]
+        for text in texts:
+            data = text.encode("utf-8")
+            parts.append(TEXT_LENGTH.pack(len(data)))
+            parts.append(data)
+        self._append(b"".join(parts))
+
+    def append_remove(self, metadata: dict):
+        """Log the removal described by metadata (e.g. a namespace)"""
+        meta = json.dumps(metadata).encode("utf-8")
+        self._append(bytes([OP_REMOVE]) + TEXT_LENGTH.pack(len(meta)) + meta)
+
+    def undo_last(self):
+        """Drop the record appended last, whose mutation could not be applied"""
+        if self._last is None:
+            raise ValueError("no record to undo")
+        self._file.truncate(self._last)
+        self._sync()
+        self._last = None
+        self.records -= 1
+
+    def _append(self, payload: bytes):
+        self._last = self._file.seek(0, os.SEEK_END)
+        self._file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._sync()
+        self.records += 1
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def replay(self) -> Iterator[dict]:
+        """
+        Yield every intact record in order
+
+        Add records are dicts with op, first_id, vectors, texts and
+        metadata; remove records have op and metadata. A truncated or
+        corrupt tail is dropped from the file so later appends follow the
+        last good record.
+        """
+        self._file.seek(len(MAGIC))
+        good = len(MAGIC)
+        self.records = 0
+        self._last = None
+
+        while True:
+            header = self._file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            length, checksum = RECORD_HEADER.unpack(header)
+            payload = self._file.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+
+            record = self._decode(payload)
+            good = self._file.tell()
+            self.records += 1
+            yield record
+
+        if good < self.size:
+            print(f"Discarding {self.size - good} bytes of incomplete write-ahead log")
+            self._file.truncate(good)
+            self._sync()
+
+    @staticmethod
+    def _decode(payload: bytes) -> dict:
+        op = payload[0]
+        if op == OP_REMOVE:
+            (meta_len,) = TEXT_LENGTH.unpack_from(payload, 1)
+            start = 1 + TEXT_LENGTH.size
+            return {"op": OP_REMOVE, "metadata": json.loads(payload[start:start + meta_len])}
+
+        _, first_id, count, dimension = ADD_HEADER.unpack_from(payload, 0)
+        offset = ADD_HEADER.size
+        (meta_len,) = TEXT_LENGTH.unpack_from(payload, offset)
+        offset += TEXT_LENGTH.size
+        metadata = json.loads(payload[offset:offset + meta_len])
+        offset += meta_len
+
+        vector_bytes = count * dimension * 4
+        vectors = np.frombuffer(payload, dtype=np.float32, count=count * dimension, offset=offset)
+        offset += vector_bytes
+
+        texts = []
+        for _ in range(count):
+            (text_len,) = TEXT_LENGTH.unpack_from(payload, offset)
+            offset += TEXT_LENGTH.size
+            texts.append(payload[offset:offset + text_len].decode("utf-8"))
+            offset += text_len
+
+        return {
+            "op": OP_ADD,
+            "first_id": first_id,
+            "vectors": vectors.reshape(count, dimension),
+            "texts": texts,
+            "metadata": metadata,
+        }
+
+    def close(self, delete: bool = False):
+        """Close the log, optionally deleting the file"""
+        self._file.close()
+        if delete and os.path.exists(self.path):
+            os.remove(self.path)
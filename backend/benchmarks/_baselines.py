@@ -0,0 +1,79 @@
+"""
+Earlier pipeline components, kept as baselines for the benchmarks.
+
+- ``IncrementalChunker``: the character chunker the pipeline used
+  before ``TokenChunker``
+"""
+
+from typing import List
+
+
+class IncrementalChunker:
+    """
+    Overlapping character chunker that accepts text a piece at a time
+
+    Baseline only: the pipeline chunks by tokens with TokenChunker.
+
+    Produces the same chunks as splitting the pieces joined by single
+    spaces, but only ever holds the unfinished tail (at most one chunk
+    plus the latest piece), so a document can be chunked while later
+    pages are still being extracted.
+    """
+
+    def __init__(self, chunk_size: int = 1000, overlap: int = 200):
+        """
+        Args:
+            chunk_size: Characters per chunk
+            overlap: Overlap between chunks, less than chunk_size so
+                every chunk moves the window forward
+        """
+        if not 0 <= overlap < chunk_size:
+            raise ValueError(f"overlap must be in [0, chunk_size), got {overlap} for chunk_size {chunk_size}")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self._buffer = ""
+        self._emitted = False
+
+    def feed(self, text: str) -> List[str]:
+        """Append text and return every chunk that is now complete"""
+        if not text:
+            return []
+        self._buffer = f"{self._buffer} {text}" if self._buffer else text
+
+        chunks = []
+        # A chunk is final once text exists beyond its end
+        while len(self._buffer) > self.chunk_size:
+            end = self._chunk_end(self._buffer)
+            chunks.append(self._buffer[:end].strip())
+            self._buffer = self._buffer[end - self.overlap:]
+        self._emitted = self._emitted or bool(chunks)
+        return chunks
+
+    def finish(self) -> List[str]:
+        """Return the remaining chunks and reset"""
+        if not self._emitted:
+            chunks = [self._buffer] if self._buffer else []
+        else:
+            # The tail keeps stepping by chunk_size - overlap like any other chunk
+            chunks = []
+            while self._buffer:
+                chunks.append(self._buffer[:self.chunk_size].strip())
+                self._buffer = self._buffer[self.chunk_size - self.overlap:]
+
+        self._buffer = ""
+        self._emitted = False
+        return chunks
+
+    def _chunk_end(self, text: str) -> int:
+        """End of the chunk starting at text[0], preferring a sentence boundary"""
+        chunk = text[:self.chunk_size]
+        # Look for period, question mark, or exclamation
+        last_period = max(
+            chunk.rfind('. '),
+            chunk.rfind('? '),
+            chunk.rfind('! ')
+        )
+
+        if last_period > self.chunk_size * 0.5:  # At least 50% through
+            return last_period + 2
+        return self.chunk_size
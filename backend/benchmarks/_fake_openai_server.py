@@ -0,0 +1,233 @@
+"""
+Local stand-in for the OpenAI HTTP API, used by the load tests.
+
+Serves ``POST /v1/embeddings`` and ``POST /v1/chat/completions`` (plain
+and streamed) with the response shapes the ``openai`` client parses, so
+the service talks to it through its real client, connection pool and
+retry handling. Point the service at it with
+``OPENAI_BASE_URL=http://127.0.0.1:<port>/v1``.
+
+- latencies are drawn per request from a distribution (see ``Latency``)
+- a share of requests is answered with a 429 carrying ``retry-after-ms``
+- completions return ``CANNED_ANALYSIS``, which matches the
+  ``LLMAnalyzer`` schema, with token usage (streamed ones too when
+  ``stream_options.include_usage`` is set)
+- ``GET /stats`` counts requests, inputs, injected 429s and the most
+  requests in flight at once; ``POST /stats/reset`` starts them over
+
+Usage (from ``backend/``):
+
+    python -m benchmarks._fake_openai_server --port 8100 \\
+        --embedding-latency lognormal:0.15,0.5 --chat-latency uniform:1,3 --rate-limit-rate 0.02
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import random
+import time
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks._fakes import CANNED_ANALYSIS, fake_vector
+
+
+class Latency:
+    """
+    A latency distribution in seconds, parsed from a spec:
+
+    - ``0.2`` or ``constant:0.2``
+    - ``uniform:LOW,HIGH``
+    - ``lognormal:MEDIAN,SIGMA``: long-tailed, like real API latencies
+    """
+
+    def __init__(self, spec: str, seed: int = 1):
+        kind, _, params = spec.partition(":") if ":" in spec else ("constant", "", spec)
+        values = [float(value) for value in params.split(",")]
+        if kind not in ("constant", "uniform", "lognormal") or len(values) != (1 if kind == "constant" else 2):
+            raise ValueError(f"Unsupported latency spec: {spec}")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+        self._rng = random.Random(seed)
+
+    def sample(self) -> float:
+        if self.kind == "constant":
+            return self.values[0]
+        if self.kind == "uniform":
+            return self._rng.uniform(*self.values)
+        median, sigma = self.values
+        return self._rng.lognormvariate(math.log(median), sigma)
+
+
+def create_app(
+    embedding_latency: str = "0.2",
+    chat_latency: str = "1.0",
+    per_input_latency: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    retry_after_ms: int = 50,
+    dimension: int = 1536,
+    stream_pieces: int = 20,
+    seed: int = 1,
+) -> FastAPI:
+    """The fake API as an ASGI app"""
+    app = FastAPI()
+    embedding_delay = Latency(embedding_latency, seed)
+    chat_delay = Latency(chat_latency, seed + 1)
+    rng = random.Random(seed + 2)
+    content = json.dumps(CANNED_ANALYSIS)
+    stats = {
+        "embedding_requests": 0,
+        "embedding_inputs": 0,
+        "chat_requests": 0,
+        "rate_limited": 0,
+        "in_flight": 0,
+        "max_in_flight": 0,
+    }
+
+    def rate_limited() -> bool:
+        if rng.random() < rate_limit_rate:
+            stats["rate_limited"] += 1
+            return True
+        return False
+
+    def too_many_requests() -> JSONResponse:
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+            status_code=429,
+            headers={"retry-after-ms": str(retry_after_ms)},
+        )
+
+    def usage(prompt_tokens: int, completion_tokens: int = 0) -> dict:
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    @app.middleware("http")
+    async def count_in_flight(request: Request, call_next):
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            return await call_next(request)
+        finally:
+            stats["in_flight"] -= 1
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        stats["embedding_requests"] += 1
+        if rate_limited():
+            return too_many_requests()
+        texts = [body["input"]] if isinstance(body["input"], str) else body["input"]
+        stats["embedding_inputs"] += len(texts)
+        await asyncio.sleep(embedding_delay.sample() + per_input_latency * len(texts))
+
+        size = body.get("dimensions", dimension)
+        data = []
+        for index, text in enumerate(texts):
+            vector = fake_vector(text, size)
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        return {
+            "object": "list",
+            "data": data,
+            "model": body["model"],
+            "usage": usage(sum(len(text) // 4 for text in texts)),
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["chat_requests"] += 1
+        if rate_limited():
+            return too_many_requests()
+        prompt_tokens = sum(len(message["content"]) // 4 for message in body["messages"])
+        completion_tokens = len(content) // 4
+        delay = chat_delay.sample()
+        created = int(time.time())
+
+        if body.get("stream"):
+            async def events():
+                step = max(1, -(-len(content) // stream_pieces))
+                for start in range(0, len(content), step):
+                    await asyncio.sleep(delay / stream_pieces)
+                    chunk = {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": body["model"],
+                        "choices": [{"index": 0, "delta": {"content": content[start:start + step]}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                if body.get("stream_options", {}).get("include_usage"):
+                    chunk = {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": body["model"],
+                        "choices": [],
+                        "usage": usage(prompt_tokens, completion_tokens),
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(delay)
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": created,
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage(prompt_tokens, completion_tokens),
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.update({key: 0 for key in stats if key != "in_flight"})
+        stats["max_in_flight"] = stats["in_flight"]
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--embedding-latency", default="0.2")
+    parser.add_argument("--chat-latency", default="1.0")
+    parser.add_argument("--per-input-latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after-ms", type=int, default=50)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    app = create_app(
+        embedding_latency=args.embedding_latency,
+        chat_latency=args.chat_latency,
+        per_input_latency=args.per_input_latency,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_ms=args.retry_after_ms,
+        dimension=args.dimension,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
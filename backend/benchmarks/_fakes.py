@@ -0,0 +1,120 @@
+"""
+In-process stand-ins for the OpenAI async client used by the benchmarks.
+
+They reproduce only the response shapes the services read
+(``response.data[i].embedding``, ``response.choices[0].message.content``
+and, when streaming, ``chunk.choices[0].delta.content``) and simulate network latency with ``asyncio.sleep`` so that pipeline
+concurrency can be measured without spending API credits.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+from types import SimpleNamespace
+from typing import List, Union
+
+import httpx
+import numpy as np
+import openai
+
+CANNED_ANALYSIS = {
+    "summary": "- Revenue grew on strong demand\n- Margins compressed slightly",
+    "sentiment": "Positive",
+    "risk_factors": ["Competition", "Supply chain constraints"],
+    "opportunities": ["New product launches"],
+    "key_metrics": {
+        "revenue": {"value": "$25.2B", "change": "3%", "direction": "up"},
+        "eps": {"value": "$2.27", "change": None, "direction": "unknown"},
+    },
+    "confidence_score": 80,
+    "citations_used": 3,
+}
+
+
+def fake_vector(text: str, dimension: int = 1536) -> List[float]:
+    """Deterministic pseudo-embedding derived from a hash of the text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    return vector.tolist()
+
+
+def rate_limit_error(retry_after_ms: int = 50) -> openai.RateLimitError:
+    """A 429 error carrying the retry header the real API sends."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    response = httpx.Response(
+        429, headers={"retry-after-ms": str(retry_after_ms)}, request=request
+    )
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+class _FakeEmbeddings:
+    def __init__(
+        self,
+        latency: float,
+        dimension: int,
+        per_input_latency: float = 0.0,
+        rate_limit_rate: float = 0.0,
+    ):
+        self.latency = latency
+        self.dimension = dimension
+        self.per_input_latency = per_input_latency
+        self.rate_limit_rate = rate_limit_rate
+        self.calls = 0
+        self.rate_limited = 0
+        self._rng = random.Random(1)
+
+    async def create(self, model: str, input: Union[str, List[str]], **kwargs):
+        self.calls += 1
+        texts = [input] if isinstance(input, str) else input
+        if self._rng.random() < self.rate_limit_rate:
+            self.rate_limited += 1
+            raise rate_limit_error()
+        await asyncio.sleep(self.latency + self.per_input_latency * len(texts))
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(index=i, embedding=fake_vector(t, self.dimension))
+                for i, t in enumerate(texts)
+            ]
+        )
+
+
+class _FakeCompletions:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def create(self, model: str, messages, stream: bool = False, **kwargs):
+        self.calls += 1
+        content = json.dumps(CANNED_ANALYSIS)
+        if stream:
+            return self._stream(content)
+        await asyncio.sleep(self.latency)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self, content: str, pieces: int = 20):
+        """The same content as ``pieces`` deltas spread over the latency."""
+        step = max(1, -(-len(content) // pieces))
+        for start in range(0, len(content), step):
+            await asyncio.sleep(self.latency / pieces)
+            delta = SimpleNamespace(content=content[start:start + step])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class FakeAsyncOpenAI:
+    """Drop-in replacement for ``openai.AsyncOpenAI`` in benchmarks."""
+
+    def __init__(
+        self,
+        embedding_latency: float = 0.2,
+        chat_latency: float = 1.0,
+        dimension: int = 1536,
+        per_input_latency: float = 0.0,
+        rate_limit_rate: float = 0.0,
+    ):
+        self.embeddings = _FakeEmbeddings(
+            embedding_latency, dimension, per_input_latency, rate_limit_rate
+        )
+        self.chat = SimpleNamespace(completions=_FakeCompletions(chat_latency))
@@ -0,0 +1,161 @@
+"""
+Synthetic, 10-K-shaped fixtures shared by the benchmark scripts.
+
+Everything is generated from a seeded RNG so runs are reproducible and
+comparable across commits.
+"""
+
+import random
+
+_SENTENCES = [
+    "Total revenue for fiscal {year} was ${amount}B, an increase of {pct}% compared to the prior year.",
+    "Operating margin decreased to {pct}% primarily due to higher research and development expenses.",
+    "Net cash provided by operating activities was ${amount}B, while capital expenditures were ${small}B.",
+    "We face intense competition in each of our markets and expect competition to increase.",
+    "Item 1A. Risk Factors describes material risks that could adversely affect our business.",
+    "Our outstanding long-term debt was ${amount}B with a weighted-average interest rate of {pct}%.",
+    "Adjusted EBITDA grew {pct}% year-over-year to ${amount}B driven by services growth.",
+    "Diluted earnings per share were ${small} compared to ${small} in fiscal {prev}.",
+    "Supply chain disruptions and inflationary pressures may impact gross margin in future periods.",
+    "We returned ${small}B to shareholders through share repurchases and dividends.",
+]
+
+
+def synthetic_filing_text(n_chars: int, seed: int = 7) -> str:
+    """Return roughly ``n_chars`` characters of filing-like prose."""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < n_chars:
+        year = rng.randint(2015, 2024)
+        sentence = rng.choice(_SENTENCES).format(
+            year=year,
+            prev=year - 1,
+            amount=round(rng.uniform(1, 400), 1),
+            small=round(rng.uniform(0.1, 9.9), 2),
+            pct=round(rng.uniform(0.5, 40), 1),
+        )
+        parts.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(parts)
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def synthetic_filing_pdf(n_pages: int, chars_per_page: int = 3000, seed: int = 7) -> bytes:
+    """
+    Return an ``n_pages`` text PDF filled with filing-like prose.
+
+    Written by hand (Helvetica, one content stream per page) so the
+    benchmarks need no PDF-generation dependency.
+    """
+    text = synthetic_filing_text(n_pages * chars_per_page, seed)
+    width = 95
+    lines_per_page = max(1, chars_per_page // width)
+    words = text.split()
+    lines, current = [], ""
+    for word in words:
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+
+    objects = {}
+    page_ids = []
+    next_id = 4  # 1 catalog, 2 pages, 3 font
+    for page in range(n_pages):
+        page_lines = lines[page * lines_per_page:(page + 1) * lines_per_page] or [""]
+        body = "BT /F1 8 Tf 10 TL 36 760 Td " + " ".join(
+            f"({_pdf_escape(line)}) '" for line in page_lines
+        ) + " ET"
+        stream = body.encode("latin-1")
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(page_id)
+
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % pid for pid in page_ids), len(page_ids)
+    )
+    objects[3] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (next_id)
+    for obj_id in range(1, next_id):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (next_id, xref)
+    return bytes(out)
+
+
+def synthetic_filing_html(n_bytes: int, seed: int = 7) -> bytes:
+    """
+    Return roughly ``n_bytes`` of EDGAR inline-XBRL-shaped HTML.
+
+    Mirrors what makes real filings heavy: an XML prolog, a hidden
+    ``ix:header`` full of contexts, inline styles on every element,
+    tables of tagged facts, entities and comments, plus the header, nav,
+    footer, script and style blocks the extractor must drop.
+    """
+    rng = random.Random(seed)
+    style = "font-family:'Times New Roman';font-size:10pt;color:#000000;margin-top:0pt"
+    contexts = "".join(
+        f'<xbrli:context id="c-{i}"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">'
+        f"0000320193</xbrli:identifier></xbrli:entity><xbrli:period><xbrli:startDate>2023-01-01"
+        f"</xbrli:startDate><xbrli:endDate>2023-12-31</xbrli:endDate></xbrli:period></xbrli:context>"
+        for i in range(200)
+    )
+    head = (
+        "<?xml version='1.0' encoding='ASCII'?>\n"
+        '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:ix="http://www.xbrl.org/2013/inlineXBRL">'
+        '<head><meta http-equiv="Content-Type" content="text/html; charset=utf-8"/>'
+        "<title>Form 10-K &#8211; Example Corp</title>"
+        "<style>.hdr{font-weight:bold} td{padding:0}</style>"
+        "<script>window.dataLayer=[];function t(a){return a<1&&a>0}</script></head><body>"
+        '<div style="display:none"><ix:header><ix:hidden><ix:nonNumeric name="dei:AmendmentFlag" '
+        'contextRef="c-1">false</ix:nonNumeric></ix:hidden><ix:resources>'
+        f"{contexts}</ix:resources></ix:header></div>"
+        "<header><div>EDGAR Filing Header</div></header>"
+        '<nav><a href="#toc">Table of Contents</a> <a href="#risk">Risk Factors</a></nav>'
+    )
+    footer = "<footer><p>Example Corp &copy; 2024 | Page footer</p></footer></body></html>"
+
+    parts = [head]
+    size = len(head) + len(footer)
+    section = 0
+    while size < n_bytes:
+        section += 1
+        paragraph = "".join(
+            f'<p style="{style}"><span style="{style}">{sentence}</span></p>'
+            for sentence in synthetic_filing_text(600, seed + section).replace("&", "&amp;").split(". ")
+        )
+        rows = "".join(
+            f'<tr><td style="{style}"><span>Revenue segment {r}</span></td>'
+            f'<td style="{style};text-align:right"><span>$&#160;</span><ix:nonFraction '
+            f'name="us-gaap:Revenues" contextRef="c-{rng.randint(0, 199)}" unitRef="usd" decimals="-6" '
+            f'scale="6" format="ixt:num-dot-decimal">{rng.randint(100, 99999):,}</ix:nonFraction></td></tr>'
+            for r in range(8)
+        )
+        block = (
+            f'<div id="s{section}"><p class="hdr" style="{style}">Item {section}. Section heading</p>'
+            f"{paragraph}<!-- page break {section} --><table>{rows}</table>"
+            f"<p style=\"{style}\">Management&#8217;s discussion &amp; analysis continues.</p></div>"
+        )
+        parts.append(block)
+        size += len(block)
+    parts.append(footer)
+    return "".join(parts).encode("utf-8")
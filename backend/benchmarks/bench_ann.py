@@ -0,0 +1,132 @@
+"""
+Recall-vs-latency benchmark for the VectorStore index types.
+
+Builds a synthetic clustered corpus (one million vectors by default),
+computes exact cosine neighbours as ground truth, and then measures
+recall@k and per-query latency for the flat, HNSW and IVF-PQ indexes
+across a sweep of efSearch / nprobe values.
+
+The default dimension is 128 so a million vectors fit comfortably in RAM
+(the production 1536-d corpus is 12x larger); pass --dim 1536 with a
+smaller --n to benchmark at the real embedding width.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_ann --n 1000000 --dim 128
+    python -m benchmarks.bench_ann --n 100000 --dim 1536 --pq-m 96
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("FAISS_INDEX_PATH", os.path.join(tempfile.mkdtemp(), "faiss_index"))
+
+import faiss  # noqa: E402
+import numpy as np  # noqa: E402
+
+from app.services.vector_store import VectorStore  # noqa: E402
+
+
+def synthetic_corpus(n: int, dim: int, n_queries: int, seed: int = 0, latent_dim: int = 32):
+    """
+    Clustered points on a low-dimensional subspace plus a little noise.
+
+    Real text embeddings have low intrinsic dimensionality; isotropic
+    full-rank noise would make every index look far worse than in practice.
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = max(16, n // 1000)
+    projection = rng.standard_normal((latent_dim, dim)).astype(np.float32)
+    centers = rng.standard_normal((n_clusters, latent_dim)).astype(np.float32)
+
+    def sample(count):
+        latent = centers[rng.integers(0, n_clusters, count)]
+        latent = latent + 0.5 * rng.standard_normal((count, latent_dim)).astype(np.float32)
+        points = latent @ projection
+        return points + 0.1 * rng.standard_normal((count, dim)).astype(np.float32)
+
+    return sample(n), sample(n_queries)
+
+
+def ground_truth(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    index = faiss.IndexFlatIP(corpus.shape[1])
+    normalized = corpus.copy()
+    faiss.normalize_L2(normalized)
+    index.add(normalized)
+    q = queries.copy()
+    faiss.normalize_L2(q)
+    _, ids = index.search(q, k)
+    return ids
+
+
+def evaluate(store: VectorStore, queries: np.ndarray, truth: np.ndarray, k: int, **params) -> dict:
+    hits = 0
+    started = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        found = {int(text) for text, _ in store.search(query, top_k=k, **params)}
+        hits += len(found & set(expected.tolist()))
+    elapsed = time.perf_counter() - started
+    return {
+        "recall": round(hits / (k * len(queries)), 4),
+        "latency_ms": round(elapsed / len(queries) * 1000, 3),
+    }
+
+
+def run(args) -> list:
+    corpus, queries = synthetic_corpus(args.n, args.dim, args.queries)
+    truth = ground_truth(corpus, queries, args.k)
+    texts = [str(i) for i in range(args.n)]
+
+    os.environ.update(
+        HNSW_M=str(args.hnsw_m),
+        IVF_NLIST=str(args.nlist),
+        PQ_M=str(args.pq_m),
+        IVF_TRAIN_SIZE=str(min(args.n, args.nlist * 39)),
+    )
+
+    sweeps = {
+        "flat": [{}],
+        "hnsw": [{"ef_search": ef} for ef in (16, 32, 64, 128, 256)],
+        "ivfpq": [{"nprobe": p} for p in (1, 4, 16, 64, 128)],
+    }
+    results = []
+    for index_type in args.types:
+        store = VectorStore(dimension=args.dim, index_type=index_type)
+        started = time.perf_counter()
+        for start in range(0, args.n, 100_000):
+            store.add_vectors(corpus[start:start + 100_000], texts[start:start + 100_000])
+        build = time.perf_counter() - started
+
+        for params in sweeps[index_type]:
+            row = {"index": index_type, **params, "build_s": round(build, 1)}
+            row.update(evaluate(store, queries, truth, args.k, **params))
+            results.append(row)
+            print(json.dumps(row))
+        del store
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--pq-m", type=int, default=16)
+    parser.add_argument("--types", nargs="+", default=["flat", "hnsw", "ivfpq"])
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark for batch analysis of a peer group of filings.
+
+Analyzes the same set of distinct documents three ways against a
+``RAGPipeline`` whose OpenAI clients are replaced with latency-simulating
+fakes (each embedding request also pays a per-input cost):
+
+- one ``process_document`` after another, as 50 separate calls would
+- ``process_document`` for all of them at once
+- one ``process_batch`` call
+
+and reports wall time and the number of embedding and LLM requests. Each
+run uses fresh documents, so none reuses another's index or results. The
+batch should take about as long as the slowest document.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_batch --documents 20
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ["VECTOR_WAL_ENABLED"] = "false"
+_scratch = tempfile.mkdtemp()
+os.environ["FAISS_INDEX_PATH"] = os.path.join(_scratch, "faiss_index")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_scratch, "embedding_cache.sqlite3")
+
+from app.models.schema import AnalyzeRequest  # noqa: E402
+from app.services.rag import RAGPipeline  # noqa: E402
+from benchmarks._fakes import FakeAsyncOpenAI  # noqa: E402
+from benchmarks._fixtures import synthetic_filing_text  # noqa: E402
+
+
+def requests_for(args, run):
+    # Vary the size so one document is clearly the slowest
+    return [
+        AnalyzeRequest(
+            type="text",
+            input=synthetic_filing_text(args.doc_chars * (2 if i == 0 else 1), seed=run * 1000 + i),
+        )
+        for i in range(args.documents)
+    ]
+
+
+async def sequential(pipeline, requests):
+    return [await pipeline.process_document(request) for request in requests]
+
+
+async def concurrent(pipeline, requests):
+    return await asyncio.gather(*(pipeline.process_document(request) for request in requests))
+
+
+async def batch(pipeline, requests):
+    return await pipeline.process_batch(requests)
+
+
+async def run(args):
+    pipeline = RAGPipeline()
+    fake = FakeAsyncOpenAI(
+        embedding_latency=args.embedding_latency,
+        chat_latency=args.chat_latency,
+        per_input_latency=args.per_input_latency,
+    )
+    pipeline.embedder.backend.client = fake
+    pipeline.analyzer.client = fake
+    pipeline.batch_llm_concurrency = args.llm_concurrency
+
+    print(
+        f"documents: {args.documents} x {args.doc_chars / 1000:.0f}KB (first one twice as long), "
+        f"batch LLM concurrency: {args.llm_concurrency}"
+    )
+    for run_number, (label, method) in enumerate(
+        (("sequential", sequential), ("concurrent", concurrent), ("batch", batch)), start=1
+    ):
+        requests = requests_for(args, run_number)
+        embedding_calls = fake.embeddings.calls
+        llm_calls = fake.chat.completions.calls
+        started = time.perf_counter()
+        results = await method(pipeline, requests)
+        elapsed = time.perf_counter() - started
+        failed = sum(isinstance(result, Exception) for result in results)
+        print(
+            f"  {label:<11} time={elapsed:6.2f}s "
+            f"embedding_requests={fake.embeddings.calls - embedding_calls:<4} "
+            f"llm_requests={fake.chat.completions.calls - llm_calls:<4} failed={failed}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--doc-chars", type=int, default=100_000)
+    parser.add_argument("--embedding-latency", type=float, default=0.3)
+    parser.add_argument("--per-input-latency", type=float, default=0.001)
+    parser.add_argument("--chat-latency", type=float, default=2.0)
+    parser.add_argument("--llm-concurrency", type=int, default=16)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
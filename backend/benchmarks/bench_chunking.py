@@ -0,0 +1,117 @@
+"""
+Benchmark for the token-span chunker.
+
+Chunks multi-megabyte filing text with the previous character chunker
+(every chunk copied into a new string) and with ``TokenChunker``, whole
+and fed page by page, reporting wall time, peak Python heap, chunk count
+and the spread of tokens per chunk. A last run uses an overlap of one
+token less than the chunk size (on the first megabyte; it yields one
+chunk per token), which the character chunker could not finish at its
+equivalent setting.
+
+Token counts come from tiktoken when its encoding files are available,
+otherwise from the offline estimate.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_chunking --mb 1 10 30
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.services.token_chunker import TokenChunker, load_encoding, token_starts
+from benchmarks._baselines import IncrementalChunker
+from benchmarks._fixtures import synthetic_filing_text
+
+
+def run(chunk, trace_memory):
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = chunk()
+    elapsed = time.perf_counter() - started
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def token_spread(text, spans, encoding):
+    """(mean, max) tokens per chunk"""
+    starts = token_starts(text, encoding)
+    counts = [
+        np.searchsorted(starts, end) - np.searchsorted(starts, start, side="right") + 1
+        for start, end in spans
+    ]
+    return float(np.mean(counts)), int(np.max(counts))
+
+
+def report(label, spans, elapsed, peak, text, encoding):
+    mean, largest = token_spread(text, spans, encoding)
+    memory = f" peak_heap={peak / 1e6:7.1f}MB" if peak is not None else ""
+    print(
+        f"  {label:<26} time={elapsed:6.2f}s{memory} chunks={len(spans):<7} "
+        f"tokens/chunk mean={mean:6.1f} max={largest}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--overlap-chars", type=int, default=200)
+    parser.add_argument("--page-chars", type=int, default=3000)
+    parser.add_argument("--trace-memory", action="store_true")
+    parser.add_argument("--model", default="text-embedding-3-small")
+    args = parser.parse_args()
+
+    encoding = load_encoding(args.model)
+    print(f"tokenizer: {encoding.name if encoding is not None else 'estimate'}")
+
+    for mb in args.mb:
+        text = synthetic_filing_text(int(mb * 1_000_000))
+        print(f"text: {len(text) / 1e6:.1f}MB")
+
+        def characters():
+            chunker = IncrementalChunker(args.chunk_chars, args.overlap_chars)
+            return chunker.feed(text) + chunker.finish()
+
+        chunks, elapsed, peak = run(characters, args.trace_memory)
+        # Locate each copied chunk to count its tokens; not part of the timing
+        spans, position = [], 0
+        for chunk in chunks:
+            start = text.find(chunk, max(0, position - args.chunk_chars))
+            spans.append((start, start + len(chunk)))
+            position = start + len(chunk)
+        report("characters (copies)", spans, elapsed, peak, text, encoding)
+
+        chunker = TokenChunker(args.chunk_tokens, args.overlap_tokens, encoding)
+        spans, elapsed, peak = run(lambda: chunker.spans(text), args.trace_memory)
+        report("token spans", spans, elapsed, peak, text, encoding)
+
+        def streamed():
+            pages = [text[i:i + args.page_chars] for i in range(0, len(text), args.page_chars)]
+            stream = TokenChunker(args.chunk_tokens, args.overlap_tokens, encoding)
+            chunks = []
+            for page in pages:
+                chunks.extend(stream.feed(page))
+            return chunks + stream.finish(), " ".join(pages)
+
+        (chunks, joined), elapsed, peak = run(streamed, args.trace_memory)
+        report("token stream (pages)", [(s, e) for s, e, _ in chunks], elapsed, peak, joined, encoding)
+
+        head = text[:1_000_000]
+        chunker = TokenChunker(args.chunk_tokens, args.chunk_tokens - 1, encoding)
+        spans, elapsed, peak = run(lambda: chunker.spans(head), args.trace_memory)
+        report(f"token overlap={args.chunk_tokens - 1} (1MB)", spans, elapsed, peak, head, encoding)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Throughput benchmark for the async /api/analyze pipeline.
+
+Runs the same batch of requests serially and then concurrently against a
+``RAGPipeline`` whose OpenAI clients are replaced with latency-simulating
+fakes, while a probe coroutine measures how long the event loop is blocked.
+If the pipeline is truly non-blocking, the concurrent run should take about
+as long as a single request and the loop lag should stay in milliseconds.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_concurrency --requests 8
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+_scratch = tempfile.mkdtemp()
+os.environ.setdefault("FAISS_INDEX_PATH", os.path.join(_scratch, "faiss_index"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(_scratch, "embedding_cache.sqlite3"))
+
+from app.models.schema import AnalyzeRequest  # noqa: E402
+from app.services.rag import RAGPipeline  # noqa: E402
+from benchmarks._fakes import FakeAsyncOpenAI  # noqa: E402
+from benchmarks._fixtures import synthetic_filing_text  # noqa: E402
+
+
+def build_pipeline(embedding_latency: float, chat_latency: float) -> RAGPipeline:
+    pipeline = RAGPipeline()
+    fake = FakeAsyncOpenAI(embedding_latency=embedding_latency, chat_latency=chat_latency)
+    pipeline.embedder.backend.client = fake
+    pipeline.analyzer.client = fake
+    return pipeline
+
+
+async def probe_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Return the worst observed delay of a periodic timer on the event loop."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def run(n_requests: int, doc_chars: int, embedding_latency: float, chat_latency: float):
+    pipeline = build_pipeline(embedding_latency, chat_latency)
+    # Distinct documents per phase so the embedding cache cannot skew the comparison
+    serial_requests = [
+        AnalyzeRequest(type="text", input=synthetic_filing_text(doc_chars, seed=i))
+        for i in range(n_requests)
+    ]
+    requests = [
+        AnalyzeRequest(type="text", input=synthetic_filing_text(doc_chars, seed=n_requests + i))
+        for i in range(n_requests)
+    ]
+
+    started = time.perf_counter()
+    for request in serial_requests:
+        await pipeline.process_document(request)
+    serial = time.perf_counter() - started
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(stop))
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(pipeline.process_document(r) for r in requests), return_exceptions=True
+    )
+    concurrent = time.perf_counter() - started
+    stop.set()
+    worst_lag = await probe
+
+    errors = [o for o in outcomes if isinstance(o, Exception)]
+    print(f"requests:             {n_requests} x {doc_chars} chars")
+    print(f"serial wall time:     {serial:.2f}s")
+    print(f"concurrent wall time: {concurrent:.2f}s")
+    print(f"overlap factor:       {serial / concurrent:.1f}x")
+    print(f"worst loop lag:       {worst_lag * 1000:.1f}ms")
+    print(f"errors:               {len(errors)}")
+    for error in errors[:3]:
+        print(f"  - {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--doc-chars", type=int, default=50_000)
+    parser.add_argument("--embedding-latency", type=float, default=0.3)
+    parser.add_argument("--chat-latency", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(
+        run(args.requests, args.doc_chars, args.embedding_latency, args.chat_latency)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark for token-budgeted context packing.
+
+The synthetic filing is made of topic sections, each several chunks
+long, the way answers in a real filing sit in one Item or note. It is
+indexed twice: once the old way (1000/200-character chunks, top 5 joined
+as they are) and once with token chunks packed by ``ContextAssembler``.
+Each query asks about one section, and the two are compared on:
+
+- prompt tokens spent on context
+- characters repeated between chunks
+- section coverage: the share of the target section in the context
+
+Embeddings are hashed bags of words, so retrieval is lexical but
+deterministic and needs no API. The LLM is not called. Its prefill time
+grows with the prompt, so the token counts stand in for latency.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_context --budget 1100
+"""
+
+import argparse
+import os
+import random
+import re
+import tempfile
+import zlib
+
+import numpy as np
+
+os.environ["VECTOR_WAL_ENABLED"] = "false"
+os.environ.setdefault("FAISS_INDEX_PATH", tempfile.mkdtemp())
+
+from app.services.context import ContextAssembler  # noqa: E402
+from app.services.token_chunker import TokenChunker  # noqa: E402
+from app.services.vector_store import VectorStore  # noqa: E402
+from benchmarks._baselines import IncrementalChunker  # noqa: E402
+from benchmarks._fixtures import synthetic_filing_text  # noqa: E402
+
+DIMENSION = 1024
+TOPICS = {
+    "revenue": ["subscription", "bookings", "pricing", "backlog"],
+    "debt": ["notes", "covenants", "maturities", "refinancing"],
+    "litigation": ["lawsuit", "settlement", "plaintiffs", "damages"],
+    "cybersecurity": ["breach", "ransomware", "encryption", "incident"],
+    "inventory": ["warehouse", "obsolescence", "writedown", "components"],
+    "pension": ["actuarial", "annuity", "funded", "discount"],
+    "taxes": ["deferred", "jurisdictions", "valuation", "allowance"],
+    "leases": ["lessee", "premises", "renewal", "rightofuse"],
+}
+
+
+def topic_filing(section_chars, sections_per_topic, seed=7):
+    """Filing text and the (start, end) of every section, by topic"""
+    rng = random.Random(seed)
+    filler = re.split(r"(?<=\.) ", synthetic_filing_text(section_chars * len(TOPICS) * sections_per_topic, seed))
+    order = [topic for topic in TOPICS for _ in range(sections_per_topic)]
+    rng.shuffle(order)
+
+    parts, sections, size = [], {topic: [] for topic in TOPICS}, 0
+    for topic in order:
+        sentences = [f"Note on {topic}."]
+        while sum(len(s) + 1 for s in sentences) < section_chars:
+            terms = " and ".join(rng.sample(TOPICS[topic], 2))
+            sentences.append(f"Our {topic} {terms} disclosures {rng.choice(filler)}")
+        section = " ".join(sentences)
+        start = size + (1 if parts else 0)
+        parts.append(section)
+        size = start + len(section)
+        sections[topic].append((start, size))
+    return " ".join(parts), sections
+
+
+def estimate_tokens(texts):
+    return [max(1, len(text) // 4) for text in texts]
+
+
+def hashed_embedding(text):
+    vector = np.zeros(DIMENSION, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        vector[zlib.crc32(word.encode()) % DIMENSION] += 1.0
+    return vector
+
+
+def build_store(chunks, spans=None):
+    store = VectorStore(dimension=DIMENSION)
+    store.add_vectors(np.vstack([hashed_embedding(chunk) for chunk in chunks]), chunks, "doc", spans=spans)
+    return store
+
+
+def measure(text, pieces, sections):
+    """(context tokens, repeated characters, section coverage) of context pieces"""
+    covered = np.zeros(len(text), dtype=bool)
+    repeated = 0
+    for piece in pieces:
+        start = text.find(piece)
+        repeated += int(covered[start:start + len(piece)].sum())
+        covered[start:start + len(piece)] = True
+    in_sections = sum(int(covered[start:end].sum()) for start, end in sections)
+    # Best possible: a budget's worth of section text
+    return sum(estimate_tokens(pieces)), repeated, in_sections / sum(end - start for start, end in sections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--section-chars", type=int, default=20000)
+    parser.add_argument("--sections-per-topic", type=int, default=1)
+    parser.add_argument("--budget", type=int, default=1100)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    args = parser.parse_args()
+
+    text, sections = topic_filing(args.section_chars, args.sections_per_topic)
+
+    chunker = IncrementalChunker(1000, 200)
+    char_chunks = chunker.feed(text) + chunker.finish()
+    baseline = build_store(char_chunks)
+
+    spans = TokenChunker(args.chunk_tokens, args.overlap_tokens).spans(text)
+    packed = build_store([text[start:end] for start, end in spans], spans)
+    assembler = ContextAssembler(args.budget, estimate_tokens)
+
+    print(f"text: {len(text) / 1000:.0f}KB, char chunks: {len(char_chunks)}, token chunks: {len(spans)}")
+    totals = {"top-5 chars": np.zeros(3), "packed": np.zeros(3)}
+    for topic, terms in TOPICS.items():
+        query_vector = hashed_embedding(f"What do the {topic} notes say about {terms[0]} and {terms[1]}?")
+
+        chunks = [chunk for chunk, _ in baseline.search(query_vector, top_k=5, namespace="doc")]
+        baseline_row = measure(text, chunks, sections[topic])
+
+        hits = packed.search_ids(query_vector, top_k=args.candidates, namespace="doc")
+        candidates = [(packed.get_text(i), packed.get_span(i), score) for i, score in hits]
+        passages, _ = assembler.assemble(candidates)
+        packed_row = measure(text, passages, sections[topic])
+
+        print(f"  {topic}")
+        for label, row in (("top-5 chars", baseline_row), ("packed", packed_row)):
+            tokens, repeated, coverage = row
+            print(f"    {label:<12} context_tokens={tokens:<5} repeated_chars={repeated:<5} section_coverage={coverage:6.1%}")
+            totals[label] += row
+
+    print("  mean")
+    for label, (tokens, repeated, coverage) in totals.items():
+        n = len(TOPICS)
+        print(f"    {label:<12} context_tokens={tokens / n:<5.0f} repeated_chars={repeated / n:<5.0f} section_coverage={coverage / n:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark for the offline embedding backends.
+
+Embeds the token chunks of a synthetic filing with each backend that
+runs without the network (``hashing``, and ``local`` when
+sentence-transformers is installed, optionally int8-quantized) straight
+through ``EmbeddingBackend.embed`` with no cache, and reports chunks per
+second and the time for the whole document.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_embedding_backends --doc-chars 400000 --threads 4
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from app.services.embedding_backends import HashingBackend, LocalBackend
+from app.services.token_chunker import TokenChunker
+from benchmarks._fixtures import synthetic_filing_text
+
+
+def backends(args):
+    yield "hashing", HashingBackend
+    os.environ["LOCAL_EMBEDDING_THREADS"] = str(args.threads)
+    for quantize in ("false", "true"):
+        os.environ["LOCAL_EMBEDDING_QUANTIZE"] = quantize
+        yield f"local int8={quantize}", LocalBackend
+
+
+async def run(args):
+    text = synthetic_filing_text(args.doc_chars)
+    chunks = [text[start:end] for start, end in TokenChunker(256, 32).spans(text)]
+    print(f"text: {len(text) / 1000:.0f}KB, {len(chunks)} chunks")
+
+    for label, backend_class in backends(args):
+        try:
+            backend = backend_class()
+        except ImportError as e:
+            print(f"  {label:<18} skipped: {e}")
+            continue
+        await backend.embed(chunks[:8])
+        started = time.perf_counter()
+        for start in range(0, len(chunks), args.batch):
+            await backend.embed(chunks[start:start + args.batch])
+        elapsed = time.perf_counter() - started
+        print(
+            f"  {label:<18} model={backend.model} dimension={backend.dimension} "
+            f"{len(chunks) / elapsed:8.0f} chunks/s  document {elapsed * 1000:8.0f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--doc-chars", type=int, default=400_000)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
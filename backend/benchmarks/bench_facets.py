@@ -0,0 +1,127 @@
+"""
+Benchmark for multi-facet retrieval.
+
+Coverage: a synthetic filing holds one section per facet of a request
+(``comprehensive-review`` with ``risk-&-revenue`` by default) among
+unrelated sections. Its token chunks are packed into the context once
+for the request query alone and once for the query with its facets, and
+each run reports how many facet sections reach the context and the
+share of their text it holds. Embeddings are hashed bags of words, as in
+``bench_context``.
+
+Cost: on a store of random vectors, the facet queries are searched
+one ``search_ids`` call at a time and in a single ``search_ids_many``
+matrix search, and the mean time per request is reported for each.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_facets --store-vectors 100000
+"""
+
+import argparse
+import random
+import re
+import time
+
+import numpy as np
+
+from app.services.context import ContextAssembler
+from app.services.facets import facet_queries
+from app.services.rag import RAGPipeline
+from app.services.token_chunker import TokenChunker
+from app.services.vector_store import VectorStore
+from benchmarks._fixtures import synthetic_filing_text
+from benchmarks.bench_context import TOPICS, build_store, estimate_tokens, hashed_embedding, measure
+
+DEFAULT_QUERY = "Analyze this financial document and extract key insights"
+
+
+def facet_filing(facets, section_chars, seed=7):
+    """Filing text with a section per facet and per unrelated topic, and the facet sections"""
+    rng = random.Random(seed)
+    sections = [(facet, re.findall(r"[a-z]+", facet.lower())) for facet in facets]
+    sections += [(None, [topic] + terms) for topic, terms in TOPICS.items()]
+    rng.shuffle(sections)
+    filler = re.split(r"(?<=\.) ", synthetic_filing_text(section_chars * len(sections), seed))
+
+    parts, spans, size = [], {}, 0
+    for facet, words in sections:
+        sentences = []
+        while sum(len(s) + 1 for s in sentences) < section_chars:
+            sentences.append(f"The {' '.join(rng.sample(words, min(3, len(words))))} {rng.choice(filler)}")
+        section = " ".join(sentences)
+        start = size + (1 if parts else 0)
+        parts.append(section)
+        size = start + len(section)
+        if facet is not None:
+            spans[facet] = (start, size)
+    return " ".join(parts), spans
+
+
+def coverage(args, analysis_type, focus_area):
+    queries = facet_queries(DEFAULT_QUERY, analysis_type, focus_area, args.max_queries)
+    facets = queries[1:]
+    text, sections = facet_filing(facets, args.section_chars)
+    spans = TokenChunker(256, 32).spans(text)
+    store = build_store([text[start:end] for start, end in spans], spans)
+    assembler = ContextAssembler(args.budget, estimate_tokens)
+
+    print(f"coverage: {analysis_type} / {focus_area}, {len(facets)} facets, text {len(text) / 1000:.0f}KB")
+    for label, queries in (("query only", queries[:1]), ("with facets", queries)):
+        hit_lists = store.search_ids_many(
+            [hashed_embedding(query) for query in queries], top_k=args.candidates, namespace="doc"
+        )
+        candidates = [
+            (store.get_text(i), store.get_span(i), score)
+            for i, score in RAGPipeline._interleave(hit_lists, args.candidates)
+        ]
+        passages, tokens = assembler.assemble(candidates)
+        rows = [measure(text, passages, [sections[facet]]) for facet in facets]
+        reached = sum(row[2] > 0 for row in rows)
+        print(
+            f"  {label:<12} queries={len(queries)} context_tokens={tokens:<5} "
+            f"facets_reached={reached}/{len(facets)} mean_facet_coverage={np.mean([row[2] for row in rows]):6.1%}"
+        )
+
+
+def search_cost(args, analysis_type, focus_area):
+    rng = np.random.default_rng(0)
+    store = VectorStore(dimension=args.dimension)
+    for start in range(0, args.store_vectors, 50_000):
+        count = min(50_000, args.store_vectors - start)
+        store.add_vectors(rng.standard_normal((count, args.dimension)).astype(np.float32), [""] * count, "doc")
+    queries = rng.standard_normal(
+        (len(facet_queries(DEFAULT_QUERY, analysis_type, focus_area, args.max_queries)), args.dimension)
+    ).astype(np.float32)
+
+    print(f"search: {args.store_vectors} x {args.dimension}d flat vectors, {len(queries)} queries per request")
+    for label, search in (
+        ("one call per query", lambda: [store.search_ids(q, top_k=args.candidates, namespace="doc") for q in queries]),
+        ("one matrix search", lambda: store.search_ids_many(queries, top_k=args.candidates, namespace="doc")),
+    ):
+        search()
+        started = time.perf_counter()
+        for _ in range(args.repeats):
+            search()
+        print(f"  {label:<20} {(time.perf_counter() - started) / args.repeats * 1000:8.1f}ms per request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--analysis-type", default="comprehensive-review")
+    parser.add_argument("--focus-area", default="risk-&-revenue")
+    parser.add_argument("--max-queries", type=int, default=5)
+    parser.add_argument("--section-chars", type=int, default=8000)
+    parser.add_argument("--budget", type=int, default=1100)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--store-vectors", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    coverage(args, args.analysis_type, args.focus_area)
+    search_cost(args, args.analysis_type, args.focus_area)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark for the HTML text-extraction backends.
+
+Generates EDGAR inline-XBRL-shaped HTML of the requested sizes and runs
+every available backend on it, reporting wall time, peak Python heap and
+whether the normalised text matches the BeautifulSoup reference.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_html --mb 1 10 30
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from app.services.html_text import HAS_LXML, HTML_BACKENDS, normalize_whitespace
+from benchmarks._fixtures import synthetic_filing_html
+
+
+def measure(backend: str, content: bytes):
+    extract = HTML_BACKENDS[backend]
+    started = time.perf_counter()
+    text = normalize_whitespace(extract(content))
+    elapsed = time.perf_counter() - started
+
+    # Separate traced run: tracing slows the Python-heavy backends considerably
+    tracemalloc.start()
+    extract(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return text, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--backends", nargs="+", default=list(HTML_BACKENDS))
+    args = parser.parse_args()
+
+    backends = [b for b in args.backends if b != "lxml" or HAS_LXML]
+    for mb in args.mb:
+        content = synthetic_filing_html(int(mb * 1024 * 1024))
+        print(f"html: {len(content) / 1e6:.1f}MB")
+        results = {}
+        for backend in sorted(backends, key=lambda b: b != "bs4"):
+            results[backend] = measure(backend, content)
+        reference, baseline, _ = results.get("bs4", (None, None, None))
+        for backend, (text, elapsed, peak) in results.items():
+            speedup = f"{baseline / elapsed:5.1f}x" if baseline else "  n/a"
+            same = "n/a" if reference is None else text == reference
+            print(
+                f"  {backend:<7} time={elapsed:6.2f}s speedup={speedup} "
+                f"peak_heap={peak / 1e6:7.1f}MB chars={len(text):<9} matches_bs4={same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark for hybrid (vector + BM25) retrieval.
+
+Exact-term recall: a synthetic filing gets one sentence planted per
+probe, each carrying a term embeddings blur (a metric name, a section
+number, an amount, a ticker). The embedding model is simulated by a
+hashed bag of words over the filler vocabulary only, so the planted
+terms are out of its vocabulary the way rare tokens are for a real
+model. For each probe query the planted chunk's rank and the context
+tokens spent to reach it are reported for vector search alone and for
+vector scores fused with BM25 (``fuse_scores``) at several weights.
+
+Cost: time to build the BM25 index of a document and per query search.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_hybrid --doc-chars 400000
+"""
+
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+os.environ["VECTOR_WAL_ENABLED"] = "false"
+os.environ.setdefault("FAISS_INDEX_PATH", tempfile.mkdtemp())
+
+from app.services.lexical_index import fuse_scores  # noqa: E402
+from app.services.token_chunker import TokenChunker  # noqa: E402
+from app.services.vector_store import VectorStore  # noqa: E402
+from benchmarks._fixtures import synthetic_filing_text  # noqa: E402
+
+DIMENSION = 256
+# (planted sentence, query asking for it); none of the terms occur in the filler
+PROBES = [
+    ("Segment EBITDAR for the lodging business was $97.3 million.", "What was EBITDAR?"),
+    ("Quantitative disclosures about market risk are in Item 7A.", "What does Item 7A cover?"),
+    ("We recorded a goodwill impairment of $47.35M in the quarter.", "Was there a $47.35M charge?"),
+    ("Our common stock trades under the symbol ZQXT.", "Where does our common stock ZQXT trade?"),
+    ("The term loan bears interest at SOFR plus 2.75%.", "What is the SOFR spread on the term loan?"),
+]
+
+
+def planted_filing(doc_chars, seed=7):
+    """Filing text with each probe sentence inserted at a random place"""
+    rng = random.Random(seed)
+    sentences = re.split(r"(?<=\.) ", synthetic_filing_text(doc_chars, seed))
+    for planted, _ in PROBES:
+        sentences.insert(rng.randrange(len(sentences)), planted)
+    return " ".join(sentences)
+
+
+def embedding_model(vocabulary):
+    """Hashed bag of words that ignores words outside vocabulary"""
+    def embed(text):
+        vector = np.zeros(DIMENSION, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            if word in vocabulary:
+                vector[zlib.crc32(word.encode()) % DIMENSION] += 1.0
+        return vector
+    return embed
+
+
+def first_rank(hits, targets):
+    """1-based rank of the first target hit, or None"""
+    for rank, (vector_id, _) in enumerate(hits, 1):
+        if vector_id in targets:
+            return rank
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--doc-chars", type=int, default=400_000)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--weights", default="0.3,0.5,0.7")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    weights = [float(weight) for weight in args.weights.split(",")]
+
+    vocabulary = set(re.findall(r"\w+", synthetic_filing_text(args.doc_chars).lower()))
+    embed = embedding_model(vocabulary)
+    text = planted_filing(args.doc_chars)
+    spans = TokenChunker(256, 32).spans(text)
+    chunks = [text[start:end] for start, end in spans]
+    store = VectorStore(dimension=DIMENSION)
+    ids = store.add_vectors(np.vstack([embed(chunk) for chunk in chunks]), chunks, "doc", spans=spans)
+    chunk_tokens = np.mean([len(chunk) // 4 for chunk in chunks])
+
+    started = time.perf_counter()
+    store.search_lexical([""], top_k=1, namespace="doc")
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f"text: {len(text) / 1000:.0f}KB, {len(chunks)} chunks of ~{chunk_tokens:.0f} tokens")
+
+    labels = ["vector only"] + [f"hybrid w={weight}" for weight in weights]
+    found = {label: 0 for label in labels}
+    for planted, query in PROBES:
+        targets = {int(i) for i, chunk in zip(ids, chunks) if planted in chunk}
+        vector_hits = store.search_ids(embed(query), top_k=args.candidates, namespace="doc")
+        lexical_hits = store.search_lexical([query], top_k=args.candidates, namespace="doc")[0]
+        rankings = [vector_hits] + [fuse_scores(vector_hits, lexical_hits, weight) for weight in weights]
+
+        print(f"  {query}")
+        for label, hits in zip(labels, rankings):
+            rank = first_rank(hits[:args.candidates], targets)
+            found[label] += rank is not None
+            reached = f"rank={rank:<3} tokens_to_reach={rank * chunk_tokens:6.0f}" if rank else "not in candidates"
+            print(f"    {label:<14} {reached}")
+    print("  found: " + ", ".join(f"{label} {count}/{len(PROBES)}" for label, count in found.items()))
+
+    queries = [query for _, query in PROBES]
+    started = time.perf_counter()
+    for _ in range(args.repeats):
+        store.search_lexical(queries, top_k=args.candidates, namespace="doc")
+    query_ms = (time.perf_counter() - started) / (args.repeats * len(queries)) * 1000
+    print(f"bm25: build {build_ms:.1f}ms, search {query_ms:.3f}ms per query")
+
+
+if __name__ == "__main__":
+    main()
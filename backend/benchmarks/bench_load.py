@@ -0,0 +1,260 @@
+"""
+Load test for the analysis API against a local stand-in OpenAI server.
+
+Starts ``benchmarks._fake_openai_server`` and the service (uvicorn,
+``OPENAI_BASE_URL`` pointed at the fake) as separate processes, so the
+service runs exactly as deployed, through its real OpenAI client. For
+each concurrency level it starts a fresh service with empty stores and
+keeps that many clients posting analyses of a pool of synthetic
+filings (the first request per filing ingests it, the rest only
+retrieve), then reports:
+
+- requests per second and errors
+- end-to-end latency p50/p95/p99
+- p50/p95 of each pipeline stage, from the ``/api/analyze/stream``
+  stage events
+- what the fake API saw: embedding and chat requests, injected 429s
+  and the most requests it had in flight at once
+
+``--max-p95-ms`` and ``--min-rps`` turn it into a check: the exit
+status is 1 if any level misses them. ``--json`` writes the results.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_load --concurrency 1,4,16 --requests 48 \\
+        --embedding-latency lognormal:0.15,0.5 --chat-latency uniform:1,2 --rate-limit-rate 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+from benchmarks._fixtures import synthetic_filing_text
+
+ANALYSIS_TYPES = ["comprehensive-review", "executive-summary", "risk-assessment", "financial-metrics"]
+STAGES = ["extracted", "cached", "chunked", "embedded", "retrieved", "analyzed"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start(command, env, log_path) -> subprocess.Popen:
+    with open(log_path, "w") as log:
+        return subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with status {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def analyze(client: httpx.AsyncClient, body: dict, stream: bool) -> dict:
+    """One analysis: its latency, outcome and, when streamed, stage timings"""
+    started = time.perf_counter()
+    stages, error = {}, None
+    try:
+        if stream:
+            async with client.stream("POST", "/api/analyze/stream", json=body) as response:
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                    elif line.startswith("data: "):
+                        data = json.loads(line[len("data: "):])
+                        if event in STAGES:
+                            stages[event] = data["stage_ms"]
+                        elif event == "error":
+                            error = f"{data['status']}: {data['detail']}"
+        else:
+            response = await client.post("/api/analyze", json=body)
+            if response.status_code != 200:
+                error = f"{response.status_code}: {response.text[:200]}"
+    except httpx.HTTPError as e:
+        error = f"{type(e).__name__}: {e}"
+    return {"latency_ms": (time.perf_counter() - started) * 1000, "stages": stages, "error": error}
+
+
+async def run_level(args, concurrency: int, documents, fake_url: str) -> dict:
+    """Start a fresh service, drive it at one concurrency level and summarise"""
+    scratch = tempfile.mkdtemp()
+    port = free_port()
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "sk-load-test",
+        "OPENAI_BASE_URL": f"{fake_url}/v1",
+        "EMBEDDING_BACKEND": "openai",
+        "FAISS_INDEX_PATH": os.path.join(scratch, "faiss_index"),
+        "EMBEDDING_CACHE_PATH": os.path.join(scratch, "embedding_cache.sqlite3"),
+        "RESULT_CACHE_PATH": os.path.join(scratch, "result_cache.sqlite3"),
+        "JOB_STORE_PATH": os.path.join(scratch, "jobs.sqlite3"),
+        **dict(setting.split("=", 1) for setting in args.app_env),
+    }
+    service = start(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env,
+        os.path.join(scratch, "service.log"),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        # Ready once the pipeline is built and its startup warm-up is done
+        await wait_ready(f"{base_url}/api/ready", service)
+        async with httpx.AsyncClient() as client:
+            # Count only what this level's requests cause, not the startup warm-up
+            await asyncio.sleep(args.settle)
+            await client.post(f"{fake_url}/stats/reset")
+
+        results = []
+        issued = iter(range(args.requests))
+
+        async def worker(client: httpx.AsyncClient):
+            for n in issued:
+                body = {
+                    "type": "text",
+                    "input": documents[n % len(documents)],
+                    "analysis-type": ANALYSIS_TYPES[n % len(ANALYSIS_TYPES)],
+                    "focus-area": "general-overview",
+                    "bypass-cache": not args.use_cache,
+                }
+                results.append(await analyze(client, body, stream=args.endpoint == "stream"))
+
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+            wall = time.perf_counter() - started
+            fake_stats = (await client.get(f"{fake_url}/stats")).json()
+    finally:
+        stop(service)
+
+    ok = [result for result in results if result["error"] is None]
+    latencies = np.array([result["latency_ms"] for result in ok]) if ok else np.zeros(1)
+    stage_times = defaultdict(list)
+    for result in ok:
+        for stage, ms in result["stages"].items():
+            stage_times[stage].append(ms)
+    errors = [result["error"] for result in results if result["error"] is not None]
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": len(errors),
+        "first_errors": errors[:3],
+        "rps": round(len(ok) / wall, 2),
+        "latency_ms": {f"p{q}": round(float(np.percentile(latencies, q)), 1) for q in (50, 95, 99)},
+        "stages_ms": {
+            stage: {f"p{q}": round(float(np.percentile(stage_times[stage], q)), 1) for q in (50, 95)}
+            for stage in STAGES
+            if stage_times[stage]
+        },
+        "fake_api": {key: value for key, value in fake_stats.items() if key != "in_flight"},
+    }
+
+
+def report(level: dict):
+    latency = level["latency_ms"]
+    print(
+        f"concurrency={level['concurrency']:<3} requests={level['requests']} errors={level['errors']} "
+        f"rps={level['rps']:.2f} p50={latency['p50']:.0f}ms p95={latency['p95']:.0f}ms p99={latency['p99']:.0f}ms"
+    )
+    for stage, ms in level["stages_ms"].items():
+        print(f"    {stage:<10} p50={ms['p50']:8.1f}ms p95={ms['p95']:8.1f}ms")
+    print("    fake api: " + " ".join(f"{key}={value}" for key, value in level["fake_api"].items()))
+    for error in level["first_errors"]:
+        print(f"    error: {error}")
+
+
+async def run(args) -> int:
+    documents = [synthetic_filing_text(args.doc_chars, seed) for seed in range(args.documents)]
+    scratch = tempfile.mkdtemp()
+    fake_port = free_port()
+    fake = start(
+        [
+            sys.executable, "-m", "benchmarks._fake_openai_server", "--port", str(fake_port),
+            "--embedding-latency", args.embedding_latency, "--chat-latency", args.chat_latency,
+            "--per-input-latency", str(args.per_input_latency), "--rate-limit-rate", str(args.rate_limit_rate),
+        ],
+        os.environ.copy(),
+        os.path.join(scratch, "fake_openai.log"),
+    )
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    levels, failures = [], []
+    try:
+        await wait_ready(f"{fake_url}/stats", fake)
+        print(
+            f"{args.requests} requests per level over {args.documents} filings of {args.doc_chars / 1000:.0f}KB, "
+            f"/api/analyze{'/stream' if args.endpoint == 'stream' else ''}; logs in {scratch}"
+        )
+        for concurrency in [int(value) for value in args.concurrency.split(",")]:
+            level = await run_level(args, concurrency, documents, fake_url)
+            levels.append(level)
+            report(level)
+            if level["errors"]:
+                failures.append(f"concurrency {concurrency}: {level['errors']} errors")
+            if args.max_p95_ms is not None and level["latency_ms"]["p95"] > args.max_p95_ms:
+                failures.append(f"concurrency {concurrency}: p95 {level['latency_ms']['p95']:.0f}ms > {args.max_p95_ms:.0f}ms")
+            if args.min_rps is not None and level["rps"] < args.min_rps:
+                failures.append(f"concurrency {concurrency}: {level['rps']:.2f} rps < {args.min_rps}")
+    finally:
+        stop(fake)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "levels": levels, "failures": failures}, f, indent=2)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated client counts, one run each")
+    parser.add_argument("--requests", type=int, default=48, help="analyses per concurrency level")
+    parser.add_argument("--documents", type=int, default=8)
+    parser.add_argument("--doc-chars", type=int, default=100_000)
+    parser.add_argument("--endpoint", choices=["stream", "analyze"], default="stream")
+    parser.add_argument("--use-cache", action="store_true", help="allow cached analyses (default: bypass)")
+    parser.add_argument("--embedding-latency", default="lognormal:0.15,0.4")
+    parser.add_argument("--per-input-latency", type=float, default=0.0005)
+    parser.add_argument("--chat-latency", default="uniform:1,2")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="service setting")
+    parser.add_argument("--settle", type=float, default=0.0, help="seconds to wait after the service is ready")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--max-p95-ms", type=float)
+    parser.add_argument("--min-rps", type=float)
+    parser.add_argument("--json")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
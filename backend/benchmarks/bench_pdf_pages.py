@@ -0,0 +1,55 @@
+"""
+Benchmark for parallel PDF page extraction.
+
+Extracts a large synthetic filing PDF with the in-process extractor and
+then through ``PDFPagePool`` with an increasing number of worker
+processes, checking that every run returns the same pages in the same
+order. Speedup is bounded by the number of cores available.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_pdf_pages --pages 300 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+
+from app.services.pdf_pages import PDFPagePool
+from benchmarks._fixtures import synthetic_filing_pdf
+
+
+def extract(pool: PDFPagePool, pdf_bytes: bytes):
+    started = time.perf_counter()
+    pages = list(pool.iter_pages(pdf_bytes))
+    return pages, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--chars-per-page", type=int, default=3000)
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    args = parser.parse_args()
+
+    pdf_bytes = synthetic_filing_pdf(args.pages, args.chars_per_page)
+    print(f"pdf: {args.pages} pages, {len(pdf_bytes) / 1e6:.2f}MB, cores: {os.cpu_count()}")
+
+    reference, baseline = extract(PDFPagePool(workers=1), pdf_bytes)
+    print(f"in-process   time={baseline:6.2f}s pages/s={len(reference) / baseline:6.1f}")
+
+    for workers in args.workers:
+        pool = PDFPagePool(workers=workers, pages_per_task=args.pages_per_task, min_pages=0)
+        # Start the workers outside the timed run
+        list(pool.iter_pages(synthetic_filing_pdf(workers, 200)))
+        pages, elapsed = extract(pool, pdf_bytes)
+        pool.shutdown()
+        print(
+            f"workers={workers:<4} time={elapsed:6.2f}s pages/s={len(pages) / elapsed:6.1f} "
+            f"speedup={baseline / elapsed:5.2f}x order_ok={pages == reference}"
+        )
+
+
+if __name__ == "__main__":
+    main()
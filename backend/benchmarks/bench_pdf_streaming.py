@@ -0,0 +1,117 @@
+"""
+Benchmark for streaming PDF ingestion.
+
+Ingests the same synthetic PDF twice through a ``RAGPipeline`` with a
+latency-simulating fake embedding client: once buffered (extract every
+page, join, clean, chunk, then embed) and once streamed (pages feed the
+incremental chunker and embedding batches go out while later pages are
+still being parsed). Reports wall time, time to the first embedding
+request and, with ``--trace-memory``, the peak Python heap while ingesting
+(tracing slows parsing several-fold, so timings from that run are not
+comparable).
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_pdf_streaming --pages 40
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ["VECTOR_WAL_ENABLED"] = "false"
+
+from app.services.rag import RAGPipeline  # noqa: E402
+from benchmarks._fakes import FakeAsyncOpenAI  # noqa: E402
+from benchmarks._fixtures import synthetic_filing_pdf  # noqa: E402
+
+
+class _FirstCallClock:
+    """Wraps the fake embeddings endpoint to record when the first call starts."""
+
+    def __init__(self, embeddings):
+        self._embeddings = embeddings
+        self.first_call = None
+
+    async def create(self, **kwargs):
+        if self.first_call is None:
+            self.first_call = time.perf_counter()
+        return await self._embeddings.create(**kwargs)
+
+
+def build_pipeline(embedding_latency: float, batch_chunks: int) -> RAGPipeline:
+    # Fresh index and embedding cache so both modes pay for every embedding
+    scratch = tempfile.mkdtemp()
+    os.environ["FAISS_INDEX_PATH"] = os.path.join(scratch, "faiss_index")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(scratch, "embedding_cache.sqlite3")
+    pipeline = RAGPipeline()
+    fake = FakeAsyncOpenAI(embedding_latency=embedding_latency)
+    fake.embeddings = _FirstCallClock(fake.embeddings)
+    pipeline.embedder.backend.client = fake
+    pipeline.stream_batch_chunks = batch_chunks
+    # Small sub-batches so the buffered path pays per-request latency too
+    pipeline.embedder.max_batch_inputs = batch_chunks
+    return pipeline
+
+
+async def ingest_buffered(pipeline: RAGPipeline, pdf_bytes: bytes, document_id: str):
+    text = await asyncio.to_thread(pipeline.extractor._parse_pdf, pdf_bytes)
+    clean = pipeline.extractor.clean_text(text)
+    await pipeline._ingest(document_id, clean)
+
+
+async def ingest_streamed(pipeline: RAGPipeline, pdf_bytes: bytes, document_id: str):
+    await pipeline._ingest_stream(document_id, pdf_bytes)
+
+
+async def measure(label, ingest, pdf_bytes, embedding_latency, batch_chunks, trace_memory):
+    pipeline = build_pipeline(embedding_latency, batch_chunks)
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await ingest(pipeline, pdf_bytes, f"{label}-{started}")
+    elapsed = time.perf_counter() - started
+    memory = ""
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory = f" peak_heap={peak / 1e6:7.1f}MB"
+
+    first = pipeline.embedder.backend.client.embeddings.first_call
+    first_call = (first - started) if first else float("nan")
+    print(
+        f"{label:<9} wall={elapsed:6.2f}s first_embedding_call={first_call:6.2f}s{memory} "
+        f"chunks={pipeline.vector_store.get_stats()['total_texts']}"
+    )
+    return elapsed
+
+
+async def run(pages, chars_per_page, embedding_latency, batch_chunks, trace_memory):
+    pdf_bytes = synthetic_filing_pdf(pages, chars_per_page)
+    print(f"pdf: {pages} pages, {len(pdf_bytes) / 1e6:.2f}MB")
+
+    args = (pdf_bytes, embedding_latency, batch_chunks, trace_memory)
+    buffered = await measure("buffered", ingest_buffered, *args)
+    streamed = await measure("streamed", ingest_streamed, *args)
+    print(f"speedup: {buffered / streamed:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--chars-per-page", type=int, default=3000)
+    parser.add_argument("--embedding-latency", type=float, default=1.0)
+    parser.add_argument("--batch-chunks", type=int, default=8)
+    parser.add_argument("--trace-memory", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(
+        args.pages, args.chars_per_page, args.embedding_latency, args.batch_chunks, args.trace_memory
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark for precomputed query embeddings.
+
+Indexes one filing, then times repeated analyses of it (result cache
+bypassed, instant LLM) up to the ``retrieved`` stage, i.e. the work on
+the latency path before the LLM call, cycling through every analysis
+type and focus area with the default query:
+
+- cold: a fresh process with empty caches, embedding queries on demand
+- disk cache only: queries found in the persistent embedding cache,
+  one SQLite lookup per request (the previous behaviour once warm)
+- warmed: after ``RAGPipeline.warm_up()``, queries served from memory
+
+It reports embedding API requests and the median and p95 time to
+retrieval per request.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_query_embeddings --embedding-latency 0.3
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ["VECTOR_WAL_ENABLED"] = "false"
+_scratch = tempfile.mkdtemp()
+os.environ["FAISS_INDEX_PATH"] = os.path.join(_scratch, "faiss_index")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_scratch, "embedding_cache.sqlite3")
+
+from app.models.schema import AnalyzeRequest  # noqa: E402
+from app.services.facets import ANALYSIS_FACETS, FOCUS_FACETS  # noqa: E402
+from app.services.rag import RAGPipeline  # noqa: E402
+from benchmarks._fakes import FakeAsyncOpenAI  # noqa: E402
+from benchmarks._fixtures import synthetic_filing_text  # noqa: E402
+
+
+def build_pipeline(fake):
+    pipeline = RAGPipeline()
+    pipeline.embedder.backend.client = fake
+    pipeline.analyzer.client = fake
+    return pipeline
+
+
+async def time_to_retrieval(pipeline, text, rounds):
+    timings = []
+    for _ in range(rounds):
+        for analysis_type in ANALYSIS_FACETS:
+            for focus_area in FOCUS_FACETS:
+                request = AnalyzeRequest(**{
+                    "type": "text",
+                    "input": text,
+                    "analysis-type": analysis_type,
+                    "focus-area": focus_area,
+                    "bypass-cache": True,
+                })
+                retrieved = []
+                await pipeline.process_document(
+                    request, lambda event, data: event == "retrieved" and retrieved.append(data["elapsed_ms"])
+                )
+                timings.append(retrieved[0])
+    return np.array(timings)
+
+
+async def run(args):
+    fake = FakeAsyncOpenAI(embedding_latency=args.embedding_latency, chat_latency=0)
+    text = synthetic_filing_text(args.doc_chars)
+
+    pipeline = build_pipeline(fake)
+    clean_text = pipeline.extractor.clean_text(text)
+    await pipeline._ingest(pipeline.extractor.fingerprint(clean_text), clean_text)
+    pipeline.vector_store.save()
+
+    for label in ("cold", "disk cache only", "warmed"):
+        if label != "cold":
+            # A new process: nothing in memory, the SQLite cache and index persist
+            pipeline = build_pipeline(fake)
+        if label == "disk cache only":
+            pipeline.embedder.embed_queries = pipeline.embedder.embed_batch
+        calls = fake.embeddings.calls
+        if label == "warmed":
+            await pipeline.warm_up()
+            calls = fake.embeddings.calls
+        timings = await time_to_retrieval(pipeline, text, args.rounds)
+        print(
+            f"  {label:<16} embedding_requests={fake.embeddings.calls - calls:<3} "
+            f"to_retrieval p50={np.percentile(timings, 50):7.1f}ms p95={np.percentile(timings, 95):7.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--doc-chars", type=int, default=200_000)
+    parser.add_argument("--embedding-latency", type=float, default=0.3)
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Time-to-first-byte benchmark for the streaming analysis endpoint.
+
+Serves the app with uvicorn on a local port, with the OpenAI clients
+replaced by latency-simulating fakes. It posts the same large filing to
+``/api/analyze`` (one JSON body at the end) and to ``/api/analyze/stream``
+(Server-Sent Events), and reports for each:
+
+- time to the first byte
+- time to the first pipeline stage event
+- time to the first LLM delta
+- total time
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_sse --doc-chars 2000000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ["VECTOR_WAL_ENABLED"] = "false"
+_scratch = tempfile.mkdtemp()
+os.environ["FAISS_INDEX_PATH"] = os.path.join(_scratch, "faiss_index")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_scratch, "embedding_cache.sqlite3")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.routers import analyze  # noqa: E402
+from benchmarks._fakes import FakeAsyncOpenAI  # noqa: E402
+from benchmarks._fixtures import synthetic_filing_text  # noqa: E402
+
+
+def serve() -> str:
+    """Start the app on a free local port; returns its base URL"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def blocking(client: httpx.AsyncClient, body: dict) -> dict:
+    started = time.perf_counter()
+    async with client.stream("POST", "/api/analyze", json=body) as response:
+        first_byte = None
+        async for _ in response.aiter_bytes():
+            first_byte = first_byte or time.perf_counter() - started
+    return {"first_byte": first_byte, "total": time.perf_counter() - started}
+
+
+async def streamed(client: httpx.AsyncClient, body: dict) -> dict:
+    started = time.perf_counter()
+    timings = {"first_byte": None, "first_stage": None, "first_llm_delta": None}
+    stages = []
+    async with client.stream("POST", "/api/analyze/stream", json=body) as response:
+        event = None
+        async for line in response.aiter_lines():
+            now = time.perf_counter() - started
+            timings["first_byte"] = timings["first_byte"] or now
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: ") and event not in ("started", "llm_delta", "result", "error"):
+                timings["first_stage"] = timings["first_stage"] or now
+                stages.append((event, json.loads(line[len("data: "):]).get("stage_ms")))
+            elif event == "llm_delta":
+                timings["first_llm_delta"] = timings["first_llm_delta"] or now
+            elif event == "error" and line.startswith("data: "):
+                raise RuntimeError(line)
+    timings["total"] = time.perf_counter() - started
+    timings["stages"] = stages
+    return timings
+
+
+async def run(args):
+    fake = FakeAsyncOpenAI(embedding_latency=args.embedding_latency, chat_latency=args.chat_latency)
+    pipeline = await analyze.pipeline_provider.get()
+    pipeline.embedder.backend.client = fake
+    pipeline.analyzer.client = fake
+    base_url = serve()
+
+    def body(seed):
+        # A distinct document per endpoint so neither reuses the other's index or result
+        return {"type": "text", "input": synthetic_filing_text(args.doc_chars, seed=seed)}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        print(f"document: {args.doc_chars / 1e6:.1f}MB text")
+        result = await blocking(client, body(1))
+        print(f"  /analyze         first_byte={result['first_byte']:6.2f}s total={result['total']:6.2f}s")
+        result = await streamed(client, body(2))
+        print(
+            f"  /analyze/stream  first_byte={result['first_byte']:6.2f}s "
+            f"first_stage={result['first_stage']:6.2f}s first_llm_delta={result['first_llm_delta']:6.2f}s "
+            f"total={result['total']:6.2f}s"
+        )
+        print("  stages: " + ", ".join(f"{name}={ms}ms" for name, ms in result["stages"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--doc-chars", type=int, default=2_000_000)
+    parser.add_argument("--embedding-latency", type=float, default=0.3)
+    parser.add_argument("--chat-latency", type=float, default=3.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Benchmark for import time and time-to-ready of the service.
+
+Import time: each of ``--modules`` is imported in fresh interpreters
+(``--runs`` times) and the median wall time is reported, along with the
+slowest of its direct imports from ``python -X importtime`` and which heavy
+libraries (faiss, numpy, openai, the PDF and HTML parsers) the import
+pulled in. Importing ``app.main`` should load none of them: the pipeline
+is built on first use.
+
+Time to ready: the service is started with uvicorn in a fresh process
+and timed until it answers ``/`` (listening) and ``/api/ready`` (pipeline
+built and warmed up), in two modes:
+
+- startup: ``WARMUP_ON_STARTUP=true``, the pipeline builds in the background
+- lazy: ``WARMUP_ON_STARTUP=false``, built by an explicit ``POST /api/warmup``
+
+It runs without an OpenAI key, so it also checks that the default
+configuration imports and becomes ready without credentials (the
+startup warm-up then fails and queries are embedded on demand).
+``--backend`` selects the embedding backend. ``--index-vectors`` first
+saves a store of that many vectors where the service loads its index,
+to include loading the index.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_startup --runs 5 --index-vectors 100000
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+HEAVY_MODULES = ["faiss", "numpy", "openai", "pdfplumber", "PyPDF2", "bs4", "lxml", "app.services.rag"]
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_time(module: str, env: dict) -> dict:
+    """Wall time to import a module in a fresh interpreter, and what it loaded"""
+    code = (
+        "import sys, time, json\n"
+        "started = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - started\n"
+        f"print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], env=env, capture_output=True, text=True, check=True
+    )
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    # The module's direct imports (one level of indentation) with their cumulative microseconds
+    measured["direct"] = [
+        (name, int(cumulative))
+        for _, cumulative, indent, name in IMPORTTIME_LINE.findall(result.stderr)
+        if len(indent) == 2
+    ]
+    return measured
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(client: httpx.Client, method: str, url: str, process: subprocess.Popen, timeout: float) -> float:
+    """Poll until url answers 200; returns when it did (perf_counter)"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"service exited with status {process.returncode}")
+        try:
+            if client.request(method, url).status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def time_to_ready(mode: str, env: dict, timeout: float) -> dict:
+    """Seconds from process start until the service listens and until it is ready"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**env, "WARMUP_ON_STARTUP": "true" if mode == "startup" else "false"}
+    with tempfile.TemporaryFile() as log:
+        started = time.perf_counter()
+        service = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            with httpx.Client(base_url=base_url, timeout=timeout) as client:
+                listening = wait_for(client, "GET", "/", service, timeout)
+                if mode == "startup":
+                    ready = wait_for(client, "GET", "/api/ready", service, timeout)
+                else:
+                    response = client.post("/api/warmup")
+                    response.raise_for_status()
+                    ready = time.perf_counter()
+                pipeline = client.get("/api/ready").json()
+        except Exception:
+            log.seek(0)
+            print(log.read().decode(errors="replace")[-2000:])
+            raise
+        finally:
+            service.terminate()
+            try:
+                service.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                service.kill()
+    return {
+        "listening_s": listening - started,
+        "ready_s": ready - started,
+        "build_s": pipeline["build_seconds"],
+        "warm_up_s": pipeline["warm_up_seconds"],
+    }
+
+
+def save_index(path: str, count: int, env: dict):
+    """A store of count random vectors where the service will load it"""
+    os.environ.update(env)
+    import numpy as np
+
+    from app.services.embedding_backends import create_backend
+    from app.services.rag import RAGPipeline
+    from app.services.vector_store import VectorStore
+
+    backend = create_backend(env["EMBEDDING_BACKEND"])
+    store = VectorStore(dimension=backend.dimension)
+    rng = np.random.default_rng(0)
+    for start in range(0, count, 20_000):
+        size = min(20_000, count - start)
+        vectors = rng.standard_normal((size, backend.dimension)).astype(np.float32)
+        store.add_vectors(vectors, [f"chunk {start + i}" for i in range(size)], f"doc-{start}")
+    store.save(RAGPipeline.index_name(backend))
+    print(f"saved {count} vectors to {path}")
+
+
+def median_of(runs, key):
+    return statistics.median(run[key] for run in runs if run[key] is not None) if runs else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modules", default="app.main,app.services.rag", help="comma-separated modules to time")
+    parser.add_argument("--top", type=int, default=8, help="slowest direct imports to list")
+    parser.add_argument("--modes", default="startup,lazy")
+    parser.add_argument("--backend", default="openai", help="EMBEDDING_BACKEND of the service")
+    parser.add_argument("--index-vectors", type=int, default=0)
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="service setting")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp()
+    env = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    env.update({
+        "EMBEDDING_BACKEND": args.backend,
+        "FAISS_INDEX_PATH": os.path.join(scratch, "faiss_index"),
+        "EMBEDDING_CACHE_PATH": os.path.join(scratch, "embedding_cache.sqlite3"),
+        "RESULT_CACHE_PATH": os.path.join(scratch, "result_cache.sqlite3"),
+        "JOB_STORE_PATH": os.path.join(scratch, "jobs.sqlite3"),
+        **dict(setting.split("=", 1) for setting in args.app_env),
+    })
+    results = {"imports": {}, "startup": {}}
+
+    for module in args.modules.split(","):
+        runs = [import_time(module, env) for _ in range(args.runs)]
+        slowest = sorted(runs[-1]["direct"], key=lambda item: -item[1])[:args.top]
+        results["imports"][module] = {
+            "median_s": median_of(runs, "seconds"),
+            "loaded": runs[-1]["loaded"],
+            "slowest": slowest,
+        }
+        print(f"import {module:<24} median {median_of(runs, 'seconds') * 1000:8.0f}ms  loads: {', '.join(runs[-1]['loaded']) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+        for name, microseconds in slowest:
+            print(f"    {name:<40} {microseconds / 1000:8.1f}ms")
+
+    if args.index_vectors:
+        save_index(env["FAISS_INDEX_PATH"], args.index_vectors, env)
+
+    for mode in args.modes.split(","):
+        runs = [time_to_ready(mode, env, args.timeout) for _ in range(args.runs)]
+        summary = {key: median_of(runs, key) for key in runs[0]}
+        results["startup"][mode] = summary
+        print(
+            f"startup {mode:<8} listening {summary['listening_s'] * 1000:8.0f}ms  ready {summary['ready_s'] * 1000:8.0f}ms  "
+            f"(build {summary['build_s'] * 1000:.0f}ms, warm-up {summary['warm_up_s'] * 1000:.0f}ms; medians of {args.runs})"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), **results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
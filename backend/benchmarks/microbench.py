@@ -0,0 +1,263 @@
+"""
+Microbenchmarks for the pipeline's CPU hot paths, saved as JSON.
+
+Each case times one operation on synthetic 10-K-sized input, set up
+outside the timed region:
+
+- ``clean_text``: ``TextExtractor.clean_text`` on filing text
+- ``html``: ``TextExtractor._parse_html`` on inline-XBRL-shaped HTML
+- ``pdf_pages``: ``TextExtractor.iter_pdf_pages`` over a text PDF
+- ``chunk_text``: ``Embedder.chunk_text`` on filing text
+- ``vector_add``: ``VectorStore.add_vectors`` into an empty store
+- ``vector_search``: ``search_ids`` with one query and
+  ``search_ids_many`` with five, on a store of N vectors
+- ``save`` / ``load``: a store of N vectors written and reopened
+- ``parse_analysis``: ``LLMAnalyzer.parse_analysis`` on model output
+
+Like ``timeit``, every round runs an operation enough times to last
+``--min-round`` seconds, and rounds repeat for ``--rounds``. The
+minimum, median, mean and spread of the per-call time are reported.
+Results are written to ``--json``, by default
+``benchmarks/results/<time>-<commit>.json``. ``--compare`` prints the
+change against an earlier file and flags cases slower by more than
+``--tolerance``.
+
+The default vector dimension is 384, so the 1M-vector store fits in
+~2GB of memory. ``--dimension 1536`` (text-embedding-3-small) needs
+about 6GB at 1M.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.microbench --vectors 1000,100000,1000000
+    python -m benchmarks.microbench --filter vector --compare benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+os.environ["VECTOR_WAL_ENABLED"] = "false"
+_scratch = tempfile.mkdtemp()
+os.environ["FAISS_INDEX_PATH"] = os.path.join(_scratch, "faiss_index")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_scratch, "embedding_cache.sqlite3")
+
+import faiss  # noqa: E402
+
+from app.services.embedder import Embedder  # noqa: E402
+from app.services.embedding_backends import HashingBackend  # noqa: E402
+from app.services.extractor import TextExtractor  # noqa: E402
+from app.services.llm_analyzer import LLMAnalyzer  # noqa: E402
+from app.services.vector_store import VectorStore  # noqa: E402
+from benchmarks._fakes import CANNED_ANALYSIS  # noqa: E402
+from benchmarks._fixtures import synthetic_filing_html, synthetic_filing_pdf, synthetic_filing_text  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def random_vectors(count, dimension, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32)
+
+
+def filled_store(count, dimension):
+    store = VectorStore(dimension=dimension)
+    for start in range(0, count, 50_000):
+        size = min(50_000, count - start)
+        store.add_vectors(random_vectors(size, dimension, start), [f"chunk {start + i}" for i in range(size)], "doc")
+    return store
+
+
+def cases(args):
+    """(name, params, setup) for every case; setup returns (operation, units processed per call, unit)"""
+    text_chars = args.doc_chars
+
+    def clean_text():
+        text = synthetic_filing_text(text_chars).replace(". ", ".  \n\t ").replace("%", "%\x00")
+        return lambda: TextExtractor.clean_text(text), len(text), "chars"
+
+    def html():
+        content = synthetic_filing_html(int(args.html_mb * 1024 * 1024))
+        return lambda: TextExtractor._parse_html(content), len(content), "bytes"
+
+    def pdf_pages():
+        content = synthetic_filing_pdf(args.pdf_pages)
+        return lambda: list(TextExtractor.iter_pdf_pages(content)), args.pdf_pages, "pages"
+
+    def chunk_text():
+        embedder = Embedder(HashingBackend())
+        text = synthetic_filing_text(text_chars)
+        return lambda: embedder.chunk_text(text), len(text), "chars"
+
+    def parse_analysis():
+        output = json.dumps(CANNED_ANALYSIS)
+        chunks = ["context"] * 8
+        return lambda: LLMAnalyzer.parse_analysis(output, chunks), 1, "responses"
+
+    yield "clean_text", {"chars": text_chars}, clean_text
+    yield "html", {"mb": args.html_mb}, html
+    yield "pdf_pages", {"pages": args.pdf_pages}, pdf_pages
+    yield "chunk_text", {"chars": text_chars}, chunk_text
+    yield "parse_analysis", {}, parse_analysis
+
+    for count in args.vectors:
+        params = {"vectors": count, "dimension": args.dimension}
+
+        def vector_add(count=count):
+            vectors = random_vectors(count, args.dimension)
+            texts = [""] * count
+            return lambda: VectorStore(dimension=args.dimension).add_vectors(vectors, texts, "doc"), count, "vectors"
+
+        def vector_search(count=count, queries=1):
+            store = filled_store(count, args.dimension)
+            query = random_vectors(queries, args.dimension, seed=-1 % 2**32)
+            if queries == 1:
+                return lambda: store.search_ids(query[0], top_k=20, namespace="doc"), 1, "queries"
+            return lambda: store.search_ids_many(query, top_k=20, namespace="doc"), queries, "queries"
+
+        def save(count=count):
+            store = filled_store(count, args.dimension)
+            return lambda: store.save(f"bench-{count}"), count, "vectors"
+
+        def load(count=count):
+            filled_store(count, args.dimension).save(f"bench-{count}")
+            return lambda: VectorStore(dimension=args.dimension).load(f"bench-{count}"), count, "vectors"
+
+        yield "vector_add", params, vector_add
+        yield "vector_search", {**params, "queries": 1}, vector_search
+        yield "vector_search", {**params, "queries": 5}, lambda count=count: vector_search(count, 5)
+        yield "save", params, save
+        yield "load", params, load
+
+
+def measure(operation, rounds, min_round):
+    """Per-call seconds of each round, timeit-style"""
+    operation()
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_round / elapsed) + 1))
+    timings = [elapsed / number]
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        timings.append((time.perf_counter() - started) / number)
+    return timings, number
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_key(result):
+    return result["name"] + "".join(f" {key}={value}" for key, value in sorted(result["params"].items()))
+
+
+def compare(results, baseline_path, tolerance):
+    """Print each case's change against a baseline file; returns the regressed cases"""
+    with open(baseline_path) as f:
+        baseline = {case_key(result): result for result in json.load(f)["results"]}
+    print(f"\ncompared with {baseline_path}:")
+    regressed = []
+    for result in results:
+        before = baseline.get(case_key(result))
+        if before is None:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  SLOWER"
+            regressed.append(case_key(result))
+        elif ratio < 1 - tolerance:
+            flag = "  faster"
+        print(f"  {case_key(result):<52} {before['median_s'] * 1000:10.3f}ms -> {result['median_s'] * 1000:10.3f}ms  x{ratio:5.2f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filter", nargs="+", help="run only cases whose name contains one of these")
+    parser.add_argument("--doc-chars", type=int, default=600_000)
+    parser.add_argument("--html-mb", type=float, default=5)
+    parser.add_argument("--pdf-pages", type=int, default=100)
+    parser.add_argument("--vectors", type=lambda value: [int(n) for n in value.split(",")], default=[1000, 100_000, 1_000_000])
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-round", type=float, default=0.2, help="seconds each round lasts at least")
+    parser.add_argument("--json", help="output file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change reported as a regression")
+    args = parser.parse_args()
+
+    results = []
+    for name, params, setup in cases(args):
+        if args.filter and not any(word in name for word in args.filter):
+            continue
+        operation, units, unit = setup()
+        timings, number = measure(operation, args.rounds, args.min_round)
+        median = statistics.median(timings)
+        result = {
+            "name": name,
+            "params": params,
+            "rounds": len(timings),
+            "calls_per_round": number,
+            "min_s": min(timings),
+            "median_s": median,
+            "mean_s": statistics.mean(timings),
+            "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            "throughput": {f"{unit}_per_s": units / median},
+        }
+        results.append(result)
+        print(
+            f"{case_key(result):<52} median {median * 1000:10.3f}ms  min {min(timings) * 1000:10.3f}ms  "
+            f"±{result['stdev_s'] / median:5.1%}  {units / median:12.0f} {unit}/s"
+        )
+
+    commit = git_commit()
+    started = datetime.now(timezone.utc)
+    path = args.json or os.path.join(RESULTS_DIR, f"{started:%Y%m%dT%H%M%SZ}-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "meta": {
+                    "timestamp": started.isoformat(),
+                    "commit": commit,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpus": os.cpu_count(),
+                    "numpy": np.__version__,
+                    "faiss": getattr(faiss, "__version__", None),
+                    "args": {key: value for key, value in vars(args).items() if key not in ("json", "compare")},
+                },
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"results: {path}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
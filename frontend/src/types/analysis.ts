@@ -5,6 +5,7 @@ export type AnalyzeRequest = {
     "analysis-type": "comprehensive-review" | "executive-summary" | "risk-assessment" | "financial-metrics";
     "focus-area": "general-overview" | "risk-&-revenue" | "profitability-&-margins" | "debt-&-liquidity";
     query?: string;
+    "bypass-cache"?: boolean;
   };
   
   